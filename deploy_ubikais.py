@@ -11,6 +11,7 @@ import json
 import zipfile
 import os
 import io
+import sqlite3
 from datetime import datetime
 
 # AWS 설정
@@ -19,6 +20,18 @@ LAMBDA_FUNCTION_NAME = 'ubikais-api'
 S3_BUCKET_NAME = 'ubikais-data'
 API_NAME = 'ubikais-api'
 
+# Lambda 환경변수 (UBIKAIS_BINARY_RESPONSES는 API의 binaryMediaTypes 설정 후 enable_compression이 추가)
+LAMBDA_ENVIRONMENT = {
+    'S3_BUCKET': S3_BUCKET_NAME,
+    'S3_DB_KEY': 'ubikais_full.db',
+    'S3_DB_CHECK_INTERVAL': '60'
+}
+# Lambda의 gzip/br 응답(base64)을 바이너리로 전달할 미디어 타입
+BINARY_MEDIA_TYPES = ['*/*']
+
+# Lambda 패키지에 포함할 소스 파일
+LAMBDA_SOURCES = ['lambda_handler.py', 'ubikais_db.py', 'ubikais_http.py', 'ubikais_metrics.py']
+
 # boto3 클라이언트
 lambda_client = boto3.client('lambda', region_name=AWS_REGION)
 s3_client = boto3.client('s3', region_name=AWS_REGION)
@@ -48,15 +61,32 @@ def create_s3_bucket():
         print(f"[WARN] S3 버킷 생성 오류: {e}")
 
 
+def snapshot_db(db_path, snapshot_path):
+    """WAL 모드 DB의 일관된 스냅샷 생성 (Lambda가 읽기 전용으로 열 수 있도록 DELETE 저널)"""
+    src = sqlite3.connect(db_path)
+    dst = sqlite3.connect(snapshot_path)
+    try:
+        src.backup(dst)
+        dst.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        dst.close()
+        src.close()
+
+
 def upload_db_to_s3(db_path='ubikais_full.db'):
-    """DB 파일을 S3에 업로드"""
+    """DB 파일을 S3에 업로드 (Lambda는 ETag 변경을 감지해 새 DB로 교체)"""
     print(f"[INFO] DB 파일 업로드: {db_path} -> s3://{S3_BUCKET_NAME}/")
 
+    snapshot_path = f'{db_path}.upload'
     try:
-        s3_client.upload_file(db_path, S3_BUCKET_NAME, 'ubikais_full.db')
+        snapshot_db(db_path, snapshot_path)
+        s3_client.upload_file(snapshot_path, S3_BUCKET_NAME, 'ubikais_full.db')
         print(f"[OK] DB 업로드 완료")
     except Exception as e:
         print(f"[ERROR] DB 업로드 오류: {e}")
+    finally:
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
 
 
 def create_lambda_zip():
@@ -66,9 +96,10 @@ def create_lambda_zip():
     zip_buffer = io.BytesIO()
 
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-        # lambda_handler.py
-        with open('lambda_handler.py', 'r', encoding='utf-8') as f:
-            zf.writestr('lambda_handler.py', f.read())
+        # lambda_handler.py + 공용 모듈
+        for filename in LAMBDA_SOURCES:
+            with open(filename, 'r', encoding='utf-8') as f:
+                zf.writestr(filename, f.read())
 
     zip_buffer.seek(0)
     print("[OK] Lambda ZIP 생성 완료")
@@ -157,18 +188,49 @@ def create_or_update_lambda():
             Description='UBIKAIS API - Korean Aviation Data',
             Timeout=30,
             MemorySize=256,
-            Environment={
-                'Variables': {
-                    'S3_BUCKET': S3_BUCKET_NAME,
-                    'S3_DB_KEY': 'ubikais_full.db'
-                }
-            }
+            Environment={'Variables': LAMBDA_ENVIRONMENT}
         )
         print(f"[OK] Lambda 함수 생성 완료")
 
 
+def find_rest_api():
+    """이름이 API_NAME인 기존 REST API (없으면 None)"""
+    for page in apigateway_client.get_paginator('get_rest_apis').paginate():
+        for api in page['items']:
+            if api['name'] == API_NAME:
+                return api
+    return None
+
+
+def update_api_gateway(api):
+    """기존 API에 binaryMediaTypes가 없으면 추가 후 재배포"""
+    api_id = api['id']
+    missing = [media_type for media_type in BINARY_MEDIA_TYPES
+               if media_type not in api.get('binaryMediaTypes', [])]
+    if missing:
+        # 경로의 '/'는 '~1'로 이스케이프
+        apigateway_client.update_rest_api(
+            restApiId=api_id,
+            patchOperations=[{'op': 'add', 'path': f"/binaryMediaTypes/{media_type.replace('/', '~1')}"}
+                             for media_type in missing]
+        )
+        apigateway_client.create_deployment(restApiId=api_id, stageName='prod')
+        print(f"[OK] 기존 API binaryMediaTypes 설정 및 재배포: {api_id}")
+    else:
+        print(f"[OK] 기존 API 사용: {api_id}")
+    return f"https://{api_id}.execute-api.{AWS_REGION}.amazonaws.com/prod"
+
+
 def create_api_gateway():
-    """API Gateway 생성"""
+    """API Gateway 생성 (같은 이름의 API가 있으면 binaryMediaTypes만 맞춤)"""
+    try:
+        existing = find_rest_api()
+        if existing:
+            return update_api_gateway(existing)
+    except Exception as e:
+        print(f"[ERROR] 기존 API Gateway 확인 오류: {e}")
+        return None
+
     print(f"[INFO] API Gateway 생성: {API_NAME}")
 
     try:
@@ -176,7 +238,8 @@ def create_api_gateway():
         api = apigateway_client.create_rest_api(
             name=API_NAME,
             description='UBIKAIS API - Korean Aviation Data',
-            endpointConfiguration={'types': ['REGIONAL']}
+            endpointConfiguration={'types': ['REGIONAL']},
+            binaryMediaTypes=BINARY_MEDIA_TYPES
         )
         api_id = api['id']
         print(f"[OK] API 생성: {api_id}")
@@ -239,6 +302,24 @@ def create_api_gateway():
         return None
 
 
+def enable_compression():
+    """API의 binaryMediaTypes 설정 후 Lambda 응답 압축 켜기 (기존 환경변수 유지)"""
+    try:
+        # 코드 업데이트가 끝나야 설정을 바꿀 수 있음
+        lambda_client.get_waiter('function_updated').wait(FunctionName=LAMBDA_FUNCTION_NAME)
+        config = lambda_client.get_function_configuration(FunctionName=LAMBDA_FUNCTION_NAME)
+        variables = config.get('Environment', {}).get('Variables', {})
+        if variables.get('UBIKAIS_BINARY_RESPONSES') == '1':
+            return
+        lambda_client.update_function_configuration(
+            FunctionName=LAMBDA_FUNCTION_NAME,
+            Environment={'Variables': {**variables, 'UBIKAIS_BINARY_RESPONSES': '1'}}
+        )
+        print("[OK] Lambda 응답 압축 활성화")
+    except Exception as e:
+        print(f"[ERROR] Lambda 응답 압축 설정 오류: {e}")
+
+
 def create_crawler_schedule():
     """CloudWatch Events로 크롤러 스케줄 생성"""
     print("[INFO] 크롤러 스케줄 설정 (1시간마다)")
@@ -272,8 +353,11 @@ def deploy():
     # 2. Lambda 함수 생성/업데이트
     create_or_update_lambda()
 
-    # 3. API Gateway 생성
+    # 3. API Gateway 생성 (기존 API면 binaryMediaTypes 설정)
     api_url = create_api_gateway()
+    if api_url:
+        # binaryMediaTypes가 설정된 API에서만 압축 응답을 보냄
+        enable_compression()
 
     # 4. 크롤러 스케줄 설정
     create_crawler_schedule()
@@ -3,106 +3,350 @@ AWS Lambda Handler for UBIKAIS API
 Lambda + API Gateway로 서버리스 배포
 """
 
-import json
+import base64
 import sqlite3
 import os
+import time
 from datetime import datetime
 
+import ubikais_db as db
+from ubikais_db import get_crawl_generation
+from ubikais_http import (compress, conditional_headers, dumps, etag_for_encoding,
+                          is_not_modified, negotiate_compression, to_columnar)
+from ubikais_metrics import begin_request, record_sql, request_sample
+
 # S3에서 DB 다운로드 (Lambda 실행 시)
 DB_PATH = '/tmp/ubikais_full.db'
 S3_BUCKET = os.environ.get('S3_BUCKET', 'ubikais-data')
 S3_KEY = os.environ.get('S3_DB_KEY', 'ubikais_full.db')
-
-
-def get_db_connection():
-    """DB 연결"""
-    # Lambda에서는 S3에서 DB를 /tmp로 다운로드해야 함
-    if not os.path.exists(DB_PATH):
+# S3 ETag 재확인 최소 간격 (초)
+S3_DB_CHECK_INTERVAL = float(os.environ.get('S3_DB_CHECK_INTERVAL', 60))
+# gzip/br 응답 압축: API Gateway에 binaryMediaTypes('*/*')가 설정된 뒤에만 켠다 (1이면 켬).
+# 설정 없이 켜면 base64 본문이 Content-Encoding과 함께 그대로 전달되어 클라이언트가 읽지 못한다.
+# deploy_ubikais.py가 API 설정 후 함수 환경변수에 넣는다.
+BINARY_RESPONSES = os.environ.get('UBIKAIS_BINARY_RESPONSES', '0') == '1'
+# 요청별 계측 JSON 로그 출력 (CloudWatch Logs Insights 집계용, 0이면 끔)
+METRICS_LOG = os.environ.get('UBIKAIS_METRICS_LOG', '1') != '0'
+
+# 웜 컨테이너에서 호출 간 재사용되는 상태
+_conn = None
+_generation = None
+_db_etag = None
+_last_check = None
+_s3 = None
+# route_lookup 메모리 사본 (DB 교체 시 크롤링 세대가 바뀌어 다시 읽힘)
+_route_index = db.RouteIndex()
+
+
+def _get_s3():
+    """S3 클라이언트 (컨테이너당 1회 생성)"""
+    global _s3
+    if _s3 is None:
+        import boto3
+        _s3 = boto3.client('s3')
+    return _s3
+
+
+def _read_local_etag():
+    """/tmp에 받아둔 DB의 ETag"""
+    try:
+        with open(DB_PATH + '.etag', 'r') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _download_db(etag):
+    """S3에서 DB를 임시 파일로 받은 뒤 원자적으로 교체
+
+    IfMatch로 head_object에서 본 ETag의 객체만 받는다 (그 사이 업로드되면 412 오류).
+    download_file의 ExtraArgs는 IfMatch를 받지 않으므로 get_object 본문을 직접 기록한다.
+    """
+    tmp_path = f'{DB_PATH}.{os.getpid()}.download'
+    params = {'Bucket': S3_BUCKET, 'Key': S3_KEY}
+    if etag:
+        params['IfMatch'] = etag
+    try:
+        body = _get_s3().get_object(**params)['Body']
+        with open(tmp_path, 'wb') as f:
+            for chunk in body.iter_chunks(1 << 20):
+                f.write(chunk)
+    except Exception:
         try:
-            import boto3
-            s3 = boto3.client('s3')
-            s3.download_file(S3_BUCKET, S3_KEY, DB_PATH)
-        except Exception as e:
-            print(f"S3 download error: {e}")
-            # 로컬 테스트용
-            return sqlite3.connect('ubikais_full.db')
-
-    conn = sqlite3.connect(DB_PATH)
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    os.replace(tmp_path, DB_PATH)
+    with open(DB_PATH + '.etag', 'w') as f:
+        f.write(etag or '')
+
+
+def _open_db(path):
+    """읽기 전용 커넥션 생성"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
     conn.row_factory = sqlite3.Row
     return conn
 
 
-def dict_from_row(row):
-    """Row를 dict로 변환"""
-    return dict(zip(row.keys(), row))
+def _refresh_db():
+    """S3 ETag를 최소 간격으로 확인하고, 바뀌었으면 새 DB로 교체
+
+    교체가 일어나면 True를 반환한다. S3 오류 시에는 기존 DB를 계속 사용한다.
+    """
+    global _db_etag, _last_check
+
+    now = time.monotonic()
+    # DB가 아직 없으면(콜드 스타트 다운로드 실패) 간격과 관계없이 다시 시도
+    if _last_check is not None and now - _last_check < S3_DB_CHECK_INTERVAL and os.path.exists(DB_PATH):
+        return False
+    _last_check = now
 
+    if _db_etag is None and os.path.exists(DB_PATH):
+        _db_etag = _read_local_etag()
 
-def create_response(status_code, body):
-    """Lambda 응답 생성"""
+    try:
+        etag = _get_s3().head_object(Bucket=S3_BUCKET, Key=S3_KEY).get('ETag')
+        if etag and etag == _db_etag and os.path.exists(DB_PATH):
+            return False
+        _download_db(etag)
+        _db_etag = etag
+        print(f"DB refreshed from s3://{S3_BUCKET}/{S3_KEY} (ETag {etag})")
+        return True
+    except Exception as e:
+        print(f"S3 refresh error: {e}")
+        return False
+
+
+def get_db_connection():
+    """DB 연결 (웜 호출 간 재사용, S3에 새 DB가 올라오면 교체)"""
+    global _conn, _generation
+
+    refreshed = _refresh_db()
+
+    if not os.path.exists(DB_PATH):
+        # 콜드 스타트에서 S3 다운로드 실패: 다른 경로의 DB로 조용히 대체하지 않는다
+        raise RuntimeError(f"DB not available: s3://{S3_BUCKET}/{S3_KEY} could not be downloaded to {DB_PATH}")
+
+    if refreshed and _conn is not None:
+        _conn.close()
+        _conn = None
+        _generation = None
+
+    if _conn is None:
+        _conn = _open_db(DB_PATH)
+    return _conn
+
+
+def get_generation():
+    """현재 DB의 크롤링 세대 (DB 파일이 교체될 때까지 메모리 값 재사용)"""
+    global _generation
+    conn = get_db_connection()
+    if _generation is None:
+        _generation = get_crawl_generation(conn)
+    return _generation
+
+
+def create_response(status_code, body, headers=None):
+    """Lambda 응답 생성 (본문 직렬화/압축은 handler의 encode_response에서)"""
+    response_headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type, If-None-Match, If-Modified-Since',
+        'Access-Control-Expose-Headers': 'ETag, Last-Modified'
+    }
+    if headers:
+        response_headers.update(headers)
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type'
-        },
-        'body': json.dumps(body, ensure_ascii=False, default=str)
+        'headers': response_headers,
+        'body': body
     }
 
 
+def encode_response(response, event, query_params):
+    """응답 본문 직렬화 (format=columnar 변환, Accept-Encoding에 따라 gzip/br 압축)
+
+    압축된 본문은 base64로 넣고 isBase64Encoded를 켠다 (API Gateway binaryMediaTypes 필요,
+    BINARY_RESPONSES가 꺼져 있으면 압축하지 않음).
+    """
+    body = response['body']
+    if body is None:
+        response['body'] = ''
+        return response
+
+    if query_params.get('format') == 'columnar' and isinstance(body, dict) and 'data' in body:
+        body = dict(body, data=to_columnar(body['data']))
+    payload = dumps(body)
+
+    headers = response['headers']
+    headers['Vary'] = 'Accept-Encoding'
+    encoding = negotiate_compression(payload, get_header(event, 'Accept-Encoding')) if BINARY_RESPONSES else None
+    if encoding:
+        response['body'] = base64.b64encode(compress(payload, encoding)).decode('ascii')
+        response['isBase64Encoded'] = True
+        headers['Content-Encoding'] = encoding
+        if 'ETag' in headers:
+            headers['ETag'] = etag_for_encoding(headers['ETag'], encoding)
+    else:
+        response['body'] = payload.decode('utf-8')
+    return response
+
+
+def get_header(event, name):
+    """요청 헤더 조회 (대소문자 무시)"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+# 크롤링 세대 기반 조건부 요청 대상에서 제외할 경로
+UNCACHED_PATHS = {'/', '/api', '/api/status'}
+
+
 def handler(event, context):
     """Lambda 메인 핸들러"""
+    started = begin_request()
+    query_params = event.get('queryStringParameters') or {}
+    response = dispatch(event, query_params)
+    response = encode_response(response, event, query_params)
+    if METRICS_LOG:
+        log_request_metrics(event, response, started)
+    return response
+
+
+# ============ 계측 ============
+
+db.set_query_observer(record_sql)
+
+# 경로 파라미터를 템플릿으로 묶는 접두사 (API 서버의 라우트 규칙과 같은 라벨)
+ROUTE_TEMPLATES = (
+    ('/api/weather/metar/', '/api/weather/metar/<airport>'),
+    ('/api/weather/taf/', '/api/weather/taf/<airport>'),
+    ('/api/notam/', '/api/notam/<location>'),
+    ('/api/airports/', '/api/airports/<icao>')
+)
+KNOWN_PATHS = {'/', '/api', '/api/status', '/api/flights', '/api/flights/departures',
+               '/api/flights/arrivals', '/api/flights/search', '/api/flights/route',
+               '/api/flights/routes', '/api/weather/latest', '/api/weather', '/api/notam',
+               '/api/notam/search', '/api/atfm', '/api/changes', '/api/airports'}
+
+
+def route_label(path):
+    """계측 라벨용 경로 (경로 파라미터는 템플릿으로 묶어 라벨 수 제한)"""
+    if path in KNOWN_PATHS:
+        return path
+    for prefix, template in ROUTE_TEMPLATES:
+        if path.startswith(prefix):
+            return template
+    return 'unmatched'
+
+
+def log_request_metrics(event, response, started):
+    """요청 계측값을 JSON 한 줄로 출력 (지연시간, SQL 시간/쿼리 수/행 수, 응답 바이트)"""
+    body = response.get('body') or ''
+    if response.get('isBase64Encoded'):
+        size = len(body) * 3 // 4 - body[-2:].count('=')
+    else:
+        size = len(body.encode('utf-8'))
+    path = event.get('path', '/')
+    sample = request_sample(route_label(path), response['statusCode'], started, size)
+    sample.update({
+        'type': 'request_metrics',
+        'method': event.get('httpMethod', 'GET'),
+        'path': path,
+        'encoding': response['headers'].get('Content-Encoding')
+    })
+    print(dumps(sample).decode('utf-8'))
+
+
+def dispatch(event, query_params):
+    """조건부 요청 처리 후 라우팅"""
     try:
         # HTTP 메서드 및 경로 추출
         http_method = event.get('httpMethod', 'GET')
         path = event.get('path', '/')
-        query_params = event.get('queryStringParameters') or {}
 
         # OPTIONS (CORS preflight)
         if http_method == 'OPTIONS':
             return create_response(200, {'status': 'ok'})
 
-        # 라우팅
-        if path == '/' or path == '/api':
-            return handle_index()
-        elif path == '/api/status':
-            return handle_status()
-        elif path == '/api/flights':
-            return handle_flights(query_params)
-        elif path == '/api/flights/departures':
-            return handle_departures(query_params)
-        elif path == '/api/flights/arrivals':
-            return handle_arrivals(query_params)
-        elif path == '/api/flights/search':
-            return handle_flight_search(query_params)
-        elif path == '/api/flights/route':
-            return handle_flight_route(query_params)
-        elif path == '/api/weather':
-            return handle_weather(query_params)
-        elif path.startswith('/api/weather/metar/'):
-            airport = path.split('/')[-1]
-            return handle_metar(airport)
-        elif path.startswith('/api/weather/taf/'):
-            airport = path.split('/')[-1]
-            return handle_taf(airport)
-        elif path == '/api/notam':
-            return handle_notam(query_params)
-        elif path.startswith('/api/notam/'):
-            location = path.split('/')[-1]
-            return handle_notam_by_location(location)
-        elif path == '/api/airports':
-            return handle_airports()
-        elif path.startswith('/api/airports/'):
-            icao = path.split('/')[-1]
-            return handle_airport_info(icao)
-        else:
-            return create_response(404, {'status': 'error', 'message': 'Not found'})
+        # 조건부 요청: 세대가 같으면 쿼리 실행 없이 304
+        validators = None
+        if http_method == 'GET' and path not in UNCACHED_PATHS:
+            try:
+                generation = get_generation()
+            except Exception as e:
+                print(f"Generation lookup error: {e}")
+                generation = None
+
+            if generation is not None:
+                validators = conditional_headers(generation, path, tuple(sorted(query_params.items())))
+                if is_not_modified(validators, get_header(event, 'If-None-Match'),
+                                   get_header(event, 'If-Modified-Since')):
+                    return create_response(304, None, validators)
+
+        response = route_request(path, query_params)
+        if validators and response['statusCode'] == 200:
+            response['headers'].update(validators)
+        return response
 
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
 
+def route_request(path, query_params):
+    """경로별 핸들러 호출"""
+    # 라우팅
+    if path == '/' or path == '/api':
+        return handle_index()
+    elif path == '/api/status':
+        return handle_status()
+    elif path == '/api/flights':
+        return handle_flights(query_params)
+    elif path == '/api/flights/departures':
+        return handle_departures(query_params)
+    elif path == '/api/flights/arrivals':
+        return handle_arrivals(query_params)
+    elif path == '/api/flights/search':
+        return handle_flight_search(query_params)
+    elif path == '/api/flights/route':
+        return handle_flight_route(query_params)
+    elif path == '/api/flights/routes':
+        return handle_flight_routes(query_params)
+    elif path == '/api/weather/latest':
+        return handle_latest_weather_batch(query_params)
+    elif path == '/api/weather':
+        return handle_weather(query_params)
+    elif path.startswith('/api/weather/metar/'):
+        airport = path.split('/')[-1]
+        return handle_latest_weather('metar', airport)
+    elif path.startswith('/api/weather/taf/'):
+        airport = path.split('/')[-1]
+        return handle_latest_weather('taf', airport)
+    elif path == '/api/notam':
+        return handle_notam(query_params)
+    elif path == '/api/notam/search':
+        return handle_notam_search(query_params)
+    elif path.startswith('/api/notam/'):
+        location = path.split('/')[-1]
+        return handle_notam_by_location(location, query_params)
+    elif path == '/api/atfm':
+        return handle_atfm(query_params)
+    elif path == '/api/changes':
+        return handle_changes(query_params)
+    elif path == '/api/airports':
+        return handle_airports()
+    elif path.startswith('/api/airports/'):
+        icao = path.split('/')[-1]
+        return handle_airport_info(icao)
+    else:
+        return create_response(404, {'status': 'error', 'message': 'Not found'})
+
+
 def handle_index():
     """API 문서"""
     return create_response(200, {
@@ -115,10 +359,15 @@ def handle_index():
             'GET /api/flights/arrivals',
             'GET /api/flights/search?flight=KAL123',
             'GET /api/flights/route?callsign=KAL123',
+            'GET /api/flights/routes?callsigns=KAL123,AAR456&regs=HL8001',
             'GET /api/weather?type=metar',
             'GET /api/weather/metar/{airport}',
+            'GET /api/weather/latest?type=metar&airports=RKPU,RKSI',
             'GET /api/notam',
             'GET /api/notam/{location}',
+            'GET /api/notam/search?q=RWY CLSD',
+            'GET /api/atfm',
+            'GET /api/changes?since=<crawl_timestamp>',
             'GET /api/airports',
             'GET /api/status'
         ]
@@ -129,29 +378,11 @@ def handle_status():
     """API 상태"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('SELECT MAX(crawl_timestamp) as last_crawl FROM crawl_logs')
-        last_crawl = cursor.fetchone()
-
-        tables = ['flight_plans', 'weather', 'notams']
-        counts = {}
-        for table in tables:
-            try:
-                cursor.execute(f'SELECT COUNT(*) as count FROM {table}')
-                counts[table] = cursor.fetchone()['count']
-            except:
-                counts[table] = 0
-
-        conn.close()
+        status = db.crawl_status(conn)
 
         return create_response(200, {
             'status': 'success',
-            'data': {
-                'status': 'online',
-                'last_crawl': last_crawl['last_crawl'] if last_crawl else None,
-                'records': counts
-            }
+            'data': {'status': 'online', **status}
         })
     except Exception as e:
         return create_response(200, {
@@ -164,30 +395,18 @@ def handle_flights(params):
     """전체 비행계획"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        plan_type = params.get('type')
-        limit = int(params.get('limit', 100))
-
-        query = "SELECT * FROM flight_plans WHERE 1=1"
-        query_params = []
-
-        if plan_type:
-            query += " AND plan_type = ?"
-            query_params.append(plan_type)
-
-        query += " ORDER BY created_at DESC LIMIT ?"
-        query_params.append(limit)
-
-        cursor.execute(query, query_params)
-        rows = cursor.fetchall()
-        conn.close()
-
-        flights = [dict_from_row(row) for row in rows]
-        return create_response(200, {
-            'status': 'success',
-            'data': {'count': len(flights), 'flights': flights}
-        })
+        data = db.list_flights(
+            conn,
+            plan_type=params.get('type'),
+            origin=params.get('origin'),
+            destination=params.get('destination'),
+            match=params.get('match', 'exact'),
+            cursor=params.get('cursor'),
+            limit=int(params.get('limit', 100))
+        )
+        return create_response(200, {'status': 'success', 'data': data})
+    except ValueError as e:
+        return create_response(400, {'status': 'error', 'message': str(e)})
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
@@ -196,30 +415,9 @@ def handle_departures(params):
     """출발 비행계획"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        airport = params.get('airport')
-        limit = int(params.get('limit', 100))
-
-        query = "SELECT * FROM flight_plans WHERE plan_type = 'departure'"
-        query_params = []
-
-        if airport:
-            query += " AND origin LIKE ?"
-            query_params.append(f"%{airport}%")
-
-        query += " ORDER BY std DESC LIMIT ?"
-        query_params.append(limit)
-
-        cursor.execute(query, query_params)
-        rows = cursor.fetchall()
-        conn.close()
-
-        flights = [dict_from_row(row) for row in rows]
-        return create_response(200, {
-            'status': 'success',
-            'data': {'count': len(flights), 'departures': flights}
-        })
+        data = db.list_departures(conn, params.get('airport'), params.get('match', 'exact'),
+                                  int(params.get('limit', 100)))
+        return create_response(200, {'status': 'success', 'data': data})
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
@@ -228,30 +426,9 @@ def handle_arrivals(params):
     """도착 비행계획"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        airport = params.get('airport')
-        limit = int(params.get('limit', 100))
-
-        query = "SELECT * FROM flight_plans WHERE plan_type = 'arrival'"
-        query_params = []
-
-        if airport:
-            query += " AND destination LIKE ?"
-            query_params.append(f"%{airport}%")
-
-        query += " ORDER BY sta DESC LIMIT ?"
-        query_params.append(limit)
-
-        cursor.execute(query, query_params)
-        rows = cursor.fetchall()
-        conn.close()
-
-        flights = [dict_from_row(row) for row in rows]
-        return create_response(200, {
-            'status': 'success',
-            'data': {'count': len(flights), 'arrivals': flights}
-        })
+        data = db.list_arrivals(conn, params.get('airport'), params.get('match', 'exact'),
+                                int(params.get('limit', 100)))
+        return create_response(200, {'status': 'success', 'data': data})
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
@@ -265,33 +442,14 @@ def handle_flight_search(params):
 
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT * FROM flight_plans
-            WHERE UPPER(flight_number) LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 10
-        ''', (f"%{flight_number.upper()}%",))
-
-        rows = cursor.fetchall()
-        conn.close()
-
-        flights = [dict_from_row(row) for row in rows]
-        return create_response(200, {
-            'status': 'success',
-            'data': {
-                'found': len(flights) > 0,
-                'count': len(flights),
-                'flights': flights
-            }
-        })
+        data = db.search_flights(conn, flight_number, params.get('match', 'prefix'))
+        return create_response(200, {'status': 'success', 'data': data})
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
 
 def handle_flight_route(params):
-    """비행 경로 (RKPU Viewer용)"""
+    """비행 경로 (RKPU Viewer용, 응답 본문이 곧 경로 정보)"""
     callsign = params.get('callsign')
     reg = params.get('reg')
 
@@ -300,149 +458,80 @@ def handle_flight_route(params):
 
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        flight = None
-
-        if callsign:
-            cursor.execute('''
-                SELECT * FROM flight_plans
-                WHERE UPPER(flight_number) LIKE ?
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (f"%{callsign.upper()}%",))
-            row = cursor.fetchone()
-            if row:
-                flight = dict_from_row(row)
-
-        if not flight and reg:
-            cursor.execute('''
-                SELECT * FROM flight_plans
-                WHERE UPPER(registration) = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (reg.upper(),))
-            row = cursor.fetchone()
-            if row:
-                flight = dict_from_row(row)
-
-        conn.close()
-
-        if flight:
-            return create_response(200, {
-                'source': 'ubikais',
-                'callsign': flight.get('flight_number'),
-                'origin': {'icao': flight.get('origin')},
-                'destination': {'icao': flight.get('destination')},
-                'aircraft': {
-                    'type': flight.get('aircraft_type'),
-                    'registration': flight.get('registration')
-                },
-                'status': flight.get('status')
-            })
-        else:
-            return create_response(200, {
-                'source': None,
-                'origin': None,
-                'destination': None
-            })
+        route = db.find_flight_route(conn, callsign, reg, params.get('match', 'exact'),
+                                     _route_index, get_generation())
+        return create_response(200, route)
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
 
-def handle_weather(params):
-    """기상정보"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        weather_type = params.get('type', 'metar')
-        airport = params.get('airport')
-        limit = int(params.get('limit', 50))
-
-        query = "SELECT * FROM weather WHERE weather_type = ?"
-        query_params = [weather_type]
+def handle_flight_routes(params):
+    """여러 편명/등록부호의 비행 경로 일괄 조회"""
+    callsigns = params.get('callsigns')
+    regs = params.get('regs')
 
-        if airport:
-            query += " AND airport LIKE ?"
-            query_params.append(f"%{airport}%")
+    if not callsigns and not regs:
+        return create_response(400, {'status': 'error', 'message': 'callsigns or regs required'})
 
-        query += " ORDER BY created_at DESC LIMIT ?"
-        query_params.append(limit)
+    try:
+        conn = get_db_connection()
+        data = db.find_flight_routes(conn, callsigns, regs, _route_index, get_generation())
+        return create_response(200, {'status': 'success', 'data': data})
+    except ValueError as e:
+        return create_response(400, {'status': 'error', 'message': str(e)})
+    except Exception as e:
+        return create_response(500, {'status': 'error', 'message': str(e)})
 
-        cursor.execute(query, query_params)
-        rows = cursor.fetchall()
-        conn.close()
 
-        weather_data = [dict_from_row(row) for row in rows]
-        return create_response(200, {
-            'status': 'success',
-            'data': {
-                'type': weather_type,
-                'count': len(weather_data),
-                'weather': weather_data
-            }
-        })
+def handle_weather(params):
+    """기상정보"""
+    try:
+        conn = get_db_connection()
+        data = db.list_weather(
+            conn,
+            weather_type=params.get('type', 'metar'),
+            airport=params.get('airport'),
+            match=params.get('match', 'exact'),
+            cursor=params.get('cursor'),
+            limit=int(params.get('limit', 50))
+        )
+        return create_response(200, {'status': 'success', 'data': data})
+    except ValueError as e:
+        return create_response(400, {'status': 'error', 'message': str(e)})
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
 
-def handle_metar(airport):
-    """METAR"""
+def handle_latest_weather(weather_type, airport):
+    """공항별 최신 METAR/TAF"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT * FROM weather
-            WHERE weather_type = 'metar' AND airport LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        ''', (f"%{airport.upper()}%",))
-
-        row = cursor.fetchone()
-        conn.close()
-
-        if row:
-            return create_response(200, {
-                'status': 'success',
-                'data': dict_from_row(row)
-            })
+        data = db.latest_weather(conn, weather_type, airport)
+
+        if data:
+            return create_response(200, {'status': 'success', 'data': data})
         else:
             return create_response(404, {
                 'status': 'error',
-                'message': f'METAR not found for {airport}'
+                'message': f'{weather_type.upper()} not found for {airport}'
             })
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
 
-def handle_taf(airport):
-    """TAF"""
+def handle_latest_weather_batch(params):
+    """여러 공항의 최신 METAR/TAF 일괄 조회"""
+    airports = params.get('airports')
+
+    if not airports:
+        return create_response(400, {'status': 'error', 'message': 'airports parameter required'})
+
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT * FROM weather
-            WHERE weather_type = 'taf' AND airport LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        ''', (f"%{airport.upper()}%",))
-
-        row = cursor.fetchone()
-        conn.close()
-
-        if row:
-            return create_response(200, {
-                'status': 'success',
-                'data': dict_from_row(row)
-            })
-        else:
-            return create_response(404, {
-                'status': 'error',
-                'message': f'TAF not found for {airport}'
-            })
+        data = db.latest_weather_batch(conn, params.get('type', 'metar'), airports)
+        return create_response(200, {'status': 'success', 'data': data})
+    except ValueError as e:
+        return create_response(400, {'status': 'error', 'message': str(e)})
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
@@ -451,111 +540,98 @@ def handle_notam(params):
     """NOTAM"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        notam_type = params.get('type')
-        location = params.get('location')
-        limit = int(params.get('limit', 100))
-
-        query = "SELECT * FROM notams WHERE 1=1"
-        query_params = []
-
-        if notam_type:
-            query += " AND notam_type = ?"
-            query_params.append(notam_type)
-        if location:
-            query += " AND location LIKE ?"
-            query_params.append(f"%{location}%")
+        data = db.list_notams(
+            conn,
+            notam_type=params.get('type'),
+            location=params.get('location'),
+            match=params.get('match', 'exact'),
+            cursor=params.get('cursor'),
+            limit=int(params.get('limit', 100))
+        )
+        return create_response(200, {'status': 'success', 'data': data})
+    except ValueError as e:
+        return create_response(400, {'status': 'error', 'message': str(e)})
+    except Exception as e:
+        return create_response(500, {'status': 'error', 'message': str(e)})
 
-        query += " ORDER BY created_at DESC LIMIT ?"
-        query_params.append(limit)
 
-        cursor.execute(query, query_params)
-        rows = cursor.fetchall()
-        conn.close()
+def handle_notam_search(params):
+    """NOTAM 전문 검색 (FTS5, 관련도순)"""
+    try:
+        conn = get_db_connection()
+        data = db.search_notams(conn, params.get('q'), params.get('type'), int(params.get('limit', 50)))
 
-        notams = [dict_from_row(row) for row in rows]
-        return create_response(200, {
-            'status': 'success',
-            'data': {'count': len(notams), 'notams': notams}
-        })
+        if data is None:
+            return create_response(400, {'status': 'error', 'message': 'q parameter required'})
+        return create_response(200, {'status': 'success', 'data': data})
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
 
-def handle_notam_by_location(location):
+def handle_notam_by_location(location, params):
     """위치별 NOTAM"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
+        data = db.notams_by_location(conn, location, params.get('match', 'exact'))
+        return create_response(200, {'status': 'success', 'data': data})
+    except Exception as e:
+        return create_response(500, {'status': 'error', 'message': str(e)})
 
-        cursor.execute('''
-            SELECT * FROM notams
-            WHERE location LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 50
-        ''', (f"%{location.upper()}%",))
 
-        rows = cursor.fetchall()
-        conn.close()
+def handle_atfm(params):
+    """ATFM 메시지"""
+    try:
+        conn = get_db_connection()
+        data = db.list_atfm(
+            conn,
+            airport=params.get('airport'),
+            match=params.get('match', 'exact'),
+            cursor=params.get('cursor'),
+            limit=int(params.get('limit', 50))
+        )
+        return create_response(200, {'status': 'success', 'data': data})
+    except ValueError as e:
+        return create_response(400, {'status': 'error', 'message': str(e)})
+    except Exception as e:
+        return create_response(500, {'status': 'error', 'message': str(e)})
+
 
-        notams = [dict_from_row(row) for row in rows]
-        return create_response(200, {
-            'status': 'success',
-            'data': {
-                'location': location,
-                'count': len(notams),
-                'notams': notams
-            }
-        })
+def handle_changes(params):
+    """since(crawl_timestamp) 이후 변경분"""
+    try:
+        conn = get_db_connection()
+        data = db.list_changes(conn, params.get('since'), params.get('cursor'),
+                               int(params.get('limit', 500)))
+
+        if data is None:
+            return create_response(400, {'status': 'error', 'message': 'since or cursor parameter required'})
+        return create_response(200, {'status': 'success', 'data': data})
+    except ValueError as e:
+        return create_response(400, {'status': 'error', 'message': str(e)})
     except Exception as e:
         return create_response(500, {'status': 'error', 'message': str(e)})
 
 
 def handle_airports():
     """공항 목록"""
-    airports = [
-        {'icao': 'RKSI', 'iata': 'ICN', 'name': 'Incheon International', 'name_ko': '인천국제공항'},
-        {'icao': 'RKSS', 'iata': 'GMP', 'name': 'Gimpo International', 'name_ko': '김포국제공항'},
-        {'icao': 'RKPK', 'iata': 'PUS', 'name': 'Gimhae International', 'name_ko': '김해국제공항'},
-        {'icao': 'RKPC', 'iata': 'CJU', 'name': 'Jeju International', 'name_ko': '제주국제공항'},
-        {'icao': 'RKTU', 'iata': 'CJJ', 'name': 'Cheongju International', 'name_ko': '청주국제공항'},
-        {'icao': 'RKTN', 'iata': 'TAE', 'name': 'Daegu International', 'name_ko': '대구국제공항'},
-        {'icao': 'RKJJ', 'iata': 'KWJ', 'name': 'Gwangju', 'name_ko': '광주공항'},
-        {'icao': 'RKJY', 'iata': 'RSU', 'name': 'Yeosu', 'name_ko': '여수공항'},
-        {'icao': 'RKPU', 'iata': 'USN', 'name': 'Ulsan', 'name_ko': '울산공항'},
-        {'icao': 'RKTH', 'iata': 'KPO', 'name': 'Pohang', 'name_ko': '포항공항'},
-        {'icao': 'RKPS', 'iata': 'HIN', 'name': 'Sacheon', 'name_ko': '사천공항'},
-        {'icao': 'RKJB', 'iata': 'MWX', 'name': 'Muan International', 'name_ko': '무안국제공항'},
-        {'icao': 'RKNY', 'iata': 'YNY', 'name': 'Yangyang International', 'name_ko': '양양국제공항'},
-        {'icao': 'RKNW', 'iata': 'WJU', 'name': 'Wonju', 'name_ko': '원주공항'},
-        {'icao': 'RKJK', 'iata': 'KUV', 'name': 'Gunsan', 'name_ko': '군산공항'}
-    ]
-
-    return create_response(200, {
-        'status': 'success',
-        'data': {'count': len(airports), 'airports': airports}
-    })
+    return create_response(200, {'status': 'success', 'data': db.list_airports()})
 
 
 def handle_airport_info(icao):
     """공항 정보"""
-    airports = {
-        'RKPU': {'icao': 'RKPU', 'iata': 'USN', 'name': 'Ulsan Airport', 'name_ko': '울산공항',
-                 'lat': 35.5936, 'lon': 129.3519, 'elevation': 45}
-    }
+    try:
+        conn = get_db_connection()
+        data = db.airport_info(conn, icao)
 
-    icao = icao.upper()
-    if icao in airports:
-        return create_response(200, {
-            'status': 'success',
-            'data': airports[icao]
-        })
-    else:
-        return create_response(404, {
-            'status': 'error',
-            'message': f'Airport {icao} not found'
-        })
+        if data:
+            return create_response(200, {'status': 'success', 'data': data})
+        else:
+            return create_response(404, {
+                'status': 'error',
+                'message': f'Airport {icao.upper()} not found'
+            })
+    except Exception as e:
+        return create_response(500, {'status': 'error', 'message': str(e)})
 
 
 # 로컬 테스트용
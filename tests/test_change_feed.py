@@ -0,0 +1,86 @@
+"""
+변경분 피드(list_changes) 회귀 테스트
+크롤링 N에서 바뀐 행이 N+1에서 그대로여도 since < N 동기화에 그 변경이 빠지지 않아야 한다.
+"""
+
+import logging
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ubikais_db  # noqa: E402
+from ubikais_store import UBIKAISStore, logger as store_logger  # noqa: E402
+
+CRAWLS = ('2026-01-01T00:00:00', '2026-01-01T00:30:00', '2026-01-01T01:00:00')
+
+
+def _flight(status):
+    return {
+        'plan_type': 'departure', 'flight_number': 'KAL123', 'aircraft_type': 'B738',
+        'registration': 'HL7001', 'origin': 'RKPU', 'destination': 'RKSS',
+        'std': '09:00', 'etd': '09:00', 'sta': '10:00', 'eta': '10:00',
+        'status': status, 'nature': 'S'
+    }
+
+
+def _notam(notam_id):
+    return {
+        'notam_type': 'ad', 'notam_id': notam_id, 'location': 'RKPU', 'qcode': 'QMRLC',
+        'start_time': '2601010000', 'end_time': '2612312359', 'message': f'RKPU {notam_id} RWY 18/36 CLSD'
+    }
+
+
+def _crawl(store, crawl_timestamp, flights, notams):
+    results = {'departure': flights, 'ad': notams}
+    tasks = [(data_type, None, (), data_type) for data_type in results]
+    saved, type_logs = store.save_results(tasks, results, crawl_timestamp)
+    store.log_crawl(crawl_timestamp, 'all', 'SUCCESS', len(flights) + len(notams), saved,
+                      type_logs=type_logs)
+
+
+def test_unchanged_crawl_keeps_earlier_changes(tmp_path):
+    store_logger.setLevel(logging.WARNING)
+    path = str(tmp_path / 'changes.db')
+    store = UBIKAISStore(db_name=path)
+
+    _crawl(store, CRAWLS[0], [_flight('SCH')], [_notam('A0001/26')])
+    # 크롤링 N: 비행계획 상태 변경, NOTAM 추가
+    _crawl(store, CRAWLS[1], [_flight('DEP')], [_notam('A0001/26'), _notam('A0002/26')])
+    # 크롤링 N+1: 값 그대로
+    _crawl(store, CRAWLS[2], [_flight('DEP')], [_notam('A0001/26'), _notam('A0002/26')])
+
+    conn = sqlite3.connect(path)
+    try:
+        page = ubikais_db.list_changes(conn, since=CRAWLS[0])
+        flight_ids = [row[0] for row in conn.execute('SELECT id FROM flight_plans')]
+    finally:
+        conn.close()
+
+    assert [f['status'] for f in page['changes']['flights']['updated']] == ['DEP']
+    assert [n['notam_id'] for n in page['changes']['notams']['inserted']] == ['A0002/26']
+    # 값이 그대로인 행은 교체하지 않고 크롤링 시각만 갱신
+    assert len(flight_ids) == 1
+
+
+def test_generation_changes_only_with_data(tmp_path):
+    store_logger.setLevel(logging.WARNING)
+    path = str(tmp_path / 'generation.db')
+    store = UBIKAISStore(db_name=path)
+
+    def generation():
+        conn = sqlite3.connect(path)
+        try:
+            return ubikais_db.get_crawl_generation(conn)
+        finally:
+            conn.close()
+
+    _crawl(store, CRAWLS[0], [_flight('SCH')], [_notam('A0001/26')])
+    first = generation()
+    # 값이 그대로인 크롤링은 로그만 남고 세대는 그대로
+    _crawl(store, CRAWLS[1], [_flight('SCH')], [_notam('A0001/26')])
+    assert generation() == first
+    _crawl(store, CRAWLS[2], [_flight('DEP')], [_notam('A0001/26')])
+    assert generation() != first
+    assert ubikais_db.generation_timestamp(generation()) == CRAWLS[2]
@@ -3,36 +3,187 @@ UBIKAIS API Server - 크롤링된 항공 데이터를 REST API로 제공
 Flask 기반 API 서버 (AWS EC2/Lambda에서 운영)
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
 import sqlite3
 import json
 import os
+import re
+import threading
+import time
 from datetime import datetime
 from functools import wraps
+from urllib.request import pathname2url
+
+import ubikais_db as db
+from ubikais_db import ConnectionPool, encode_cursor, get_crawl_generation
+from ubikais_http import (RateLimiter, ResponseCache, SingleFlight, cached_body, client_address,
+                          compress, conditional_headers, dumps, etag_for_encoding, is_not_modified,
+                          negotiate_compression, to_columnar)
+from ubikais_metrics import PROMETHEUS_CONTENT_TYPE, MetricsRegistry, begin_request, record_sql
 
 app = Flask(__name__)
-CORS(app)  # CORS 허용
+CORS(app, expose_headers=['ETag', 'Last-Modified'])  # CORS 허용 (조건부 요청 헤더 노출)
 
 # 설정
 DB_PATH = os.environ.get('UBIKAIS_DB_PATH', 'ubikais_full.db')
 JSON_PATH = os.environ.get('UBIKAIS_JSON_PATH', '.')
 
+# 크롤링 세대 확인 주기 (초)
+GENERATION_CHECK_INTERVAL = float(os.environ.get('UBIKAIS_GENERATION_CHECK_INTERVAL', 1.0))
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
 
-def get_db_connection():
-    """DB 연결"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+
+def get_pool():
+    """현재 워커 프로세스의 커넥션 풀 (fork 후에는 새로 생성)"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(DB_PATH)
+                _pool_pid = os.getpid()
+    return _pool
 
 
-def dict_from_row(row):
-    """SQLite Row를 딕셔너리로 변환"""
-    return dict(zip(row.keys(), row))
+def db_connection():
+    """풀에서 DB 커넥션 대여 (with 문으로 사용)"""
+    return get_pool().connection()
+
+
+response_cache = ResponseCache()
+single_flight = SingleFlight()
+rate_limiter = RateLimiter()
+route_index = db.RouteIndex()
+_generation = {'value': None, 'checked_at': 0.0}
+
+
+def current_generation():
+    """현재 크롤링 세대 (GENERATION_CHECK_INTERVAL초 동안 재사용)"""
+    now = time.monotonic()
+    if _generation['value'] is None or now - _generation['checked_at'] >= GENERATION_CHECK_INTERVAL:
+        with db_connection() as conn:
+            _generation['value'] = get_crawl_generation(conn)
+        _generation['checked_at'] = now
+    return _generation['value']
+
+
+def cached_response(view):
+    """읽기 전용 엔드포인트 응답 캐시 + 조건부 요청 데코레이터
+
+    크롤링 세대 기반 ETag/Last-Modified를 붙이고, If-None-Match가 일치하면
+    캐시나 DB 조회 없이 304를 반환한다. 200 응답만 캐시에 저장하고,
+    Accept-Encoding에 맞춰 압축한 본문도 같은 항목에 보관한다.
+    캐시 미스인 동일 요청이 동시에 오면 single_flight로 뷰를 한 번만 실행한다.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            generation = current_generation()
+        except Exception:
+            return view(*args, **kwargs)
+
+        params = tuple(sorted(request.args.items(multi=True)))
+        validators = conditional_headers(generation, request.path, params)
+        if is_not_modified(validators, request.headers.get('If-None-Match'),
+                           request.headers.get('If-Modified-Since')):
+            return app.response_class(status=304, headers=validators)
+
+        key = (request.path, params)
+        entry = response_cache.get(key, generation)
+        if entry is None:
+            status_code, entry = single_flight.do((key, generation),
+                                                  lambda: render_entry(view, args, kwargs, key, generation))
+            if status_code != 200:
+                return app.response_class(entry[0], status=status_code, mimetype=entry[1])
+
+        body = cached_body(entry, request.headers.get('Accept-Encoding'), validators)
+        return app.response_class(body, status=200, mimetype=entry[1], headers=validators)
+
+    return wrapper
+
+
+def render_entry(view, args, kwargs, key, generation):
+    """뷰 실행 -> (상태 코드, 캐시 항목), 200이면 캐시에 저장 (합쳐진 요청들이 같은 결과를 공유)"""
+    response = app.make_response(view(*args, **kwargs))
+    entry = (response.get_data(), response.mimetype, {})
+    if response.status_code == 200:
+        response_cache.put(key, generation, entry)
+    return response.status_code, entry
+
+
+# ============ 계측 ============
+
+metrics_registry = MetricsRegistry()
+db.set_query_observer(record_sql)
+
+
+metrics_registry.register('ubikais_coalesced_requests_total', 'counter',
+                          'Cache-miss requests that shared an in-flight identical query',
+                          lambda: single_flight.stats['coalesced'])
+metrics_registry.register('ubikais_rate_limited_requests_total', 'counter',
+                          'Requests rejected by the per-client rate limiter (429)',
+                          lambda: rate_limiter.stats['limited'])
+
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = begin_request()
+
+
+# 계측 시작 뒤에 등록해 429 응답도 경로별 계측에 잡힌다
+@app.before_request
+def enforce_rate_limit():
+    """클라이언트 IP별 token bucket 요청 제한 (초과 시 429 + Retry-After)"""
+    if request.method == 'OPTIONS':
+        return None
+    client = client_address(request.remote_addr, request.headers.get('X-Forwarded-For'))
+    wait = rate_limiter.check(client)
+    if wait:
+        response = api_response(None, 'error', 'Too many requests')
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, int(wait + 0.999)))
+        return response
+    return None
+
+
+# after_request는 등록 역순으로 실행되므로 compress_response보다 먼저 등록해 압축 후 크기를 잰다
+@app.after_request
+def record_request_metrics(response):
+    """경로별 지연시간, SQL 시간/행 수, 응답 바이트 집계 (/metrics)"""
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics_registry.finish_request(route, response.status_code, started,
+                                        response.calculate_content_length() or 0)
+    return response
+
+
+@app.after_request
+def compress_response(response):
+    """캐시를 거치지 않은 JSON 응답 압축 (Accept-Encoding 협상, 크기 기준 이상만)"""
+    if (response.direct_passthrough or response.status_code != 200
+            or 'Content-Encoding' in response.headers or not response.is_json):
+        return response
+
+    body = response.get_data()
+    encoding = negotiate_compression(body, request.headers.get('Accept-Encoding'))
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        if 'ETag' in response.headers:
+            response.headers['ETag'] = etag_for_encoding(response.headers['ETag'], encoding)
+    return response
 
 
 def api_response(data, status='success', message=None):
-    """표준 API 응답 형식"""
+    """표준 API 응답 형식 (format=columnar이면 레코드 목록을 컬럼 배열로 변환)"""
+    if request.args.get('format') == 'columnar':
+        data = to_columnar(data)
     response = {
         'status': status,
         'timestamp': datetime.now().isoformat(),
@@ -40,229 +191,126 @@ def api_response(data, status='success', message=None):
     }
     if message:
         response['message'] = message
-    return jsonify(response)
+    return app.response_class(dumps(response), mimetype='application/json')
 
 
 # ============ 비행계획 API ============
 
 @app.route('/api/flights', methods=['GET'])
+@cached_response
 def get_all_flights():
     """전체 비행계획 조회"""
     try:
         plan_type = request.args.get('type', None)  # departure, arrival, VFR
         origin = request.args.get('origin', None)
         destination = request.args.get('destination', None)
+        match = request.args.get('match', 'exact')  # exact, prefix, contains
         limit = request.args.get('limit', 100, type=int)
+        cursor_token = request.args.get('cursor', None)
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = "SELECT * FROM flight_plans WHERE 1=1"
-        params = []
-
-        if plan_type:
-            query += " AND plan_type = ?"
-            params.append(plan_type)
-        if origin:
-            query += " AND origin LIKE ?"
-            params.append(f"%{origin}%")
-        if destination:
-            query += " AND destination LIKE ?"
-            params.append(f"%{destination}%")
-
-        query += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
-
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-
-        flights = [dict_from_row(row) for row in rows]
-        return api_response({
-            'count': len(flights),
-            'flights': flights
-        })
+        with db_connection() as conn:
+            data = db.list_flights(conn, plan_type, origin, destination, match, cursor_token, limit)
+        return api_response(data)
 
+    except ValueError as e:
+        return api_response(None, 'error', str(e)), 400
     except Exception as e:
         return api_response(None, 'error', str(e)), 500
 
 
 @app.route('/api/flights/departures', methods=['GET'])
+@cached_response
 def get_departures():
     """출발 비행계획"""
     try:
         airport = request.args.get('airport', None)
+        match = request.args.get('match', 'exact')
         limit = request.args.get('limit', 100, type=int)
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = "SELECT * FROM flight_plans WHERE plan_type = 'departure'"
-        params = []
-
-        if airport:
-            query += " AND origin LIKE ?"
-            params.append(f"%{airport}%")
-
-        query += " ORDER BY std DESC LIMIT ?"
-        params.append(limit)
-
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-
-        flights = [dict_from_row(row) for row in rows]
-        return api_response({
-            'count': len(flights),
-            'departures': flights
-        })
+        with db_connection() as conn:
+            data = db.list_departures(conn, airport, match, limit)
+        return api_response(data)
 
     except Exception as e:
         return api_response(None, 'error', str(e)), 500
 
 
 @app.route('/api/flights/arrivals', methods=['GET'])
+@cached_response
 def get_arrivals():
     """도착 비행계획"""
     try:
         airport = request.args.get('airport', None)
+        match = request.args.get('match', 'exact')
         limit = request.args.get('limit', 100, type=int)
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = "SELECT * FROM flight_plans WHERE plan_type = 'arrival'"
-        params = []
-
-        if airport:
-            query += " AND destination LIKE ?"
-            params.append(f"%{airport}%")
-
-        query += " ORDER BY sta DESC LIMIT ?"
-        params.append(limit)
-
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-
-        flights = [dict_from_row(row) for row in rows]
-        return api_response({
-            'count': len(flights),
-            'arrivals': flights
-        })
+        with db_connection() as conn:
+            data = db.list_arrivals(conn, airport, match, limit)
+        return api_response(data)
 
     except Exception as e:
         return api_response(None, 'error', str(e)), 500
 
 
 @app.route('/api/flights/search', methods=['GET'])
+@cached_response
 def search_flight():
     """편명으로 비행 검색"""
     try:
         flight_number = request.args.get('flight', request.args.get('callsign', None))
+        match = request.args.get('match', 'prefix')  # exact, prefix, contains
 
         if not flight_number:
             return api_response(None, 'error', 'flight parameter required'), 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # 편명으로 검색 (대소문자 무시)
-        cursor.execute('''
-            SELECT * FROM flight_plans
-            WHERE UPPER(flight_number) LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 10
-        ''', (f"%{flight_number.upper()}%",))
-
-        rows = cursor.fetchall()
-        conn.close()
-
-        if not rows:
-            return api_response({
-                'found': False,
-                'flight': None
-            })
-
-        flights = [dict_from_row(row) for row in rows]
-        return api_response({
-            'found': True,
-            'count': len(flights),
-            'flights': flights
-        })
+        with db_connection() as conn:
+            data = db.search_flights(conn, flight_number, match)
+        return api_response(data)
 
     except Exception as e:
         return api_response(None, 'error', str(e)), 500
 
 
 @app.route('/api/flights/route', methods=['GET'])
+@cached_response
 def get_flight_route():
     """편명의 출발/도착 정보 (RKPU Viewer용)"""
     try:
         callsign = request.args.get('callsign', None)
         hex_code = request.args.get('hex', None)
         reg = request.args.get('reg', None)
+        match = request.args.get('match', 'exact')
 
         if not callsign and not hex_code and not reg:
             return api_response(None, 'error', 'callsign, hex, or reg required'), 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        flight = None
-
-        # 1. callsign으로 검색
-        if callsign:
-            cursor.execute('''
-                SELECT * FROM flight_plans
-                WHERE UPPER(flight_number) LIKE ?
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (f"%{callsign.upper()}%",))
-            row = cursor.fetchone()
-            if row:
-                flight = dict_from_row(row)
-
-        # 2. registration으로 검색
-        if not flight and reg:
-            cursor.execute('''
-                SELECT * FROM flight_plans
-                WHERE UPPER(registration) = ?
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''', (reg.upper(),))
-            row = cursor.fetchone()
-            if row:
-                flight = dict_from_row(row)
-
-        conn.close()
-
-        if flight:
-            return api_response({
-                'source': 'ubikais',
-                'callsign': flight.get('flight_number'),
-                'origin': {'icao': flight.get('origin')},
-                'destination': {'icao': flight.get('destination')},
-                'aircraft': {
-                    'type': flight.get('aircraft_type'),
-                    'registration': flight.get('registration')
-                },
-                'schedule': {
-                    'std': flight.get('std'),
-                    'etd': flight.get('etd'),
-                    'atd': flight.get('atd'),
-                    'sta': flight.get('sta'),
-                    'eta': flight.get('eta')
-                },
-                'status': flight.get('status')
-            })
-        else:
-            return api_response({
-                'source': None,
-                'origin': None,
-                'destination': None
-            })
+        generation = current_generation()
+        with db_connection() as conn:
+            data = db.find_flight_route(conn, callsign, reg, match, route_index, generation)
+        return api_response(data)
+
+    except Exception as e:
+        return api_response(None, 'error', str(e)), 500
 
+
+@app.route('/api/flights/routes', methods=['GET'])
+@cached_response
+def get_flight_routes():
+    """여러 편명/등록부호의 출발/도착 정보 일괄 조회 (RKPU Viewer용)"""
+    try:
+        callsigns = request.args.get('callsigns', None)
+        regs = request.args.get('regs', None)
+
+        if not callsigns and not regs:
+            return api_response(None, 'error', 'callsigns or regs required'), 400
+
+        generation = current_generation()
+        with db_connection() as conn:
+            data = db.find_flight_routes(conn, callsigns, regs, route_index, generation)
+        return api_response(data)
+
+    except ValueError as e:
+        return api_response(None, 'error', str(e)), 400
     except Exception as e:
         return api_response(None, 'error', str(e)), 500
 
@@ -270,60 +318,36 @@ def get_flight_route():
 # ============ 기상 API ============
 
 @app.route('/api/weather', methods=['GET'])
+@cached_response
 def get_weather():
     """기상정보 조회"""
     try:
         weather_type = request.args.get('type', 'metar')
         airport = request.args.get('airport', None)
+        match = request.args.get('match', 'exact')
         limit = request.args.get('limit', 50, type=int)
+        cursor_token = request.args.get('cursor', None)
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = "SELECT * FROM weather WHERE weather_type = ?"
-        params = [weather_type]
-
-        if airport:
-            query += " AND airport LIKE ?"
-            params.append(f"%{airport}%")
-
-        query += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
-
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-
-        weather_data = [dict_from_row(row) for row in rows]
-        return api_response({
-            'type': weather_type,
-            'count': len(weather_data),
-            'weather': weather_data
-        })
+        with db_connection() as conn:
+            data = db.list_weather(conn, weather_type, airport, match, cursor_token, limit)
+        return api_response(data)
 
+    except ValueError as e:
+        return api_response(None, 'error', str(e)), 400
     except Exception as e:
         return api_response(None, 'error', str(e)), 500
 
 
 @app.route('/api/weather/metar/<airport>', methods=['GET'])
+@cached_response
 def get_metar(airport):
     """특정 공항 METAR"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_connection() as conn:
+            data = db.latest_weather(conn, 'metar', airport)
 
-        cursor.execute('''
-            SELECT * FROM weather
-            WHERE weather_type = 'metar' AND airport LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        ''', (f"%{airport.upper()}%",))
-
-        row = cursor.fetchone()
-        conn.close()
-
-        if row:
-            return api_response(dict_from_row(row))
+        if data:
+            return api_response(data)
         else:
             return api_response(None, 'error', f'METAR not found for {airport}'), 404
 
@@ -332,24 +356,15 @@ def get_metar(airport):
 
 
 @app.route('/api/weather/taf/<airport>', methods=['GET'])
+@cached_response
 def get_taf(airport):
     """특정 공항 TAF"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT * FROM weather
-            WHERE weather_type = 'taf' AND airport LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        ''', (f"%{airport.upper()}%",))
+        with db_connection() as conn:
+            data = db.latest_weather(conn, 'taf', airport)
 
-        row = cursor.fetchone()
-        conn.close()
-
-        if row:
-            return api_response(dict_from_row(row))
+        if data:
+            return api_response(data)
         else:
             return api_response(None, 'error', f'TAF not found for {airport}'), 404
 
@@ -357,69 +372,80 @@ def get_taf(airport):
         return api_response(None, 'error', str(e)), 500
 
 
+@app.route('/api/weather/latest', methods=['GET'])
+@cached_response
+def get_latest_weather_batch():
+    """여러 공항의 최신 METAR/TAF 일괄 조회"""
+    try:
+        weather_type = request.args.get('type', 'metar')
+        airports = request.args.get('airports', None)
+
+        if not airports:
+            return api_response(None, 'error', 'airports parameter required'), 400
+
+        with db_connection() as conn:
+            data = db.latest_weather_batch(conn, weather_type, airports)
+        return api_response(data)
+
+    except ValueError as e:
+        return api_response(None, 'error', str(e)), 400
+    except Exception as e:
+        return api_response(None, 'error', str(e)), 500
+
+
 # ============ NOTAM API ============
 
 @app.route('/api/notam', methods=['GET'])
+@cached_response
 def get_notam():
     """NOTAM 조회"""
     try:
         notam_type = request.args.get('type', None)
         location = request.args.get('location', None)
+        match = request.args.get('match', 'exact')
         limit = request.args.get('limit', 100, type=int)
+        cursor_token = request.args.get('cursor', None)
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_connection() as conn:
+            data = db.list_notams(conn, notam_type, location, match, cursor_token, limit)
+        return api_response(data)
 
-        query = "SELECT * FROM notams WHERE 1=1"
-        params = []
+    except ValueError as e:
+        return api_response(None, 'error', str(e)), 400
+    except Exception as e:
+        return api_response(None, 'error', str(e)), 500
 
-        if notam_type:
-            query += " AND notam_type = ?"
-            params.append(notam_type)
-        if location:
-            query += " AND location LIKE ?"
-            params.append(f"%{location}%")
 
-        query += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
+@app.route('/api/notam/search', methods=['GET'])
+@cached_response
+def search_notam():
+    """NOTAM 전문 검색 (FTS5, 관련도순)"""
+    try:
+        text = request.args.get('q', None)
+        notam_type = request.args.get('type', None)
+        limit = request.args.get('limit', 50, type=int)
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
+        with db_connection() as conn:
+            data = db.search_notams(conn, text, notam_type, limit)
 
-        notams = [dict_from_row(row) for row in rows]
-        return api_response({
-            'count': len(notams),
-            'notams': notams
-        })
+        if data is None:
+            return api_response(None, 'error', 'q parameter required'), 400
+        return api_response(data)
 
     except Exception as e:
         return api_response(None, 'error', str(e)), 500
 
 
 @app.route('/api/notam/<location>', methods=['GET'])
+@cached_response
 def get_notam_by_location(location):
     """특정 위치 NOTAM"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT * FROM notams
-            WHERE location LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 50
-        ''', (f"%{location.upper()}%",))
+        match = request.args.get('match', 'exact')
 
-        rows = cursor.fetchall()
-        conn.close()
-
-        notams = [dict_from_row(row) for row in rows]
-        return api_response({
-            'location': location,
-            'count': len(notams),
-            'notams': notams
-        })
+        with db_connection() as conn:
+            data = db.notams_by_location(conn, location, match)
+        return api_response(data)
 
     except Exception as e:
         return api_response(None, 'error', str(e)), 500
@@ -428,35 +454,45 @@ def get_notam_by_location(location):
 # ============ ATFM API ============
 
 @app.route('/api/atfm', methods=['GET'])
+@cached_response
 def get_atfm():
     """ATFM 메시지"""
     try:
         airport = request.args.get('airport', None)
+        match = request.args.get('match', 'exact')
         limit = request.args.get('limit', 50, type=int)
+        cursor_token = request.args.get('cursor', None)
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_connection() as conn:
+            data = db.list_atfm(conn, airport, match, cursor_token, limit)
+        return api_response(data)
+
+    except ValueError as e:
+        return api_response(None, 'error', str(e)), 400
+    except Exception as e:
+        return api_response(None, 'error', str(e)), 500
 
-        query = "SELECT * FROM atfm_messages WHERE 1=1"
-        params = []
 
-        if airport:
-            query += " AND airport LIKE ?"
-            params.append(f"%{airport}%")
+# ============ 변경분 API ============
 
-        query += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
+@app.route('/api/changes', methods=['GET'])
+@cached_response
+def get_changes():
+    """since(crawl_timestamp) 이후 추가/변경/만료된 비행계획, NOTAM, 기상"""
+    try:
+        since = request.args.get('since', None)
+        limit = request.args.get('limit', 500, type=int)
+        cursor_token = request.args.get('cursor', None)
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
+        with db_connection() as conn:
+            data = db.list_changes(conn, since, cursor_token, limit)
 
-        messages = [dict_from_row(row) for row in rows]
-        return api_response({
-            'count': len(messages),
-            'messages': messages
-        })
+        if data is None:
+            return api_response(None, 'error', 'since or cursor parameter required'), 400
+        return api_response(data)
 
+    except ValueError as e:
+        return api_response(None, 'error', str(e)), 400
     except Exception as e:
         return api_response(None, 'error', str(e)), 500
 
@@ -464,57 +500,23 @@ def get_atfm():
 # ============ 공항 정보 API ============
 
 @app.route('/api/airports', methods=['GET'])
+@cached_response
 def get_airports():
     """공항 목록"""
-    airports = {
-        'RKSI': {'icao': 'RKSI', 'iata': 'ICN', 'name': 'Incheon International', 'name_ko': '인천국제공항'},
-        'RKSS': {'icao': 'RKSS', 'iata': 'GMP', 'name': 'Gimpo International', 'name_ko': '김포국제공항'},
-        'RKPK': {'icao': 'RKPK', 'iata': 'PUS', 'name': 'Gimhae International', 'name_ko': '김해국제공항'},
-        'RKPC': {'icao': 'RKPC', 'iata': 'CJU', 'name': 'Jeju International', 'name_ko': '제주국제공항'},
-        'RKTU': {'icao': 'RKTU', 'iata': 'CJJ', 'name': 'Cheongju International', 'name_ko': '청주국제공항'},
-        'RKTN': {'icao': 'RKTN', 'iata': 'TAE', 'name': 'Daegu International', 'name_ko': '대구국제공항'},
-        'RKJJ': {'icao': 'RKJJ', 'iata': 'KWJ', 'name': 'Gwangju', 'name_ko': '광주공항'},
-        'RKJY': {'icao': 'RKJY', 'iata': 'RSU', 'name': 'Yeosu', 'name_ko': '여수공항'},
-        'RKPU': {'icao': 'RKPU', 'iata': 'USN', 'name': 'Ulsan', 'name_ko': '울산공항'},
-        'RKTH': {'icao': 'RKTH', 'iata': 'KPO', 'name': 'Pohang', 'name_ko': '포항공항'},
-        'RKPS': {'icao': 'RKPS', 'iata': 'HIN', 'name': 'Sacheon', 'name_ko': '사천공항'},
-        'RKJB': {'icao': 'RKJB', 'iata': 'MWX', 'name': 'Muan International', 'name_ko': '무안국제공항'},
-        'RKNY': {'icao': 'RKNY', 'iata': 'YNY', 'name': 'Yangyang International', 'name_ko': '양양국제공항'},
-        'RKNW': {'icao': 'RKNW', 'iata': 'WJU', 'name': 'Wonju', 'name_ko': '원주공항'},
-        'RKJK': {'icao': 'RKJK', 'iata': 'KUV', 'name': 'Gunsan', 'name_ko': '군산공항'}
-    }
-
-    return api_response({
-        'count': len(airports),
-        'airports': list(airports.values())
-    })
+    return api_response(db.list_airports())
 
 
 @app.route('/api/airports/<icao>', methods=['GET'])
+@cached_response
 def get_airport_info(icao):
     """특정 공항 정보"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with db_connection() as conn:
+            data = db.airport_info(conn, icao)
 
-        cursor.execute('''
-            SELECT * FROM airport_info
-            WHERE icao_code = ?
-        ''', (icao.upper(),))
-
-        row = cursor.fetchone()
-        conn.close()
-
-        if row:
-            return api_response(dict_from_row(row))
-        else:
-            # 기본 정보 반환
-            airports = {
-                'RKPU': {'icao': 'RKPU', 'iata': 'USN', 'name': 'Ulsan Airport', 'name_ko': '울산공항'}
-            }
-            if icao.upper() in airports:
-                return api_response(airports[icao.upper()])
-            return api_response(None, 'error', f'Airport {icao} not found'), 404
+        if data:
+            return api_response(data)
+        return api_response(None, 'error', f'Airport {icao} not found'), 404
 
     except Exception as e:
         return api_response(None, 'error', str(e)), 500
@@ -526,38 +528,34 @@ def get_airport_info(icao):
 def get_status():
     """API 상태"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # 최신 크롤링 시간
-        cursor.execute('SELECT MAX(crawl_timestamp) as last_crawl FROM crawl_logs')
-        last_crawl = cursor.fetchone()
-
-        # 각 테이블 레코드 수
-        tables = ['flight_plans', 'weather', 'notams', 'atfm_messages']
-        counts = {}
-        for table in tables:
-            try:
-                cursor.execute(f'SELECT COUNT(*) as count FROM {table}')
-                counts[table] = cursor.fetchone()['count']
-            except:
-                counts[table] = 0
-
-        conn.close()
+        with db_connection() as conn:
+            status = db.crawl_status(conn)
 
         return api_response({
             'status': 'online',
-            'last_crawl': last_crawl['last_crawl'] if last_crawl else None,
-            'records': counts
+            **status,
+            'db_pool': get_pool().snapshot(),
+            'response_cache': response_cache.snapshot(),
+            'coalescing': single_flight.snapshot(),
+            'rate_limit': rate_limiter.snapshot(),
+            'route_index': route_index.snapshot()
         })
 
     except Exception as e:
         return api_response({
             'status': 'error',
-            'message': str(e)
+            'message': str(e),
+            'db_pool': get_pool().snapshot(),
+            'response_cache': response_cache.snapshot()
         })
 
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus 형식 계측 (워커 프로세스별 집계)"""
+    return app.response_class(metrics_registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.route('/', methods=['GET'])
 def index():
     """API 문서"""
@@ -570,33 +568,146 @@ def index():
                 'GET /api/flights': 'Get all flight plans',
                 'GET /api/flights/departures': 'Get departures',
                 'GET /api/flights/arrivals': 'Get arrivals',
-                'GET /api/flights/search?flight=KAL123': 'Search flight by callsign',
-                'GET /api/flights/route?callsign=KAL123': 'Get origin/destination for RKPU Viewer'
+                'GET /api/flights/search?flight=KAL123': 'Search flight by callsign prefix (match=exact|prefix|contains)',
+                'GET /api/flights/route?callsign=KAL123': 'Get origin/destination for RKPU Viewer',
+                'GET /api/flights/routes?callsigns=KAL123,AAR456&regs=HL8001': 'Batch route lookup (exact, up to UBIKAIS_BATCH_MAX_KEYS keys)'
             },
             'weather': {
                 'GET /api/weather?type=metar': 'Get weather data',
                 'GET /api/weather/metar/RKPU': 'Get METAR for airport',
-                'GET /api/weather/taf/RKPU': 'Get TAF for airport'
+                'GET /api/weather/taf/RKPU': 'Get TAF for airport',
+                'GET /api/weather/latest?type=metar&airports=RKPU,RKSI': 'Batch latest METAR/TAF lookup'
             },
             'notam': {
-                'GET /api/notam': 'Get all NOTAMs',
-                'GET /api/notam/RKPU': 'Get NOTAMs for location'
+                'GET /api/notam?location=RKPU': 'Get all NOTAMs (ICAO filters are exact unless match=prefix|contains)',
+                'GET /api/notam/RKPU': 'Get NOTAMs for location',
+                'GET /api/notam/search?q=RWY CLSD': 'Full-text NOTAM search (ranked)'
             },
             'atfm': {
                 'GET /api/atfm': 'Get ATFM messages'
             },
+            'changes': {
+                'GET /api/changes?since=<crawl_timestamp>': 'Inserted/updated/expired flights, NOTAMs and weather since a crawl (resume with cursor=<next_cursor>)'
+            },
             'airports': {
                 'GET /api/airports': 'List all Korean airports',
                 'GET /api/airports/RKPU': 'Get airport info'
             },
             'status': {
-                'GET /api/status': 'API status and last crawl time'
+                'GET /api/status': 'API status and last crawl time',
+                'GET /metrics': 'Prometheus metrics: per-route latency, SQL time/rows, response bytes'
             }
+        },
+        'options': {
+            'cursor=<next_cursor>': 'Next page of /api/flights, /api/weather, /api/notam, /api/atfm (limit max 1000)',
+            'format=columnar': 'Return record lists as {columns, rows} arrays instead of a list of objects',
+            'Accept-Encoding: br, gzip': 'Responses over UBIKAIS_COMPRESSION_MIN_SIZE bytes are compressed'
         }
     })
 
 
+# ============ 쿼리 실행계획 진단 ============
+
+# 엔드포인트별 쿼리 형태를 모두 포함하는 대표 요청
+EXPLAIN_REQUESTS = [
+    '/api/flights',
+    '/api/flights?type=departure',
+    '/api/flights?origin=RKPU&destination=RKSS',
+    '/api/flights/departures?airport=RKPU',
+    '/api/flights/arrivals?airport=RKPU',
+    '/api/flights/search?flight=KAL123',
+    '/api/flights/search?flight=KAL123&match=contains',
+    '/api/flights/route?callsign=KAL123',
+    '/api/flights/route?reg=HL1234',
+    '/api/flights/routes?callsigns=KAL123,AAR456&regs=HL1234,HL5678',
+    '/api/weather?type=metar&airport=RKPU',
+    '/api/weather/metar/RKPU',
+    '/api/weather/taf/RKPU',
+    '/api/weather/latest?type=metar&airports=RKPU,RKSI,RKSS',
+    '/api/notam',
+    '/api/notam?type=ad&location=RKPU',
+    f'/api/notam?type=ad&cursor={encode_cursor("9999-12-31 00:00:00", 2 ** 31)}',
+    '/api/notam/RKPU',
+    '/api/notam/search?q=RWY CLSD',
+    '/api/atfm?airport=RKPU',
+    f'/api/atfm?cursor={encode_cursor("9999-12-31 00:00:00", 2 ** 31)}',
+    '/api/changes?since=2026-01-01T00:00:00&limit=10',
+    f'/api/changes?cursor={encode_cursor("2026-01-01T00:00:00", 0)}&limit=10',
+    '/api/airports/RKPU',
+    '/api/status'
+]
+
+
+FTS_SHADOW_TABLE = re.compile(r"_fts_(config|data|idx|docsize|content)\b")
+# 테이블이 아닌 서브쿼리 결과(co-routine) 순회
+SUBQUERY_SCAN = re.compile(r"^SCAN (\(subquery-\d+\)|SUBQUERY \d+)")
+
+
+def explain_queries(db_path=DB_PATH):
+    """모든 엔드포인트 쿼리에 EXPLAIN QUERY PLAN 실행
+
+    인덱스 없이 테이블 전체를 읽는 쿼리(SCAN <table>)가 있으면 False 반환.
+    인덱스 순서 스캔(SCAN ... USING INDEX)과 임시 정렬은 경고로만 출력한다.
+    """
+    global _pool, _pool_pid
+
+    captured = []
+    _pool = ConnectionPool(db_path, size=1, trace_callback=captured.append)
+    _pool_pid = os.getpid()
+
+    explain_conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro", uri=True)
+    client = app.test_client()
+    rate_limiter.rate = 0  # 진단 요청은 한 클라이언트에서 연달아 보내므로 요청 제한 끔
+    ok = True
+
+    # route_lookup 전체 읽기는 크롤링 세대당 한 번이므로 요청별 진단 전에 미리 적재
+    generation = current_generation()
+    with db_connection() as conn:
+        route_index.get(conn, generation)
+
+    for url in EXPLAIN_REQUESTS:
+        captured.clear()
+        status_code = client.get(url).status_code
+        # FTS5가 내부적으로 실행하는 섀도 테이블 쿼리는 제외
+        statements = [sql for sql in captured if sql.lstrip().upper().startswith('SELECT')
+                      and not FTS_SHADOW_TABLE.search(sql)]
+        print(f"\n[{status_code}] GET {url}")
+
+        for sql in statements:
+            plan = [row[3] for row in explain_conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+            full_scans = [step for step in plan if step.startswith('SCAN')
+                          and ' USING ' not in step and 'VIRTUAL TABLE' not in step
+                          and not SUBQUERY_SCAN.match(step)]
+            warnings = [step for step in plan if step not in full_scans and 'VIRTUAL TABLE' not in step
+                        and not SUBQUERY_SCAN.match(step)
+                        and (step.startswith('SCAN') or 'TEMP B-TREE' in step)]
+
+            verdict = 'FULL SCAN' if full_scans else ('WARN' if warnings else 'OK')
+            print(f"  [{verdict}] {' '.join(sql.split())}")
+            for step in plan:
+                print(f"      {step}")
+            if full_scans:
+                ok = False
+
+    explain_conn.close()
+    print(f"\n[{'OK' if ok else 'FAIL'}] 쿼리 실행계획 진단 {'통과' if ok else '실패 (풀 테이블 스캔 발견)'}")
+    return ok
+
+
 if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='UBIKAIS API Server')
+    parser.add_argument('--explain', action='store_true',
+                        help='Run EXPLAIN QUERY PLAN for every endpoint query and exit')
+    parser.add_argument('--db', default=DB_PATH, help='SQLite DB path')
+    args = parser.parse_args()
+
+    if args.explain:
+        sys.exit(0 if explain_queries(args.db) else 1)
+
+    DB_PATH = args.db
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'false').lower() == 'true'
 
@@ -613,6 +724,7 @@ if __name__ == '__main__':
     - GET /api/flights/route    - Flight route (for RKPU Viewer)
     - GET /api/weather          - Weather data
     - GET /api/notam            - NOTAMs
+    - GET /api/notam/search     - NOTAM full-text search
     - GET /api/airports         - Airport info
     - GET /api/status           - API status
     """)
@@ -0,0 +1,791 @@
+"""
+UBIKAIS API Server (ASGI) - ubikais_api_server.py와 같은 경로/응답 형식의 비동기 버전
+SQLite 조회는 크기가 제한된 스레드 풀에서 실행하고, 이벤트 루프는 연결 처리만 맡는다.
+
+실행 (워커 프로세스마다 커넥션 풀, DB 스레드 풀, 응답 캐시를 따로 가진다):
+    uvicorn ubikais_asgi:app --host 0.0.0.0 --port 5000 --workers 4
+    python ubikais_asgi.py --workers 4 --db ubikais_full.db
+
+종료(SIGTERM/SIGINT): 열린 SSE 스트림을 바로 닫고, 서버가 새 연결을 받지 않고 진행 중인
+요청을 마친 뒤 lifespan shutdown에서 남은 DB 작업을 기다리고 스레드/커넥션을 정리한다.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import os
+import re
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qsl
+
+import ubikais_db as db
+from ubikais_db import DB_POOL_SIZE, ConnectionPool, get_crawl_generation
+from ubikais_http import (COALESCE_REQUESTS, RateLimiter, ResponseCache, cached_body, client_address,
+                          compress, conditional_headers, dumps, is_not_modified,
+                          negotiate_compression, sse_event, to_columnar)
+from ubikais_metrics import PROMETHEUS_CONTENT_TYPE, MetricsRegistry, begin_request, record_sql
+
+# 설정
+DB_PATH = os.environ.get('UBIKAIS_DB_PATH', 'ubikais_full.db')
+GENERATION_CHECK_INTERVAL = float(os.environ.get('UBIKAIS_GENERATION_CHECK_INTERVAL', 1.0))
+
+# DB 스레드 수(= 커넥션 풀 크기), 스레드를 기다릴 수 있는 최대 요청 수와 대기 시간
+DB_THREADS = int(os.environ.get('UBIKAIS_ASGI_DB_THREADS', DB_POOL_SIZE))
+DB_QUEUE_LIMIT = int(os.environ.get('UBIKAIS_ASGI_DB_QUEUE', 256))
+DB_QUEUE_TIMEOUT = float(os.environ.get('UBIKAIS_ASGI_DB_QUEUE_TIMEOUT', 5))
+SHUTDOWN_TIMEOUT = float(os.environ.get('UBIKAIS_ASGI_SHUTDOWN_TIMEOUT', 10))
+
+# SSE 스트림: keepalive 주석 간격(초), 클라이언트 재접속 대기(ms)
+STREAM_HEARTBEAT = float(os.environ.get('UBIKAIS_STREAM_HEARTBEAT', 15))
+STREAM_RETRY_MS = int(os.environ.get('UBIKAIS_STREAM_RETRY_MS', 5000))
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-expose-headers', b'ETag, Last-Modified')
+]
+PREFLIGHT_HEADERS = [
+    (b'access-control-allow-methods', b'GET, HEAD, OPTIONS'),
+    (b'access-control-allow-headers', b'Content-Type, If-None-Match, If-Modified-Since'),
+    (b'access-control-max-age', b'86400')
+]
+
+
+class ApiError(Exception):
+    """상태 코드와 메시지를 가진 API 오류 (오류 응답으로 변환)"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class DatabaseExecutor:
+    """SQLite 조회를 제한된 스레드 풀에서 실행
+
+    스레드 수와 커넥션 풀 크기를 같게 두어 풀 대기가 생기지 않게 하고,
+    실행 중 + 대기 중인 작업 수는 세마포어로 제한해 과부하 시 503으로 빠르게 거절한다.
+    """
+
+    def __init__(self, db_path, threads=DB_THREADS, queue_limit=DB_QUEUE_LIMIT):
+        self.threads = threads
+        self.queue_limit = queue_limit
+        self.pool = ConnectionPool(db_path, size=threads)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='ubikais-db')
+        self.closing = False
+        self._slots = asyncio.Semaphore(threads + queue_limit)
+        self._active = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self.stats = {'jobs': 0, 'rejected': 0, 'queue_time': 0.0}
+
+    def _call(self, func, args):
+        with self.pool.connection() as conn:
+            return func(conn, *args)
+
+    async def run(self, func, *args):
+        """func(conn, *args)를 DB 스레드에서 실행하고 결과 반환"""
+        if self.closing:
+            raise ApiError(503, 'server shutting down')
+
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), DB_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.stats['rejected'] += 1
+            raise ApiError(503, 'server busy')
+
+        self._active += 1
+        self._drained.clear()
+        self.stats['jobs'] += 1
+        self.stats['queue_time'] += time.perf_counter() - queued_at
+        try:
+            # 요청 컨텍스트(SQL 계측 누적값)를 DB 스레드로 넘긴다
+            context = contextvars.copy_context()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, context.run, self._call, func, args)
+        finally:
+            self._slots.release()
+            self._active -= 1
+            if self._active == 0:
+                self._drained.set()
+
+    async def close(self, timeout=SHUTDOWN_TIMEOUT):
+        """새 작업을 막고 진행 중인 작업을 기다린 뒤 스레드/커넥션 정리"""
+        self.closing = True
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+        except asyncio.TimeoutError:
+            print(f"[WARN] DB 작업 {self._active}개가 종료 대기 시간({timeout}s)을 넘김")
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pool.close()
+
+    def snapshot(self):
+        """스레드 풀 상태 및 계측값"""
+        return {
+            'threads': self.threads,
+            'queue_limit': self.queue_limit,
+            'active': self._active,
+            'closing': self.closing,
+            **{k: round(v, 6) if isinstance(v, float) else v for k, v in self.stats.items()}
+        }
+
+
+class AsyncSingleFlight:
+    """같은 키로 동시에 들어온 코루틴 호출을 한 번의 실행으로 합침 (ubikais_http.SingleFlight의 asyncio 버전)
+
+    실행은 별도 태스크로 돌려, 먼저 온 요청의 연결이 끊겨도 기다리던 요청들은 결과를 받는다.
+    """
+
+    def __init__(self, enabled=COALESCE_REQUESTS):
+        self.enabled = enabled
+        self._flights = {}
+        self.stats = {'executions': 0, 'coalesced': 0}
+
+    async def do(self, key, func, *args):
+        if not self.enabled:
+            return await func(*args)
+
+        task = self._flights.get(key)
+        if task is None:
+            task = self._flights[key] = asyncio.ensure_future(func(*args))
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+            self.stats['executions'] += 1
+        else:
+            self.stats['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    def snapshot(self):
+        """합치기 상태 및 통계"""
+        return {'enabled': self.enabled, 'in_flight': len(self._flights), **self.stats}
+
+
+database = None
+response_cache = ResponseCache()
+single_flight = AsyncSingleFlight()
+rate_limiter = RateLimiter()
+route_index = db.RouteIndex()
+_generation = {'value': None, 'checked_at': 0.0}
+
+
+def get_database():
+    """현재 워커의 DB 실행기 (lifespan을 지원하지 않는 서버면 첫 요청에서 생성)"""
+    global database
+    if database is None:
+        database = DatabaseExecutor(DB_PATH)
+    return database
+
+
+async def current_generation():
+    """현재 크롤링 세대 (GENERATION_CHECK_INTERVAL초 동안 재사용)"""
+    now = time.monotonic()
+    if _generation['value'] is None or now - _generation['checked_at'] >= GENERATION_CHECK_INTERVAL:
+        _generation['value'] = await get_database().run(get_crawl_generation)
+        _generation['checked_at'] = now
+    return _generation['value']
+
+
+# ============ 엔드포인트 (DB 스레드에서 실행) ============
+
+def _limit(args, default):
+    """limit 인자 (숫자가 아니면 기본값, Flask의 type=int와 동일)"""
+    try:
+        return int(args.get('limit', default))
+    except ValueError:
+        return default
+
+
+def get_all_flights(conn, args):
+    return db.list_flights(conn, args.get('type'), args.get('origin'), args.get('destination'),
+                           args.get('match', 'exact'), args.get('cursor'), _limit(args, 100))
+
+
+def get_departures(conn, args):
+    return db.list_departures(conn, args.get('airport'), args.get('match', 'exact'), _limit(args, 100))
+
+
+def get_arrivals(conn, args):
+    return db.list_arrivals(conn, args.get('airport'), args.get('match', 'exact'), _limit(args, 100))
+
+
+def search_flight(conn, args):
+    flight_number = args.get('flight', args.get('callsign'))
+    if not flight_number:
+        raise ApiError(400, 'flight parameter required')
+    return db.search_flights(conn, flight_number, args.get('match', 'prefix'))
+
+
+def get_flight_route(conn, args):
+    callsign, reg = args.get('callsign'), args.get('reg')
+    if not callsign and not args.get('hex') and not reg:
+        raise ApiError(400, 'callsign, hex, or reg required')
+    return db.find_flight_route(conn, callsign, reg, args.get('match', 'exact'),
+                                route_index, _generation['value'])
+
+
+def get_flight_routes(conn, args):
+    if not args.get('callsigns') and not args.get('regs'):
+        raise ApiError(400, 'callsigns or regs required')
+    return db.find_flight_routes(conn, args.get('callsigns'), args.get('regs'),
+                                 route_index, _generation['value'])
+
+
+def get_weather(conn, args):
+    return db.list_weather(conn, args.get('type', 'metar'), args.get('airport'),
+                           args.get('match', 'exact'), args.get('cursor'), _limit(args, 50))
+
+
+def get_metar(conn, args, airport):
+    data = db.latest_weather(conn, 'metar', airport)
+    if not data:
+        raise ApiError(404, f'METAR not found for {airport}')
+    return data
+
+
+def get_taf(conn, args, airport):
+    data = db.latest_weather(conn, 'taf', airport)
+    if not data:
+        raise ApiError(404, f'TAF not found for {airport}')
+    return data
+
+
+def get_latest_weather_batch(conn, args):
+    if not args.get('airports'):
+        raise ApiError(400, 'airports parameter required')
+    return db.latest_weather_batch(conn, args.get('type', 'metar'), args.get('airports'))
+
+
+def get_notam(conn, args):
+    return db.list_notams(conn, args.get('type'), args.get('location'),
+                          args.get('match', 'exact'), args.get('cursor'), _limit(args, 100))
+
+
+def search_notam(conn, args):
+    data = db.search_notams(conn, args.get('q'), args.get('type'), _limit(args, 50))
+    if data is None:
+        raise ApiError(400, 'q parameter required')
+    return data
+
+
+def get_notam_by_location(conn, args, location):
+    return db.notams_by_location(conn, location, args.get('match', 'exact'))
+
+
+def get_atfm(conn, args):
+    return db.list_atfm(conn, args.get('airport'), args.get('match', 'exact'),
+                        args.get('cursor'), _limit(args, 50))
+
+
+def get_changes(conn, args):
+    data = db.list_changes(conn, args.get('since'), args.get('cursor'), _limit(args, 500))
+    if data is None:
+        raise ApiError(400, 'since or cursor parameter required')
+    return data
+
+
+def get_airports(conn, args):
+    return db.list_airports()
+
+
+def get_airport_info(conn, args, icao):
+    data = db.airport_info(conn, icao)
+    if not data:
+        raise ApiError(404, f'Airport {icao} not found')
+    return data
+
+
+def get_status(conn, args):
+    try:
+        status = {'status': 'online', **db.crawl_status(conn)}
+    except Exception as e:
+        status = {'status': 'error', 'message': str(e)}
+    return {
+        **status,
+        'db_pool': database.pool.snapshot(),
+        'db_executor': database.snapshot(),
+        'response_cache': response_cache.snapshot(),
+        'coalescing': single_flight.snapshot(),
+        'rate_limit': rate_limiter.snapshot(),
+        'route_index': route_index.snapshot(),
+        'stream': broadcaster.snapshot() if broadcaster else None
+    }
+
+
+# (경로 패턴, 핸들러, 세대 캐시/조건부 요청 적용 여부)
+ROUTES = [
+    (r'/api/flights', get_all_flights, True),
+    (r'/api/flights/departures', get_departures, True),
+    (r'/api/flights/arrivals', get_arrivals, True),
+    (r'/api/flights/search', search_flight, True),
+    (r'/api/flights/route', get_flight_route, True),
+    (r'/api/flights/routes', get_flight_routes, True),
+    (r'/api/weather', get_weather, True),
+    (r'/api/weather/metar/(?P<airport>[^/]+)', get_metar, True),
+    (r'/api/weather/taf/(?P<airport>[^/]+)', get_taf, True),
+    (r'/api/weather/latest', get_latest_weather_batch, True),
+    (r'/api/notam', get_notam, True),
+    (r'/api/notam/search', search_notam, True),
+    (r'/api/notam/(?P<location>[^/]+)', get_notam_by_location, True),
+    (r'/api/atfm', get_atfm, True),
+    (r'/api/changes', get_changes, True),
+    (r'/api/airports', get_airports, True),
+    (r'/api/airports/(?P<icao>[^/]+)', get_airport_info, True),
+    (r'/api/status', get_status, False)
+]
+# 계측 라벨용 경로 템플릿 ('/api/notam/<location>', Flask url_rule과 같은 형식)
+ROUTES = [(re.compile(pattern + '$'), view, cacheable, re.sub(r'\(\?P<(\w+)>[^)]*\)', r'<\1>', pattern))
+          for pattern, view, cacheable in ROUTES]
+
+INDEX = {
+    'name': 'UBIKAIS API',
+    'version': '1.0.0',
+    'description': 'Korean Aviation Data API (UBIKAIS Crawler, ASGI)',
+    'endpoints': [
+        'GET /api/flights', 'GET /api/flights/departures', 'GET /api/flights/arrivals',
+        'GET /api/flights/search?flight=KAL123', 'GET /api/flights/route?callsign=KAL123',
+        'GET /api/flights/routes?callsigns=KAL123,AAR456&regs=HL8001',
+        'GET /api/weather/latest?type=metar&airports=RKPU,RKSI',
+        'GET /api/weather?type=metar', 'GET /api/weather/metar/{airport}',
+        'GET /api/weather/taf/{airport}', 'GET /api/notam', 'GET /api/notam/{location}',
+        'GET /api/notam/search?q=RWY CLSD', 'GET /api/atfm',
+        'GET /api/changes?since=<crawl_timestamp>', 'GET /api/airports',
+        'GET /api/airports/{icao}', 'GET /api/status', 'GET /metrics (Prometheus)',
+        'GET /api/stream (text/event-stream, resume with Last-Event-ID or ?since=<token>)'
+    ]
+}
+
+
+def match_route(path):
+    """경로 -> (핸들러, 경로 인자, 캐시 여부, 경로 템플릿), 없으면 None"""
+    for pattern, view, cacheable, template in ROUTES:
+        matched = pattern.match(path)
+        if matched:
+            return view, matched.groups(), cacheable, template
+    return None
+
+
+def api_body(data, args, status='success', message=None):
+    """표준 API 응답 본문 (ubikais_api_server.api_response와 같은 형식)"""
+    if args.get('format') == 'columnar':
+        data = to_columnar(data)
+    body = {
+        'status': status,
+        'timestamp': datetime.now().isoformat(),
+        'data': data
+    }
+    if message:
+        body['message'] = message
+    return dumps(body)
+
+
+async def call_view(view, args, path_args):
+    """핸들러를 DB 스레드에서 실행 -> (상태 코드, 본문)"""
+    try:
+        data = await get_database().run(view, args, *path_args)
+        return 200, api_body(data, args)
+    except ApiError as e:
+        return e.status_code, api_body(None, args, 'error', str(e))
+    except ValueError as e:
+        return 400, api_body(None, args, 'error', str(e))
+    except Exception as e:
+        return 500, api_body(None, args, 'error', str(e))
+
+
+async def serve_cached(path, pairs, args, headers, view, path_args):
+    """세대 기반 조건부 요청 + 응답 캐시 (ubikais_api_server.cached_response와 동일한 규칙)
+
+    캐시 미스인 동일 요청이 동시에 오면 single_flight로 뷰를 한 번만 실행한다.
+    """
+    try:
+        generation = await current_generation()
+    except Exception:
+        status, body = await call_view(view, args, path_args)
+        return status, body, {}
+
+    params = tuple(sorted(pairs))
+    validators = conditional_headers(generation, path, params)
+    if is_not_modified(validators, headers.get('if-none-match'), headers.get('if-modified-since')):
+        return 304, b'', validators
+
+    key = (path, params)
+    entry = response_cache.get(key, generation)
+    if entry is None:
+        status, entry = await single_flight.do((key, generation), render_entry,
+                                               view, args, path_args, key, generation)
+        if status != 200:
+            return status, entry[0], {}
+
+    return 200, cached_body(entry, headers.get('accept-encoding'), validators), validators
+
+
+async def render_entry(view, args, path_args, key, generation):
+    """뷰 실행 -> (상태 코드, 캐시 항목), 200이면 캐시에 저장 (합쳐진 요청들이 같은 결과를 공유)"""
+    status, body = await call_view(view, args, path_args)
+    entry = (body, 'application/json', {})
+    if status == 200:
+        response_cache.put(key, generation, entry)
+    return status, entry
+
+
+async def send_response(send, status, body, headers=None, extra=(), head=False,
+                        content_type='application/json'):
+    """ASGI 응답 전송 (기본 JSON, CORS 헤더 포함)"""
+    raw_headers = [(b'content-type', content_type.encode('latin-1'))] + CORS_HEADERS + list(extra)
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode('latin-1'), str(value).encode('latin-1')))
+    if status != 304:
+        raw_headers.append((b'content-length', str(len(body)).encode('latin-1')))
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': b'' if head else body})
+
+
+# ============ 변경 스트림 (SSE) ============
+
+def build_stream_payload(conn, since, until):
+    """since -> until 워터마크 사이의 새/변경 행을 SSE 메시지로 직렬화 (DB 스레드에서 실행)
+
+    테이블별 배치마다 이벤트 하나(id = 그 배치까지의 재개 토큰), 마지막에 sync 이벤트.
+    """
+    parts = []
+    for name, records, marks in db.fetch_stream_deltas(conn, since, until):
+        parts.append(sse_event(name, {'table': name, 'count': len(records), 'rows': records},
+                               db.encode_stream_token(marks)))
+    parts.append(sse_event('sync', {
+        'generation': get_crawl_generation(conn),
+        'watermarks': until
+    }, db.encode_stream_token(until)))
+    return b''.join(parts)
+
+
+class StreamBroadcaster:
+    """워터마크를 주기적으로 확인해 변경분을 모든 구독자에게 전달 (워커당 하나)
+
+    변경분 메시지는 크롤링 커밋마다 한 번만 만들고, 직전 워터마크에 있던 구독자들이
+    같은 바이트를 그대로 받는다. 오래된 토큰으로 재접속한 구독자만 따로 따라잡기 조회를 한다.
+    """
+
+    def __init__(self):
+        self.marks = None
+        self.batch = None  # (since, until, payload)
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.closing = False
+        self._task = None
+
+    async def start(self):
+        self.marks = await get_database().run(db.stream_watermarks)
+        self._task = asyncio.ensure_future(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(GENERATION_CHECK_INTERVAL)
+            try:
+                marks = await get_database().run(db.stream_watermarks)
+                if marks == self.marks:
+                    continue
+                batch = None
+                if self.subscribers:
+                    payload = await get_database().run(build_stream_payload, self.marks, marks)
+                    batch = (self.marks, marks, payload)
+                self.batch = batch
+                self.marks = marks
+                changed, self.changed = self.changed, asyncio.Event()
+                changed.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[WARN] 스트림 감시 오류: {e}")
+
+    def close(self):
+        """서버 종료: 모든 구독 스트림을 깨워 응답을 끝내게 한다 (클라이언트는 retry 후 재접속)"""
+        self.closing = True
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def snapshot(self):
+        return {'subscribers': self.subscribers, 'watermarks': self.marks}
+
+
+broadcaster = None
+# 종료 시작 후에는 새 스트림을 받지 않는다
+streams_closed = False
+
+
+def close_streams():
+    """종료 시작: 열린 SSE 스트림 닫기 (종료 시그널 또는 lifespan shutdown에서 호출)"""
+    global streams_closed
+    streams_closed = True
+    if broadcaster is not None:
+        broadcaster.close()
+
+
+def _watch_exit_signals():
+    """서버의 SIGINT/SIGTERM 처리기 앞에 close_streams 연결
+
+    uvicorn은 진행 중인 요청이 모두 끝나기를 기다린 뒤에야 lifespan shutdown을 보내므로,
+    끝나지 않는 SSE 응답이 있으면 graceful shutdown 시간 초과까지 기다리게 된다.
+    """
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(close_streams)
+            previous(signum, frame)
+
+        try:
+            signal.signal(sig, handler)
+        except ValueError:
+            # 메인 스레드가 아닌 곳에서 실행되는 서버
+            return
+
+
+async def get_broadcaster():
+    """현재 워커의 스트림 배포기 (첫 구독 시 감시 시작)"""
+    global broadcaster
+    if streams_closed:
+        raise ApiError(503, 'server shutting down')
+    if broadcaster is None:
+        stream = StreamBroadcaster()
+        await stream.start()
+        broadcaster = stream
+    return broadcaster
+
+
+async def _wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def serve_stream(receive, send, args, headers):
+    """/api/stream: 크롤링 커밋마다 테이블별 새/변경 행을 SSE로 전송
+
+    재개 토큰은 각 이벤트의 id이며, 재접속 시 Last-Event-ID 헤더(EventSource 자동) 또는
+    ?since=<token>으로 넘기면 그 이후 변경분부터 받는다. 토큰이 없으면 현재 시점부터 시작한다.
+    """
+    token = headers.get('last-event-id') or args.get('since')
+    try:
+        marks = db.decode_stream_token(token) if token else None
+        stream = await get_broadcaster()
+    except ValueError as e:
+        await send_response(send, 400, api_body(None, args, 'error', str(e)))
+        return
+    except ApiError as e:
+        await send_response(send, e.status_code, api_body(None, args, 'error', str(e)))
+        return
+    except Exception as e:
+        await send_response(send, 500, api_body(None, args, 'error', str(e)))
+        return
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream; charset=utf-8'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no')
+    ] + CORS_HEADERS})
+
+    async def push(chunk):
+        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+    stream.subscribers += 1
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await push(f'retry: {STREAM_RETRY_MS}\n\n'.encode('ascii'))
+        if marks is None:
+            marks = stream.marks
+            await push(sse_event('sync', {'watermarks': marks}, db.encode_stream_token(marks)))
+
+        while not disconnected.done() and not stream.closing:
+            if marks != stream.marks:
+                batch = stream.batch
+                if batch and batch[0] == marks:
+                    until, payload = batch[1], batch[2]
+                else:
+                    # 오래된 토큰: 이 구독자만 따라잡기
+                    until = stream.marks
+                    try:
+                        payload = await get_database().run(build_stream_payload, marks, until)
+                    except ApiError:
+                        await asyncio.sleep(1)
+                        continue
+                await push(payload)
+                marks = until
+                continue
+
+            changed = asyncio.ensure_future(stream.changed.wait())
+            done, _ = await asyncio.wait({changed, disconnected}, timeout=STREAM_HEARTBEAT,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if changed not in done:
+                changed.cancel()
+            if not done and not stream.closing:
+                await push(b': keepalive\n\n')
+    finally:
+        stream.subscribers -= 1
+        disconnected.cancel()
+        try:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        except Exception:
+            pass
+
+
+async def handle_http(scope, receive, send):
+    method = scope['method']
+    headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+
+    if method == 'OPTIONS':
+        await send_response(send, 200, b'', extra=PREFLIGHT_HEADERS)
+        return
+    if method not in ('GET', 'HEAD'):
+        await send_response(send, 405, api_body(None, {}, 'error', 'Method not allowed'),
+                            extra=[(b'allow', b'GET, HEAD, OPTIONS')])
+        return
+
+    client = client_address(scope['client'][0] if scope.get('client') else None,
+                            headers.get('x-forwarded-for'))
+    wait = rate_limiter.check(client)
+    if wait:
+        await send_response(send, 429, api_body(None, {}, 'error', 'Too many requests'),
+                            {'Retry-After': max(1, int(wait + 0.999))}, head=method == 'HEAD')
+        return
+
+    path = scope['path'].rstrip('/') or '/'
+    pairs = parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+    args = {}
+    for name, value in pairs:
+        args.setdefault(name, value)
+    head = method == 'HEAD'
+
+    if path in ('/', '/api', '/metrics', '/api/stream'):
+        scope['ubikais.route'] = path
+    if path in ('/', '/api'):
+        await send_response(send, 200, dumps(INDEX), head=head)
+        return
+    if path == '/metrics':
+        await send_response(send, 200, metrics_registry.render().encode('utf-8'), head=head,
+                            content_type=PROMETHEUS_CONTENT_TYPE)
+        return
+    if path == '/api/stream':
+        await serve_stream(receive, send, args, headers)
+        return
+
+    route = match_route(path)
+    if route is None:
+        await send_response(send, 404, api_body(None, args, 'error', 'Not found'), head=head)
+        return
+
+    view, path_args, cacheable, template = route
+    scope['ubikais.route'] = template
+    if cacheable:
+        status, body, response_headers = await serve_cached(path, pairs, args, headers, view, path_args)
+    else:
+        status, body = await call_view(view, args, path_args)
+        response_headers = {'Vary': 'Accept-Encoding'}
+        encoding = negotiate_compression(body, headers.get('accept-encoding'))
+        if encoding:
+            body = compress(body, encoding)
+            response_headers['Content-Encoding'] = encoding
+
+    await send_response(send, status, body, response_headers, head=head)
+
+
+async def lifespan(receive, send):
+    """워커 시작 시 DB 실행기 생성과 종료 시그널 감시, 종료 시 스트림 닫기/감시 중지 및 진행 중인 작업 대기 후 정리"""
+    global database
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            database = DatabaseExecutor(DB_PATH)
+            _watch_exit_signals()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            close_streams()
+            if broadcaster is not None:
+                await broadcaster.stop()
+            if database is not None:
+                await database.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+# ============ 계측 ============
+
+metrics_registry = MetricsRegistry()
+db.set_query_observer(record_sql)
+metrics_registry.register('ubikais_coalesced_requests_total', 'counter',
+                          'Cache-miss requests that shared an in-flight identical query',
+                          lambda: single_flight.stats['coalesced'])
+metrics_registry.register('ubikais_rate_limited_requests_total', 'counter',
+                          'Requests rejected by the per-client rate limiter (429)',
+                          lambda: rate_limiter.stats['limited'])
+
+
+async def observe_http(scope, receive, send):
+    """handle_http 계측: 경로별 지연시간, SQL 시간/행 수, 전송 바이트 (SSE 스트림 제외)"""
+    started = begin_request()
+    response = {'status': 500, 'bytes': 0}
+
+    async def observed_send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['bytes'] += len(message.get('body', b''))
+        await send(message)
+
+    try:
+        await handle_http(scope, receive, observed_send)
+    finally:
+        route = scope.get('ubikais.route', 'unmatched')
+        if route != '/api/stream':
+            metrics_registry.finish_request(route, response['status'], started, response['bytes'])
+
+
+async def app(scope, receive, send):
+    """ASGI 엔트리 포인트"""
+    if scope['type'] == 'http':
+        await observe_http(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='UBIKAIS API Server (ASGI)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=1, help='워커 프로세스 수')
+    parser.add_argument('--db', default=DB_PATH, help='SQLite DB path')
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("[ERROR] uvicorn이 필요합니다: pip install uvicorn")
+        sys.exit(1)
+
+    # 워커 프로세스가 모듈을 다시 불러올 때도 같은 DB를 쓰도록 환경변수로 전달
+    os.environ['UBIKAIS_DB_PATH'] = args.db
+
+    print("=" * 60)
+    print("UBIKAIS API Server (ASGI)")
+    print("=" * 60)
+    print(f"DB: {args.db}")
+    print(f"Workers: {args.workers}, DB threads/worker: {DB_THREADS}")
+    print(f"Server: http://{args.host}:{args.port}")
+    print("=" * 60)
+
+    uvicorn.run('ubikais_asgi:app', host=args.host, port=args.port, workers=args.workers,
+                timeout_graceful_shutdown=SHUTDOWN_TIMEOUT)
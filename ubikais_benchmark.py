@@ -0,0 +1,467 @@
+"""
+UBIKAIS API 벤치마크 - 합성 DB를 만들고 혼합 요청 프로필로 처리량/지연시간 측정
+네트워크(UBIKAIS/S3) 없이 실행되므로 성능 회귀 검사에 사용한다.
+
+대상:
+    flask   Flask 테스트 클라이언트 (WSGI 처리 비용만, 순차 실행)
+    http    Flask 앱을 로컬 HTTP 서버(werkzeug, 스레드)로 띄우고 동시 요청
+            (--url을 주면 이미 떠 있는 서버, 예: uvicorn ubikais_asgi:app)
+    lambda  lambda_handler.handler에 API Gateway 이벤트 직접 전달 (S3 확인 끔)
+
+실행:
+    python ubikais_benchmark.py                                  # 합성 DB 생성 후 전체 대상 측정
+    python ubikais_benchmark.py --targets http --concurrency 16 --requests 5000
+    python ubikais_benchmark.py --json baseline.json             # 결과 저장
+    python ubikais_benchmark.py --baseline baseline.json         # 기준 대비 회귀 시 종료 코드 1
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, quote, urlsplit
+
+DEFAULT_DB = os.path.join(tempfile.gettempdir(), 'ubikais_benchmark.db')
+
+AIRPORTS = ('RKSI', 'RKSS', 'RKPK', 'RKPC', 'RKTU', 'RKTN', 'RKJJ', 'RKJY', 'RKPU', 'RKTH',
+            'RKPS', 'RKJB', 'RKNY', 'RKNW', 'RKJK')
+AIRLINES = ('KAL', 'AAR', 'JJA', 'JNA', 'TWB', 'ABL', 'ASV', 'ESR')
+AIRCRAFT_TYPES = ('B738', 'A321', 'A333', 'B77W', 'B789', 'A220', 'B737')
+FLIGHT_STATUSES = ('SCH', 'DLA', 'BRD', 'DEP', 'ARR')
+NOTAM_PHRASES = (
+    'RWY {rwy} CLSD DUE TO WIP',
+    'TWY {twy} CLSD',
+    'ILS RWY {rwy} U/S',
+    'OBST CRANE ERECTED HGT 150FT AGL',
+    'APRON STAND {stand} CLSD FOR MAINT',
+    'PAPI RWY {rwy} U/S',
+    'BIRD ACTIVITY IN VICINITY OF AD',
+)
+
+# 크롤링 주기 (합성 crawl_timestamp 간격)
+CRAWL_INTERVAL = timedelta(minutes=10)
+# 크롤링마다 새로 나타나는(그만큼 빠지는) 비행계획/NOTAM 비율
+ROTATION = 0.05
+
+
+# ============ 합성 DB ============
+
+def _flight(index, rng):
+    airline = AIRLINES[index % len(AIRLINES)]
+    origin, destination = rng.sample(AIRPORTS, 2)
+    hour, minute = divmod((index * 7) % (24 * 60), 60)
+    return {
+        'plan_type': 'departure' if index % 2 == 0 else 'arrival',
+        'flight_number': f'{airline}{100 + index}',
+        'aircraft_type': rng.choice(AIRCRAFT_TYPES),
+        'registration': f'HL{7000 + index % 5000}',
+        'origin': origin,
+        'destination': destination,
+        'std': f'{hour:02d}:{minute:02d}',
+        'etd': f'{hour:02d}:{minute:02d}',
+        'sta': f'{(hour + 1) % 24:02d}:{minute:02d}',
+        'eta': f'{(hour + 1) % 24:02d}:{minute:02d}',
+        'status': 'SCH',
+        'nature': 'S'
+    }
+
+
+def _notam(index, rng):
+    text = rng.choice(NOTAM_PHRASES).format(
+        rwy=rng.choice(('18/36', '15L/33R', '06/24')), twy=rng.choice('ABCDGK'),
+        stand=rng.randint(1, 60))
+    return {
+        'notam_type': 'ad' if index % 3 else 'fir',
+        'notam_id': f'A{index:04d}/26',
+        'location': AIRPORTS[index % len(AIRPORTS)],
+        'qcode': 'QMRLC',
+        'start_time': '2601010000',
+        'end_time': '2612312359',
+        'message': f'{AIRPORTS[index % len(AIRPORTS)]} {text}'
+    }
+
+
+def _metar(airport, when, rng):
+    return (f'METAR {airport} {when:%d%H%M}Z {rng.randint(0, 35) * 10:03d}{rng.randint(2, 25):02d}KT '
+            f'{rng.choice(("9999", "8000", "CAVOK"))} {rng.randint(-5, 30):02d}/{rng.randint(-10, 20):02d} '
+            f'Q{rng.randint(995, 1030)}')
+
+
+def build_database(path, flights=2000, notams=500, crawls=24, seed=42):
+    """크롤러의 저장 경로(UBIKAISStore.save_results + log_crawl)로 합성 DB 생성 (selenium 불필요)
+
+    크롤링 crawls회를 흉내 내며 매번 비행계획 상태/NOTAM 일부를 바꾸고 교체해
+    파생 테이블(weather_latest, route_lookup, change_log, FTS, table_stats)까지 실제와 같게 채운다.
+    """
+    from ubikais_store import UBIKAISStore, logger as store_logger
+
+    store_logger.setLevel(logging.WARNING)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    store = UBIKAISStore(db_name=path)
+    flight_pool = [_flight(i, rng) for i in range(flights + int(flights * ROTATION) * crawls)]
+    notam_pool = [_notam(i, rng) for i in range(notams + int(notams * ROTATION) * crawls)]
+    started_at = datetime(2026, 1, 1)
+
+    for crawl in range(crawls):
+        when = started_at + CRAWL_INTERVAL * crawl
+        crawl_timestamp = when.isoformat()
+
+        offset = int(flights * ROTATION) * crawl
+        current = []
+        for item in flight_pool[offset:offset + flights]:
+            if rng.random() < 0.2:
+                item['status'] = rng.choice(FLIGHT_STATUSES)
+            current.append(item)
+        # data_type -> 크롤링 결과 (crawl_all의 작업 결과와 같은 형태)
+        results = {}
+        for plan_type in ('departure', 'arrival'):
+            results[plan_type] = [f for f in current if f['plan_type'] == plan_type]
+
+        results['metar'] = [
+            {'weather_type': 'metar', 'airport': airport, 'observation_time': f'{when:%d%H%M}Z',
+             'raw_text': _metar(airport, when, rng)} for airport in AIRPORTS
+        ]
+        if crawl % 6 == 0:
+            results['taf'] = [
+                {'weather_type': 'taf', 'airport': airport, 'observation_time': f'{when:%d%H%M}Z',
+                 'raw_text': f'TAF {airport} {when:%d%H%M}Z {when:%d%H}/{when + timedelta(hours=24):%d%H} '
+                             f'VRB05KT 9999 FEW030'} for airport in AIRPORTS
+            ]
+
+        offset = int(notams * ROTATION) * crawl
+        window = notam_pool[offset:offset + notams]
+        for notam_type in ('fir', 'ad'):
+            results[notam_type] = [n for n in window if n['notam_type'] == notam_type]
+
+        tasks = [(data_type, None, (), data_type) for data_type in results]
+        saved, type_logs = store.save_results(tasks, results, crawl_timestamp)
+        store.log_crawl(crawl_timestamp, 'all', 'SUCCESS', len(current) + len(window), saved,
+                          type_logs=type_logs)
+
+    return {
+        'flights': [f['flight_number'] for f in current],
+        'registrations': sorted({f['registration'] for f in current})
+    }
+
+
+def database_keys(path):
+    """기존 DB에서 요청 프로필용 편명/등록부호 추출 (--reuse-db)"""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            'SELECT DISTINCT flight_number, registration FROM flight_plans ORDER BY id DESC LIMIT 5000'
+        ).fetchall()
+    finally:
+        conn.close()
+    return {
+        'flights': sorted({row[0] for row in rows if row[0]}),
+        'registrations': sorted({row[1] for row in rows if row[1]})
+    }
+
+
+# ============ 요청 프로필 ============
+
+def request_profile(keys, count, seed=42):
+    """뷰어 사용 패턴을 흉내 낸 혼합 요청 경로 목록 (가중치 기반, seed로 재현 가능)"""
+    rng = random.Random(seed)
+    flights = keys['flights'] or ['KAL100']
+    registrations = keys['registrations'] or ['HL7000']
+
+    def batch(values, size):
+        return ','.join(rng.sample(values, min(size, len(values))))
+
+    templates = (
+        (30, lambda: f'/api/flights/route?callsign={rng.choice(flights)}'),
+        (10, lambda: f'/api/flights/route?reg={rng.choice(registrations)}'),
+        (5, lambda: f'/api/flights/routes?callsigns={batch(flights, 20)}'),
+        (15, lambda: f'/api/weather/metar/{rng.choice(AIRPORTS)}'),
+        (5, lambda: f'/api/weather/taf/{rng.choice(AIRPORTS)}'),
+        (5, lambda: f'/api/weather/latest?type=metar&airports={batch(list(AIRPORTS), 5)}'),
+        (5, lambda: '/api/flights?limit=100'),
+        (5, lambda: f'/api/flights/departures?airport={rng.choice(AIRPORTS)}'),
+        (5, lambda: f'/api/flights/search?flight={rng.choice(flights)[:4]}'),
+        (5, lambda: f'/api/notam/{rng.choice(AIRPORTS)}'),
+        (3, lambda: f'/api/notam/search?q={quote(rng.choice(("RWY CLSD", "ILS", "CRANE")))}'),
+        (2, lambda: '/api/status'),
+    )
+    weights = [weight for weight, _ in templates]
+    return [rng.choices(templates, weights)[0][1]() for _ in range(count)]
+
+
+def route_name(path):
+    """결과 집계용 경로 (쿼리 문자열과 경로 파라미터 제외)"""
+    path = path.split('?', 1)[0]
+    for prefix in ('/api/weather/metar/', '/api/weather/taf/', '/api/notam/', '/api/airports/'):
+        if path.startswith(prefix) and path != '/api/notam/search':
+            return prefix + '<id>'
+    return path
+
+
+# ============ 실행기 ============
+
+class Recorder:
+    """요청별 지연시간/상태 기록 (스레드 안전)"""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def add(self, path, status, seconds):
+        with self._lock:
+            self.samples.append((route_name(path), status, seconds))
+
+
+def run_flask(paths, warmup, no_cache):
+    import ubikais_api_server as server
+
+    server.rate_limiter.rate = 0
+    if no_cache:
+        server.response_cache.max_entries = 0
+    client = server.app.test_client()
+    headers = {'Accept-Encoding': 'gzip'}
+
+    for path in warmup:
+        client.get(path, headers=headers)
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    for path in paths:
+        t0 = time.perf_counter()
+        status = client.get(path, headers=headers).status_code
+        recorder.add(path, status, time.perf_counter() - t0)
+    return recorder, time.perf_counter() - started
+
+
+def run_http(paths, warmup, concurrency, url=None, no_cache=False):
+    httpd = None
+    if url is None:
+        from werkzeug.serving import make_server
+        import ubikais_api_server as server
+
+        server.rate_limiter.rate = 0
+        if no_cache:
+            server.response_cache.max_entries = 0
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)  # 요청별 접근 로그 끔
+        httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{httpd.server_port}'
+
+    target = urlsplit(url)
+    recorder = Recorder()
+    cursor = {'next': 0}
+    cursor_lock = threading.Lock()
+
+    def fetch(path):
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        try:
+            conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            return 0
+        finally:
+            conn.close()
+
+    def worker():
+        while True:
+            with cursor_lock:
+                index = cursor['next']
+                cursor['next'] += 1
+            if index >= len(paths):
+                return
+            t0 = time.perf_counter()
+            status = fetch(paths[index])
+            recorder.add(paths[index], status, time.perf_counter() - t0)
+
+    try:
+        for path in warmup:
+            fetch(path)
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return recorder, time.perf_counter() - started
+    finally:
+        if httpd is not None:
+            httpd.shutdown()
+
+
+def run_lambda(paths, warmup, db_path):
+    import lambda_handler
+
+    # S3 확인 없이 합성 DB 사용, 요청별 계측 로그 끔
+    lambda_handler.DB_PATH = db_path
+    lambda_handler.S3_DB_CHECK_INTERVAL = float('inf')
+    lambda_handler._last_check = time.monotonic()
+    lambda_handler.METRICS_LOG = False
+
+    def event(path):
+        route, _, query = path.partition('?')
+        params = dict(parse_qsl(query)) if query else None
+        return {'httpMethod': 'GET', 'path': route, 'queryStringParameters': params,
+                'headers': {'Accept-Encoding': 'gzip'}}
+
+    for path in warmup:
+        lambda_handler.handler(event(path), None)
+
+    events = [(path, event(path)) for path in paths]
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    for path, e in events:
+        t0 = time.perf_counter()
+        status = lambda_handler.handler(e, None)['statusCode']
+        recorder.add(path, status, time.perf_counter() - t0)
+    return recorder, time.perf_counter() - started
+
+
+# ============ 결과 ============
+
+def percentiles(values):
+    """p50/p95/p99 (ms)"""
+    if len(values) < 2:
+        value = values[0] * 1000 if values else 0.0
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50': cuts[49] * 1000, 'p95': cuts[94] * 1000, 'p99': cuts[98] * 1000}
+
+
+def summarize(recorder, elapsed):
+    samples = recorder.samples
+    errors = sum(1 for _, status, _ in samples if not 200 <= status < 400)
+    by_route = {}
+    for route, _, seconds in samples:
+        by_route.setdefault(route, []).append(seconds)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        **{k: round(v, 3) for k, v in percentiles([s for _, _, s in samples]).items()},
+        'routes': {
+            route: {'requests': len(values), **{k: round(v, 3) for k, v in percentiles(values).items()}}
+            for route, values in sorted(by_route.items())
+        }
+    }
+
+
+def print_summary(target, result, by_route=False):
+    print(f"\n[{target}] {result['requests']} requests in {result['seconds']}s "
+          f"-> {result['rps']} req/s, errors {result['errors']}")
+    print(f"  p50 {result['p50']:.3f} ms | p95 {result['p95']:.3f} ms | p99 {result['p99']:.3f} ms")
+    if by_route:
+        for route, stats in result['routes'].items():
+            print(f"    {route:<32} n={stats['requests']:<6} p50 {stats['p50']:.3f} ms  "
+                  f"p95 {stats['p95']:.3f} ms  p99 {stats['p99']:.3f} ms")
+
+
+def check_regressions(results, baseline, tolerance):
+    """기준 결과 대비 p95 증가/처리량 감소가 tolerance 비율을 넘으면 목록으로 반환"""
+    failures = []
+    for target, result in results.items():
+        base = baseline.get('targets', {}).get(target)
+        if not base:
+            continue
+        if base['p95'] and result['p95'] > base['p95'] * (1 + tolerance):
+            failures.append(f"{target}: p95 {result['p95']:.3f} ms > baseline {base['p95']:.3f} ms")
+        if base['rps'] and result['rps'] < base['rps'] * (1 - tolerance):
+            failures.append(f"{target}: {result['rps']} req/s < baseline {base['rps']} req/s")
+        if result['errors'] > base.get('errors', 0):
+            failures.append(f"{target}: errors {result['errors']} > baseline {base.get('errors', 0)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='UBIKAIS API benchmark (offline, synthetic DB)')
+    parser.add_argument('--db', default=DEFAULT_DB, help='합성 DB 경로')
+    parser.add_argument('--reuse-db', action='store_true', help='DB가 있으면 다시 만들지 않음')
+    parser.add_argument('--flights', type=int, default=2000, help='크롤링당 비행계획 수')
+    parser.add_argument('--notams', type=int, default=500, help='크롤링당 NOTAM 수')
+    parser.add_argument('--crawls', type=int, default=24, help='흉내 낼 크롤링 횟수 (METAR/TAF 이력 길이)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--targets', default='flask,http,lambda', help='쉼표 구분: flask, http, lambda')
+    parser.add_argument('--requests', type=int, default=2000, help='대상별 측정 요청 수')
+    parser.add_argument('--warmup', type=int, default=100, help='측정 전 워밍업 요청 수')
+    parser.add_argument('--concurrency', type=int, default=8, help='http 대상 동시 요청 수')
+    parser.add_argument('--url', help='http 대상으로 이미 떠 있는 서버 사용 (예: http://127.0.0.1:5000)')
+    parser.add_argument('--no-cache', action='store_true', help='Flask 응답 캐시 끔 (DB 경로 측정)')
+    parser.add_argument('--by-route', action='store_true', help='경로별 지연시간 출력')
+    parser.add_argument('--json', help='결과를 JSON 파일로 저장 (--baseline 기준 파일로 사용)')
+    parser.add_argument('--baseline', help='기준 결과 JSON (회귀 시 종료 코드 1)')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='허용 회귀 비율 (p95 증가/처리량 감소, 기본 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(',') if t.strip()]
+    unknown = set(targets) - {'flask', 'http', 'lambda'}
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    if args.reuse_db and os.path.exists(args.db):
+        print(f"[INFO] 기존 DB 사용: {args.db}")
+        keys = database_keys(args.db)
+    else:
+        print(f"[INFO] 합성 DB 생성: {args.db} (flights={args.flights}, notams={args.notams}, "
+              f"crawls={args.crawls})")
+        t0 = time.perf_counter()
+        keys = build_database(args.db, args.flights, args.notams, args.crawls, args.seed)
+        print(f"[OK] 합성 DB 생성 완료 ({time.perf_counter() - t0:.1f}s, "
+              f"{os.path.getsize(args.db) / 1e6:.1f} MB)")
+
+    # 서버 모듈은 import 시점의 환경변수로 DB 경로를 정한다
+    os.environ['UBIKAIS_DB_PATH'] = args.db
+    paths = request_profile(keys, args.requests + args.warmup, args.seed)
+    warmup, measured = paths[:args.warmup], paths[args.warmup:]
+    runs = {
+        'flask': lambda: run_flask(measured, warmup, args.no_cache),
+        'http': lambda: run_http(measured, warmup, args.concurrency, args.url, args.no_cache),
+        'lambda': lambda: run_lambda(measured, warmup, args.db)
+    }
+
+    results = {}
+    for target in targets:
+        recorder, elapsed = runs[target]()
+        results[target] = summarize(recorder, elapsed)
+        print_summary(target, results[target], args.by_route)
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'config': {k: getattr(args, k) for k in ('flights', 'notams', 'crawls', 'seed', 'requests',
+                                                  'concurrency', 'no_cache')},
+        'targets': results
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[OK] 결과 저장: {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            failures = check_regressions(results, json.load(f), args.max_regression)
+        if failures:
+            print("\n[FAIL] 성능 회귀:")
+            for failure in failures:
+                print(f"  - {failure}")
+            return 1
+        print(f"\n[OK] 기준 대비 회귀 없음 (허용 {args.max_regression:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
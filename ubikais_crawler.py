@@ -17,6 +17,8 @@ import logging
 import sys
 import os
 
+from ubikais_session import clear_session, is_login_page, load_session, restore_session, save_session
+
 # Windows 한국어 환경 인코딩 설정
 if sys.platform == 'win32':
     try:
@@ -41,6 +43,7 @@ logger = logging.getLogger(__name__)
 
 class UBIKAISCrawler:
     def __init__(self, db_name='ubikais_schedule.db', headless=True):
+        self.base_url = 'https://ubikais.fois.go.kr:8030'
         self.login_url = 'https://ubikais.fois.go.kr:8030/common/login?systemId=sysUbikais'
         self.dep_url = 'https://ubikais.fois.go.kr:8030/sysUbikais/biz/fpl/dep'
         self.arr_url = 'https://ubikais.fois.go.kr:8030/sysUbikais/biz/fpl/arr'
@@ -167,6 +170,21 @@ class UBIKAISCrawler:
             logger.error(f"[ERROR] 로그인 오류: {e}")
             return False
 
+    def ensure_login(self, driver):
+        """저장된 로그인 세션 재사용 (서버가 거부하면 로그인 후 세션 저장)"""
+        cookies = load_session(self.username)
+        if cookies:
+            if restore_session(driver, self.base_url, cookies):
+                logger.info("[OK] 저장된 로그인 세션 재사용")
+                return True
+            logger.info("[INFO] 저장된 로그인 세션 만료, 다시 로그인")
+            clear_session()
+
+        if not self.login(driver):
+            return False
+        save_session(self.username, driver.get_cookies())
+        return True
+
     def extract_table_data(self, driver, schedule_type='departure'):
         """테이블에서 스케줄 데이터 추출"""
         schedules = []
@@ -387,8 +405,8 @@ class UBIKAISCrawler:
 
             driver = self.init_driver()
 
-            # 로그인
-            if not self.login(driver):
+            # 로그인 (저장된 세션이 유효하면 재사용)
+            if not self.ensure_login(driver):
                 raise Exception("로그인 실패")
 
             # 출발 스케줄 크롤링
@@ -401,6 +419,10 @@ class UBIKAISCrawler:
             all_schedules.extend(arrivals)
             logger.info(f"[INFO] 도착 스케줄: {len(arrivals)}개")
 
+            # 세션 사용 시각 갱신
+            if not is_login_page(driver.current_url):
+                save_session(self.username, driver.get_cookies())
+
             # DB 저장
             saved_count = self.save_to_database(all_schedules, crawl_timestamp)
             logger.info(f"[INFO] DB 저장 완료: {saved_count}개")
@@ -0,0 +1,996 @@
+"""
+UBIKAIS DB 공용 모듈
+크롤러(ubikais_full_crawler.py), API 서버(ubikais_api_server.py), Lambda(lambda_handler.py)가
+함께 사용하는 정규화/쿼리 헬퍼, 커넥션 풀, 조회 계층 (표준 라이브러리만 사용)
+"""
+
+import base64
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+# ICAO 공항/위치 코드 (4자리 영문)
+_ICAO_PATTERN = re.compile(r'\b([A-Z]{4})\b')
+_NON_IDENT_CHARS = re.compile(r'[^A-Z0-9]')
+_FTS_TERM = re.compile(r'[^\s"]+')
+
+# 검색 모드: 정규화 컬럼 일치/접두어 일치, 원본 컬럼 부분 문자열(opt-in)
+MATCH_MODES = ('exact', 'prefix', 'contains')
+
+# 읽기 전용 커넥션 풀 설정 (API 서버)
+DB_POOL_SIZE = int(os.environ.get('UBIKAIS_DB_POOL_SIZE', 8))
+DB_POOL_TIMEOUT = float(os.environ.get('UBIKAIS_DB_POOL_TIMEOUT', 5))
+DB_MMAP_SIZE = int(os.environ.get('UBIKAIS_DB_MMAP_SIZE', 256 * 1024 * 1024))
+DB_CACHE_SIZE_KB = int(os.environ.get('UBIKAIS_DB_CACHE_SIZE_KB', 16 * 1024))
+
+# 목록 API 한 페이지 최대 행 수 (더 받으려면 next_cursor로 이어서 조회)
+MAX_PAGE_SIZE = 1000
+
+# 일괄 조회 API 한 요청의 최대 키 수 (편명/등록부호/공항 코드)
+BATCH_MAX_KEYS = int(os.environ.get('UBIKAIS_BATCH_MAX_KEYS', 300))
+
+
+def normalize_ident(value):
+    """편명/등록부호 정규화 (대문자, 영숫자만: 'kal 123' -> 'KAL123', 'HL-8001' -> 'HL8001')"""
+    if value is None:
+        return None
+    normalized = _NON_IDENT_CHARS.sub('', str(value).upper())
+    return normalized or None
+
+
+def normalize_icao(value):
+    """공항/위치 값에서 ICAO 코드 추출 ('RKPU(울산)' -> 'RKPU', 없으면 None)"""
+    if value is None:
+        return None
+    match = _ICAO_PATTERN.search(str(value).upper())
+    return match.group(1) if match else None
+
+
+def match_clause(norm_column, raw_column, value, mode='exact'):
+    """검색 조건 SQL 조각과 파라미터 생성
+
+    exact/prefix는 정규화 컬럼(대문자 영숫자)에 = / GLOB 'X*'로 인덱스를 타고,
+    contains는 원본 컬럼에 대한 기존 LIKE '%X%' 검색이다. 알 수 없는 모드는 exact로 처리한다.
+    """
+    if mode == 'contains':
+        return f"UPPER({raw_column}) LIKE ?", f"%{str(value).strip().upper()}%"
+
+    normalized = normalize_ident(value) or ''
+    if mode == 'prefix':
+        # 정규화 값은 영숫자뿐이라 GLOB 메타문자 이스케이프가 필요 없다
+        return f"{norm_column} GLOB ?", f"{normalized}*"
+    return f"{norm_column} = ?", normalized
+
+
+def fts_query(text, max_terms=16):
+    """사용자 검색어를 FTS5 MATCH 식으로 변환
+
+    각 단어를 따옴표로 감싼 접두어 검색("RWY"* "CLSD"*)으로 만들어 FTS 문법 오류를 막는다.
+    검색어가 비어 있으면 None.
+    """
+    terms = _FTS_TERM.findall(text or '')[:max_terms]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def get_crawl_generation(conn):
+    """크롤링 세대 식별자 ('세대 번호:crawl_timestamp', 크롤링 기록이 없으면 '0')
+
+    크롤러는 한 번의 크롤링에서 모든 데이터 종류를 저장한 뒤 로그를 기록하면서, 실제로 바뀐 행이
+    있었을 때만 table_stats의 세대 행(번호 + 바뀐 크롤링 시각)을 올린다. 바뀐 것이 없는 크롤링은
+    세대를 그대로 두므로 응답 캐시/ETag가 유지된다. 세대 행이 없는 이전 DB에서는
+    마지막 crawl_logs 'id:crawl_timestamp'를 쓴다 (MAX(id)는 rowid 조회라 테이블 크기와 무관).
+    """
+    try:
+        row = conn.execute(
+            'SELECT row_count, last_crawl FROM table_stats WHERE table_name = ?', (GENERATION_STATS_KEY,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    if row:
+        return f"{row[0]}:{row[1]}"
+
+    row = conn.execute('''
+        SELECT id, crawl_timestamp FROM crawl_logs
+        WHERE id = (SELECT MAX(id) FROM crawl_logs)
+    ''').fetchone()
+    return f"{row[0]}:{row[1]}" if row else '0'
+
+
+def generation_timestamp(generation):
+    """크롤링 세대 식별자에서 crawl_timestamp 부분 추출 (없으면 None)"""
+    if not generation or ':' not in generation:
+        return None
+    return generation.split(':', 1)[1] or None
+
+
+def _encode_token(value):
+    raw = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_token(token):
+    return json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+
+
+def encode_cursor(created_at, row_id):
+    """keyset 페이지 커서 생성 (마지막 행의 created_at, id -> 불투명 토큰)"""
+    return _encode_token([created_at, row_id])
+
+
+def decode_cursor(token):
+    """커서 토큰 -> (created_at, id), 형식이 잘못되면 ValueError"""
+    try:
+        created_at, row_id = _decode_token(token)
+    except (TypeError, ValueError):
+        raise ValueError('invalid cursor')
+    if not isinstance(created_at, str) or not isinstance(row_id, int):
+        raise ValueError('invalid cursor')
+    return created_at, row_id
+
+
+class ConnectionPool:
+    """읽기 전용 SQLite 커넥션 풀
+
+    워커 프로세스마다 하나씩 만들어 모든 요청/스레드가 공유한다.
+    커넥션은 mode=ro URI로 열리므로 크롤러의 쓰기와 충돌하지 않으며,
+    크롤러 DB가 WAL 모드이면 크롤링 중에도 마지막 커밋 스냅샷을 읽는다.
+    """
+
+    def __init__(self, db_path, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, trace_callback=None):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.trace_callback = trace_callback
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        # 유휴 커넥션을 기다리는 요청 수 (폐기 시 깨울 대상)
+        self._waiting = 0
+        self.stats = {
+            'checkouts': 0,
+            'returns': 0,
+            'discarded': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'hold_time': 0.0,
+            'max_in_use': 0
+        }
+
+    def _connect(self):
+        """읽기 전용 커넥션 생성 및 PRAGMA 튜닝"""
+        uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f'PRAGMA mmap_size = {DB_MMAP_SIZE}')
+        conn.execute(f'PRAGMA cache_size = -{DB_CACHE_SIZE_KB}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        conn.execute('PRAGMA query_only = ON')
+        if self.trace_callback:
+            conn.set_trace_callback(self.trace_callback)
+        return conn
+
+    def acquire(self):
+        """커넥션 체크아웃 (유휴 커넥션 재사용, 부족하면 생성 또는 대기)"""
+        wait_start = None
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+            if conn is not None:
+                break
+
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+
+            if can_create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+                break
+
+            # 반환된 커넥션이나 폐기 알림(None: 자리가 비었으니 새로 생성)을 기다림
+            if wait_start is None:
+                wait_start = time.perf_counter()
+            remaining = self.timeout - (time.perf_counter() - wait_start)
+            with self._lock:
+                self._waiting += 1
+            try:
+                conn = self._idle.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                self._record_wait(wait_start)
+                raise RuntimeError(f'DB connection pool exhausted ({self.size})')
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+            if conn is not None:
+                break
+
+        if wait_start is not None:
+            self._record_wait(wait_start)
+        with self._lock:
+            self._in_use += 1
+            self.stats['checkouts'] += 1
+            self.stats['max_in_use'] = max(self.stats['max_in_use'], self._in_use)
+        return conn
+
+    def _record_wait(self, wait_start):
+        with self._lock:
+            self.stats['waits'] += 1
+            self.stats['wait_time'] += time.perf_counter() - wait_start
+
+    def release(self, conn, discard=False):
+        """커넥션 반환 (SQLite 오류가 난 커넥션은 폐기하고 대기 중인 요청을 깨워 새로 만들게 함)"""
+        with self._lock:
+            self._in_use -= 1
+            if discard:
+                self._created -= 1
+                self.stats['discarded'] += 1
+                wake = self._waiting > 0
+            else:
+                self.stats['returns'] += 1
+
+        if discard:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            if wake:
+                self._idle.put(None)
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """with 블록 동안 커넥션을 빌려 쓰고 반환"""
+        conn = self.acquire()
+        checkout_time = time.perf_counter()
+        discard = False
+        try:
+            yield conn
+        except sqlite3.Error:
+            # DB 오류만 커넥션 문제로 본다 (잘못된 커서 등 요청 오류는 커넥션을 그대로 반환)
+            discard = True
+            raise
+        finally:
+            with self._lock:
+                self.stats['hold_time'] += time.perf_counter() - checkout_time
+            self.release(conn, discard=discard)
+
+    def close(self):
+        """유휴 커넥션 모두 닫기 (서버 종료 시, 대여 중인 커넥션은 반환 시 그대로 남는다)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if conn is None:
+                continue
+            with self._lock:
+                self._created -= 1
+            conn.close()
+
+    def snapshot(self):
+        """풀 상태 및 계측값"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._created,
+                'idle': self._idle.qsize(),
+                'in_use': self._in_use,
+                **{k: round(v, 6) if isinstance(v, float) else v for k, v in self.stats.items()}
+            }
+
+
+# SQL 계측 콜백 callback(seconds, rows) (ubikais_metrics.record_sql, 없으면 계측 안 함)
+_query_observer = None
+
+
+def set_query_observer(callback):
+    """조회 함수들의 SQL 실행 시간/행 수를 받을 콜백 등록 (None이면 해제)"""
+    global _query_observer
+    _query_observer = callback
+
+
+class _ObservedCursor:
+    """execute부터 fetchone/fetchall까지의 시간과 행 수를 관찰자에게 보고하는 커서"""
+
+    def __init__(self, cursor, observer, started):
+        self._cursor = cursor
+        self._observer = observer
+        self._started = started
+
+    def _report(self, rows):
+        self._observer(time.perf_counter() - self._started, rows)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._report(0 if row is None else 1)
+        return row
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._report(len(rows))
+        return rows
+
+
+def _execute(conn, query, params=()):
+    """row_factory 없이(튜플 행) 실행하는 커서
+
+    sqlite3 모듈은 SQL 문자열별로 준비된 문장을 커넥션에 캐시하므로, 아래 조회 함수들은
+    같은 필터 조합이면 항상 같은 SQL 문자열을 만든다.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    observer = _query_observer
+    if observer is None:
+        return cursor.execute(query, params)
+    started = time.perf_counter()
+    cursor.execute(query, params)
+    return _ObservedCursor(cursor, observer, started)
+
+
+def _records(columns, rows):
+    """튜플 행 -> dict 목록 (미리 정한 컬럼 튜플로 변환, 행마다 keys() 조회 없음)"""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _clamp_limit(limit):
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def fetch_page(conn, columns, query, params, cursor=None, limit=100):
+    """created_at, id 내림차순 keyset 페이지 조회 -> (records, next_cursor)
+
+    query는 WHERE 절까지 작성된 SELECT(columns 순서, created_at과 id 포함)이며, 여기서 커서 조건과
+    ORDER BY/LIMIT를 붙인다. OFFSET 없이 (created_at, id) < 커서로 이어 읽으므로
+    페이지 위치와 무관하게 인덱스 범위 검색 한 번에 끝난다. 마지막 페이지면 next_cursor는 None.
+    """
+    limit = _clamp_limit(limit)
+    params = list(params)
+    if cursor:
+        query += " AND (created_at, id) < (?, ?)"
+        params.extend(decode_cursor(cursor))
+
+    # 다음 페이지 존재 여부를 알기 위해 한 행 더 읽는다
+    query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+    records = _records(columns, _execute(conn, query, params).fetchall())
+
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_cursor(records[-1]['created_at'], records[-1]['id'])
+    return records, next_cursor
+
+
+# ============ 조회 (API 서버/Lambda 공용) ============
+# SELECT * 대신 컬럼을 명시한다. *_norm 검색용 컬럼은 응답에 포함하지 않는다.
+
+FLIGHT_COLUMNS = (
+    'id', 'crawl_timestamp', 'plan_type', 'flight_number', 'aircraft_type', 'registration',
+    'origin', 'destination', 'std', 'etd', 'atd', 'sta', 'eta', 'ata', 'status', 'nature',
+    'route', 'remarks', 'origin_icao', 'destination_icao', 'created_at'
+)
+WEATHER_COLUMNS = (
+    'id', 'crawl_timestamp', 'weather_type', 'airport', 'observation_time', 'raw_text',
+    'visibility', 'wind_speed', 'wind_direction', 'temperature', 'dewpoint', 'pressure',
+    'weather_phenomena', 'clouds', 'airport_icao', 'created_at'
+)
+NOTAM_COLUMNS = (
+    'id', 'crawl_timestamp', 'notam_type', 'notam_id', 'location', 'fir', 'qcode',
+    'start_time', 'end_time', 'message', 'location_icao', 'created_at'
+)
+ATFM_COLUMNS = (
+    'id', 'crawl_timestamp', 'message_type', 'airport', 'effective_time', 'end_time',
+    'reason', 'capacity', 'message', 'airport_icao', 'created_at'
+)
+AIRPORT_INFO_COLUMNS = (
+    'id', 'crawl_timestamp', 'icao_code', 'iata_code', 'name_ko', 'name_en', 'latitude',
+    'longitude', 'elevation', 'runway_info', 'operating_hours', 'contact', 'created_at'
+)
+NOTAM_SEARCH_COLUMNS = NOTAM_COLUMNS + ('rank', 'snippet')
+# route_lookup 값 컬럼 (키는 key_type, lookup_key)
+ROUTE_LOOKUP_COLUMNS = (
+    'flight_id', 'flight_number', 'aircraft_type', 'registration', 'origin', 'destination',
+    'std', 'etd', 'atd', 'sta', 'eta', 'status'
+)
+
+SELECT_FLIGHTS = f"SELECT {', '.join(FLIGHT_COLUMNS)} FROM flight_plans"
+SELECT_WEATHER = f"SELECT {', '.join(WEATHER_COLUMNS)} FROM weather"
+SELECT_WEATHER_LATEST = f"SELECT {', '.join(WEATHER_COLUMNS)} FROM weather_latest"
+SELECT_NOTAMS = f"SELECT {', '.join(NOTAM_COLUMNS)} FROM notams"
+SELECT_ATFM = f"SELECT {', '.join(ATFM_COLUMNS)} FROM atfm_messages"
+SELECT_AIRPORT_INFO = f"SELECT {', '.join(AIRPORT_INFO_COLUMNS)} FROM airport_info"
+
+# 가중치: notam_id, location, qcode, message
+SELECT_NOTAM_SEARCH = f'''
+    SELECT {', '.join('notams.' + column for column in NOTAM_COLUMNS)},
+           bm25(notams_fts, 10.0, 5.0, 2.0, 1.0) AS rank,
+           snippet(notams_fts, 3, '[', ']', '...', 16) AS snippet
+    FROM notams_fts
+    JOIN notams ON notams.id = notams_fts.rowid
+    WHERE notams_fts MATCH ?
+'''
+
+STATUS_TABLES = ('flight_plans', 'weather', 'notams', 'atfm_messages')
+# 크롤러가 table_stats에 행 수를 유지하는 테이블 (crawl_logs는 마지막 크롤링 시각용)
+STATS_TABLES = STATUS_TABLES + ('crawl_logs',)
+# table_stats의 크롤링 세대 행 이름 (테이블이 아님, get_crawl_generation 참고)
+GENERATION_STATS_KEY = 'crawl_generation'
+
+KOREAN_AIRPORTS = (
+    {'icao': 'RKSI', 'iata': 'ICN', 'name': 'Incheon International', 'name_ko': '인천국제공항'},
+    {'icao': 'RKSS', 'iata': 'GMP', 'name': 'Gimpo International', 'name_ko': '김포국제공항'},
+    {'icao': 'RKPK', 'iata': 'PUS', 'name': 'Gimhae International', 'name_ko': '김해국제공항'},
+    {'icao': 'RKPC', 'iata': 'CJU', 'name': 'Jeju International', 'name_ko': '제주국제공항'},
+    {'icao': 'RKTU', 'iata': 'CJJ', 'name': 'Cheongju International', 'name_ko': '청주국제공항'},
+    {'icao': 'RKTN', 'iata': 'TAE', 'name': 'Daegu International', 'name_ko': '대구국제공항'},
+    {'icao': 'RKJJ', 'iata': 'KWJ', 'name': 'Gwangju', 'name_ko': '광주공항'},
+    {'icao': 'RKJY', 'iata': 'RSU', 'name': 'Yeosu', 'name_ko': '여수공항'},
+    {'icao': 'RKPU', 'iata': 'USN', 'name': 'Ulsan', 'name_ko': '울산공항'},
+    {'icao': 'RKTH', 'iata': 'KPO', 'name': 'Pohang', 'name_ko': '포항공항'},
+    {'icao': 'RKPS', 'iata': 'HIN', 'name': 'Sacheon', 'name_ko': '사천공항'},
+    {'icao': 'RKJB', 'iata': 'MWX', 'name': 'Muan International', 'name_ko': '무안국제공항'},
+    {'icao': 'RKNY', 'iata': 'YNY', 'name': 'Yangyang International', 'name_ko': '양양국제공항'},
+    {'icao': 'RKNW', 'iata': 'WJU', 'name': 'Wonju', 'name_ko': '원주공항'},
+    {'icao': 'RKJK', 'iata': 'KUV', 'name': 'Gunsan', 'name_ko': '군산공항'}
+)
+
+# airport_info 테이블에 없을 때 쓰는 기본 정보
+DEFAULT_AIRPORT_INFO = {
+    'RKPU': {'icao': 'RKPU', 'iata': 'USN', 'name': 'Ulsan Airport', 'name_ko': '울산공항',
+             'lat': 35.5936, 'lon': 129.3519, 'elevation': 45}
+}
+
+
+def list_flights(conn, plan_type=None, origin=None, destination=None, match='exact',
+                 cursor=None, limit=100):
+    """전체 비행계획 (keyset 페이지)"""
+    query = f"{SELECT_FLIGHTS} WHERE 1=1"
+    params = []
+
+    if plan_type:
+        query += " AND plan_type = ?"
+        params.append(plan_type)
+    if origin:
+        clause, param = match_clause('origin_icao', 'origin', origin, match)
+        query += f" AND {clause}"
+        params.append(param)
+    if destination:
+        clause, param = match_clause('destination_icao', 'destination', destination, match)
+        query += f" AND {clause}"
+        params.append(param)
+
+    flights, next_cursor = fetch_page(conn, FLIGHT_COLUMNS, query, params, cursor, limit)
+    return {'count': len(flights), 'flights': flights, 'next_cursor': next_cursor}
+
+
+def list_departures(conn, airport=None, match='exact', limit=100):
+    """출발 비행계획 (std 내림차순)"""
+    query = f"{SELECT_FLIGHTS} WHERE plan_type = 'departure'"
+    params = []
+
+    if airport:
+        clause, param = match_clause('origin_icao', 'origin', airport, match)
+        query += f" AND {clause}"
+        params.append(param)
+
+    query += " ORDER BY std DESC LIMIT ?"
+    params.append(_clamp_limit(limit))
+
+    flights = _records(FLIGHT_COLUMNS, _execute(conn, query, params).fetchall())
+    return {'count': len(flights), 'departures': flights}
+
+
+def list_arrivals(conn, airport=None, match='exact', limit=100):
+    """도착 비행계획 (sta 내림차순)"""
+    query = f"{SELECT_FLIGHTS} WHERE plan_type = 'arrival'"
+    params = []
+
+    if airport:
+        clause, param = match_clause('destination_icao', 'destination', airport, match)
+        query += f" AND {clause}"
+        params.append(param)
+
+    query += " ORDER BY sta DESC LIMIT ?"
+    params.append(_clamp_limit(limit))
+
+    flights = _records(FLIGHT_COLUMNS, _execute(conn, query, params).fetchall())
+    return {'count': len(flights), 'arrivals': flights}
+
+
+def search_flights(conn, flight_number, match='prefix', limit=10):
+    """편명 검색 (정규화 편명 접두어 일치가 기본)"""
+    clause, param = match_clause('flight_number_norm', 'flight_number', flight_number, match)
+    rows = _execute(conn, f'''
+        {SELECT_FLIGHTS}
+        WHERE {clause}
+        ORDER BY created_at DESC
+        LIMIT ?
+    ''', (param, _clamp_limit(limit))).fetchall()
+
+    flights = _records(FLIGHT_COLUMNS, rows)
+    return {'found': bool(flights), 'count': len(flights), 'flights': flights}
+
+
+def parse_keys(value, normalizer=normalize_ident):
+    """쉼표 구분 키 목록 -> 정규화/중복 제거 리스트 (BATCH_MAX_KEYS 초과 시 ValueError)"""
+    keys = []
+    for item in (value or '').split(','):
+        key = normalizer(item)
+        if key and key not in keys:
+            keys.append(key)
+    if len(keys) > BATCH_MAX_KEYS:
+        raise ValueError(f'too many keys (max {BATCH_MAX_KEYS})')
+    return keys
+
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+
+def _route_record(flight):
+    """비행계획 행 -> RKPU Viewer 경로 응답"""
+    return {
+        'source': 'ubikais',
+        'callsign': flight['flight_number'],
+        'origin': {'icao': flight['origin']},
+        'destination': {'icao': flight['destination']},
+        'aircraft': {
+            'type': flight['aircraft_type'],
+            'registration': flight['registration']
+        },
+        'schedule': {
+            'std': flight['std'],
+            'etd': flight['etd'],
+            'atd': flight['atd'],
+            'sta': flight['sta'],
+            'eta': flight['eta']
+        },
+        'status': flight['status']
+    }
+
+
+class RouteIndex:
+    """route_lookup 테이블의 메모리 사본 ((키 종류, 정규화 키) -> 경로 응답 dict)
+
+    크롤링 세대가 바뀔 때만 테이블 전체를 다시 읽으므로 exact 경로 조회는 dict 조회로 끝난다.
+    크롤러가 아직 route_lookup을 만들지 않은 DB면 None을 돌려주고 호출 측은 SQL 조회로 처리한다.
+    """
+
+    def __init__(self):
+        self.generation = None
+        self.routes = None
+        self.loads = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def get(self, conn, generation=None):
+        """현재 세대의 경로 사본 (세대를 모르면 conn에서 확인)"""
+        if generation is None:
+            generation = get_crawl_generation(conn)
+        if self._loaded and self.generation == generation:
+            return self.routes
+
+        with self._lock:
+            if not self._loaded or self.generation != generation:
+                try:
+                    rows = _execute(conn, f'''
+                        SELECT key_type, lookup_key, {', '.join(ROUTE_LOOKUP_COLUMNS)} FROM route_lookup
+                    ''').fetchall()
+                    self.routes = {(row[0], row[1]): _route_record(dict(zip(ROUTE_LOOKUP_COLUMNS, row[2:])))
+                                   for row in rows}
+                except sqlite3.OperationalError:
+                    self.routes = None
+                self.generation = generation
+                self._loaded = True
+                self.loads += 1
+        return self.routes
+
+    def snapshot(self):
+        return {
+            'generation': self.generation,
+            'entries': len(self.routes) if self.routes is not None else None,
+            'loads': self.loads
+        }
+
+
+NO_ROUTE = {'source': None, 'origin': None, 'destination': None}
+
+
+def find_flight_route(conn, callsign=None, reg=None, match='exact', route_index=None, generation=None):
+    """편명(없으면 등록부호)으로 찾은 최신 비행계획의 출발/도착 정보 (RKPU Viewer용)
+
+    exact 조회는 route_index(메모리 사본)가 있으면 그것으로, 나머지는 flight_plans 조회로 처리한다.
+    """
+    routes = route_index.get(conn, generation) if route_index and match == 'exact' else None
+    if routes is not None:
+        route = routes.get(('callsign', normalize_ident(callsign))) if callsign else None
+        if route is None and reg:
+            route = routes.get(('registration', normalize_ident(reg)))
+        return route or NO_ROUTE
+
+    row = None
+
+    if callsign:
+        clause, param = match_clause('flight_number_norm', 'flight_number', callsign, match)
+        row = _execute(conn, f'''
+            {SELECT_FLIGHTS}
+            WHERE {clause}
+            ORDER BY created_at DESC
+            LIMIT 1
+        ''', (param,)).fetchone()
+
+    if row is None and reg:
+        row = _execute(conn, f'''
+            {SELECT_FLIGHTS}
+            WHERE registration_norm = ?
+            ORDER BY created_at DESC
+            LIMIT 1
+        ''', (normalize_ident(reg),)).fetchone()
+
+    if row is None:
+        return NO_ROUTE
+    return _route_record(dict(zip(FLIGHT_COLUMNS, row)))
+
+
+def _latest_flights_by(conn, norm_column, keys):
+    """정규화 컬럼 값별 최신 비행계획 -> {키: 행} (IN 목록 + ROW_NUMBER 한 번의 쿼리)"""
+    if not keys:
+        return {}
+    columns = ', '.join(FLIGHT_COLUMNS)
+    rows = _execute(conn, f'''
+        SELECT {columns}, {norm_column} FROM (
+            SELECT {columns}, {norm_column},
+                   ROW_NUMBER() OVER (PARTITION BY {norm_column}
+                                      ORDER BY created_at DESC, id DESC) AS row_rank
+            FROM flight_plans
+            WHERE {norm_column} IN ({_placeholders(keys)})
+        ) WHERE row_rank = 1
+    ''', keys).fetchall()
+    return {row[-1]: dict(zip(FLIGHT_COLUMNS, row)) for row in rows}
+
+
+def find_flight_routes(conn, callsigns=None, regs=None, route_index=None, generation=None):
+    """여러 편명/등록부호의 경로 일괄 조회 (정규화 값 exact 일치)
+
+    route_index가 있으면 메모리 사본에서, 없으면 편명과 등록부호를 각각 한 번의 쿼리로 찾는다.
+    결과는 정규화된 키별로 돌려준다.
+    """
+    callsigns = parse_keys(callsigns)
+    regs = parse_keys(regs)
+    if len(callsigns) + len(regs) > BATCH_MAX_KEYS:
+        raise ValueError(f'too many keys (max {BATCH_MAX_KEYS})')
+
+    routes = route_index.get(conn, generation) if route_index else None
+    if routes is not None:
+        by_callsign = {key: routes[('callsign', key)] for key in callsigns
+                       if ('callsign', key) in routes}
+        by_reg = {key: routes[('registration', key)] for key in regs
+                  if ('registration', key) in routes}
+    else:
+        by_callsign = {key: _route_record(flight) for key, flight
+                       in _latest_flights_by(conn, 'flight_number_norm', callsigns).items()}
+        by_reg = {key: _route_record(flight) for key, flight
+                  in _latest_flights_by(conn, 'registration_norm', regs).items()}
+    return {
+        'count': len(by_callsign) + len(by_reg),
+        'callsigns': by_callsign,
+        'registrations': by_reg,
+        'missing': ([key for key in callsigns if key not in by_callsign]
+                    + [key for key in regs if key not in by_reg])
+    }
+
+
+def list_weather(conn, weather_type='metar', airport=None, match='exact', cursor=None, limit=50):
+    """기상정보 (keyset 페이지)"""
+    query = f"{SELECT_WEATHER} WHERE weather_type = ?"
+    params = [weather_type]
+
+    if airport:
+        clause, param = match_clause('airport_icao', 'airport', airport, match)
+        query += f" AND {clause}"
+        params.append(param)
+
+    weather, next_cursor = fetch_page(conn, WEATHER_COLUMNS, query, params, cursor, limit)
+    return {
+        'type': weather_type,
+        'count': len(weather),
+        'weather': weather,
+        'next_cursor': next_cursor
+    }
+
+
+def latest_weather(conn, weather_type, airport):
+    """공항별 최신 METAR/TAF (weather_latest 기본키 조회, 없으면 None)"""
+    row = _execute(conn, f'''
+        {SELECT_WEATHER_LATEST}
+        WHERE weather_type = ? AND airport_icao = ?
+    ''', (weather_type, normalize_ident(airport))).fetchone()
+    return dict(zip(WEATHER_COLUMNS, row)) if row else None
+
+
+def latest_weather_batch(conn, weather_type, airports):
+    """여러 공항의 최신 METAR/TAF 일괄 조회 (weather_latest 기본키 IN 조회)"""
+    airports = parse_keys(airports, normalize_icao)
+    rows = []
+    if airports:
+        rows = _execute(conn, f'''
+            {SELECT_WEATHER_LATEST}
+            WHERE weather_type = ? AND airport_icao IN ({_placeholders(airports)})
+        ''', [weather_type] + airports).fetchall()
+
+    weather = {record['airport_icao']: record for record in _records(WEATHER_COLUMNS, rows)}
+    return {
+        'type': weather_type,
+        'count': len(weather),
+        'weather': weather,
+        'missing': [airport for airport in airports if airport not in weather]
+    }
+
+
+def list_notams(conn, notam_type=None, location=None, match='exact', cursor=None, limit=100):
+    """NOTAM (keyset 페이지)"""
+    query = f"{SELECT_NOTAMS} WHERE 1=1"
+    params = []
+
+    if notam_type:
+        query += " AND notam_type = ?"
+        params.append(notam_type)
+    if location:
+        clause, param = match_clause('location_icao', 'location', location, match)
+        query += f" AND {clause}"
+        params.append(param)
+
+    notams, next_cursor = fetch_page(conn, NOTAM_COLUMNS, query, params, cursor, limit)
+    return {'count': len(notams), 'notams': notams, 'next_cursor': next_cursor}
+
+
+def notams_by_location(conn, location, match='exact', limit=50):
+    """특정 위치 NOTAM (최신 순)"""
+    clause, param = match_clause('location_icao', 'location', location, match)
+    rows = _execute(conn, f'''
+        {SELECT_NOTAMS}
+        WHERE {clause}
+        ORDER BY created_at DESC
+        LIMIT ?
+    ''', (param, _clamp_limit(limit))).fetchall()
+
+    notams = _records(NOTAM_COLUMNS, rows)
+    return {'location': location, 'count': len(notams), 'notams': notams}
+
+
+def search_notams(conn, text, notam_type=None, limit=50):
+    """NOTAM 전문 검색 (FTS5, 관련도순), 검색어가 비어 있으면 None"""
+    match_expr = fts_query(text)
+    if not match_expr:
+        return None
+
+    query = SELECT_NOTAM_SEARCH
+    params = [match_expr]
+
+    if notam_type:
+        query += " AND notams.notam_type = ?"
+        params.append(notam_type)
+
+    query += " ORDER BY rank LIMIT ?"
+    params.append(_clamp_limit(limit))
+
+    notams = _records(NOTAM_SEARCH_COLUMNS, _execute(conn, query, params).fetchall())
+    return {'query': text, 'count': len(notams), 'notams': notams}
+
+
+def list_atfm(conn, airport=None, match='exact', cursor=None, limit=50):
+    """ATFM 메시지 (keyset 페이지)"""
+    query = f"{SELECT_ATFM} WHERE 1=1"
+    params = []
+
+    if airport:
+        clause, param = match_clause('airport_icao', 'airport', airport, match)
+        query += f" AND {clause}"
+        params.append(param)
+
+    messages, next_cursor = fetch_page(conn, ATFM_COLUMNS, query, params, cursor, limit)
+    return {'count': len(messages), 'messages': messages, 'next_cursor': next_cursor}
+
+
+def list_airports():
+    """국내 공항 목록"""
+    return {'count': len(KOREAN_AIRPORTS), 'airports': list(KOREAN_AIRPORTS)}
+
+
+def airport_info(conn, icao):
+    """공항 정보 (airport_info 테이블 -> 기본 정보 순, 둘 다 없으면 None)"""
+    icao = icao.upper()
+    row = _execute(conn, f"{SELECT_AIRPORT_INFO} WHERE icao_code = ?", (icao,)).fetchone()
+    if row:
+        return dict(zip(AIRPORT_INFO_COLUMNS, row))
+    return DEFAULT_AIRPORT_INFO.get(icao)
+
+
+def crawl_status(conn):
+    """마지막 크롤링 시간과 테이블별 레코드 수
+
+    크롤러가 저장 트랜잭션마다 갱신하는 table_stats(기본키 조회)만 읽는다.
+    table_stats가 없는 이전 DB에서는 테이블별 COUNT(*)로 대신한다.
+    """
+    try:
+        rows = _execute(conn, f'''
+            SELECT table_name, row_count, last_crawl, last_insert FROM table_stats
+            WHERE table_name IN ({_placeholders(STATS_TABLES)})
+        ''', STATS_TABLES).fetchall()
+    except sqlite3.OperationalError:
+        return _count_status(conn)
+
+    stats = {row[0]: row[1:] for row in rows}
+    last_crawl = stats.get('crawl_logs', (0, None, None))[1]
+    return {
+        'last_crawl': last_crawl,
+        'records': {table: stats.get(table, (0,))[0] for table in STATUS_TABLES},
+        'last_insert': {table: stats[table][2] for table in STATUS_TABLES if table in stats}
+    }
+
+
+def _count_status(conn):
+    """table_stats 이전 DB용: 테이블별 COUNT(*)"""
+    last_crawl = _execute(conn, 'SELECT MAX(crawl_timestamp) FROM crawl_logs').fetchone()
+
+    counts = {}
+    for table in STATUS_TABLES:
+        try:
+            counts[table] = _execute(conn, f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        except sqlite3.Error:
+            counts[table] = 0
+
+    return {'last_crawl': last_crawl[0] if last_crawl else None, 'records': counts}
+
+
+# ============ 변경 스트림 (SSE) ============
+# 크롤러는 갱신된 행도 INSERT OR REPLACE로 새 id를 받아 저장하므로(AUTOINCREMENT),
+# 테이블별 마지막 id(워터마크) 이후 행이 곧 새/변경 행이다.
+
+STREAM_TABLES = {
+    'flights': ('flight_plans', FLIGHT_COLUMNS, SELECT_FLIGHTS),
+    'weather': ('weather', WEATHER_COLUMNS, SELECT_WEATHER),
+    'notams': ('notams', NOTAM_COLUMNS, SELECT_NOTAMS),
+    'atfm': ('atfm_messages', ATFM_COLUMNS, SELECT_ATFM)
+}
+STREAM_BATCH_SIZE = 500
+
+
+def stream_watermarks(conn):
+    """스트림 대상 테이블별 마지막 id (MAX(id)는 rowid 조회라 한 번의 쿼리로 끝난다)"""
+    columns = ', '.join(f'(SELECT MAX(id) FROM {table})' for table, _, _ in STREAM_TABLES.values())
+    row = _execute(conn, f'SELECT {columns}').fetchone()
+    return {name: value or 0 for name, value in zip(STREAM_TABLES, row)}
+
+
+def encode_stream_token(marks):
+    """워터마크 -> 스트림 재개 토큰"""
+    return _encode_token([marks[name] for name in STREAM_TABLES])
+
+
+def decode_stream_token(token):
+    """스트림 재개 토큰 -> 워터마크, 형식이 잘못되면 ValueError"""
+    try:
+        values = _decode_token(token)
+    except (TypeError, ValueError):
+        raise ValueError('invalid stream token')
+    if (not isinstance(values, list) or len(values) != len(STREAM_TABLES)
+            or not all(isinstance(value, int) for value in values)):
+        raise ValueError('invalid stream token')
+    return dict(zip(STREAM_TABLES, values))
+
+
+def fetch_stream_deltas(conn, since, until, batch_size=STREAM_BATCH_SIZE):
+    """since < id <= until 범위의 행을 테이블별 배치로 조회 -> [(name, records, marks), ...]
+
+    marks는 해당 배치까지 반영한 워터마크라 배치 단위로 재개 토큰을 줄 수 있다.
+    """
+    batches = []
+    marks = dict(since)
+    for name, (_, columns, select) in STREAM_TABLES.items():
+        while marks[name] < until[name]:
+            rows = _execute(conn, f'{select} WHERE id > ? AND id <= ? ORDER BY id LIMIT ?',
+                            (marks[name], until[name], batch_size)).fetchall()
+            if not rows:
+                break
+            records = _records(columns, rows)
+            marks[name] = records[-1]['id']
+            batches.append((name, records, dict(marks)))
+    return batches
+
+
+# ============ 변경분 (change_log) ============
+# 크롤러가 저장할 때 자연키 기준으로 추가(insert)/변경(update)/만료(expire)를 change_log에 기록한다.
+# 만료는 직전 크롤링에 있던 행이 이번 크롤링에서 빠진 경우이며, 행 자체는 테이블에 남아 있다.
+
+CHANGE_TABLES = {
+    'flights': ('flight_plans', FLIGHT_COLUMNS, SELECT_FLIGHTS),
+    'notams': ('notams', NOTAM_COLUMNS, SELECT_NOTAMS),
+    'weather': ('weather', WEATHER_COLUMNS, SELECT_WEATHER)
+}
+CHANGE_GROUPS = {'insert': 'inserted', 'update': 'updated', 'expire': 'expired'}
+
+
+def list_changes(conn, since=None, cursor=None, limit=500):
+    """since(crawl_timestamp) 이후 변경분 (change_log id 순 페이지), since와 cursor가 모두 없으면 None
+
+    한 페이지 안에서 같은 행의 변경은 마지막 상태 하나로 합치며(추가 후 변경이면 inserted),
+    크롤러는 값이 그대로인 행의 id를 유지하므로 기록된 row_id는 다시 바뀔 때까지 남아 있고,
+    다시 바뀌어 사라진 행 버전은 뒤의 변경 기록이 대신하므로 건너뛴다.
+    next_cursor는 마지막 페이지에서도 주어지며, 다음 동기화 때 since 대신 넘기면
+    크롤링 도중 저장된 변경분도 빠짐없이 이어 받는다.
+    """
+    if not since and not cursor:
+        return None
+    limit = _clamp_limit(limit)
+
+    if cursor:
+        since, after_id = decode_cursor(cursor)
+    else:
+        # crawl_timestamp 인덱스로 시작 id만 찾고 나머지는 rowid 범위 검색
+        # (MIN(id)로 쓰면 rowid 순으로 처음부터 훑으므로 인덱스 순서의 첫 행을 읽는다)
+        start = _execute(conn, '''
+            SELECT id FROM change_log WHERE crawl_timestamp > ?
+            ORDER BY crawl_timestamp, id LIMIT 1
+        ''', (since,)).fetchone()
+        if start:
+            after_id = start[0] - 1
+        else:
+            # 변경분이 없으면 지금까지의 마지막 id부터 이어 받는다
+            after_id = _execute(conn, 'SELECT MAX(id) FROM change_log').fetchone()[0] or 0
+
+    entries = _execute(conn, '''
+        SELECT id, crawl_timestamp, table_name, change_type, row_id, row_key
+        FROM change_log WHERE id > ? ORDER BY id LIMIT ?
+    ''', (after_id, limit + 1)).fetchall()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for _, _, table_name, change_type, row_id, row_key in entries:
+        previous = latest.get((table_name, row_key))
+        if previous and previous[0] == 'insert' and change_type == 'update':
+            change_type = 'insert'
+        latest[(table_name, row_key)] = (change_type, row_id)
+
+    changes = {name: {group: [] for group in CHANGE_GROUPS.values()} for name in CHANGE_TABLES}
+    for name, (_, columns, select) in CHANGE_TABLES.items():
+        wanted = {row_id: change_type for (table_name, _), (change_type, row_id) in latest.items()
+                  if table_name == name}
+        if not wanted:
+            continue
+        placeholders = ', '.join('?' * len(wanted))
+        rows = _execute(conn, f'{select} WHERE id IN ({placeholders}) ORDER BY id',
+                        list(wanted)).fetchall()
+        for record in _records(columns, rows):
+            changes[name][CHANGE_GROUPS[wanted[record['id']]]].append(record)
+
+    if entries:
+        last_id, until = entries[-1][0], entries[-1][1]
+    else:
+        last_id, until = after_id, since
+    return {
+        'since': since,
+        'until': until,
+        'count': len(entries),
+        'changes': changes,
+        'has_more': has_more,
+        'next_cursor': encode_cursor(until, last_id)
+    }
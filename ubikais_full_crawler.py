@@ -5,9 +5,16 @@ UBIKAIS Full Crawler - 한국 항공정보 통합 크롤러
 AWS Lambda/EC2에서 운영하여 API로 제공
 """
 
+import base64
+import copy
+import queue
+import signal
+import socket
+import socketserver
 import time
 import json
-import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -18,6 +25,14 @@ import logging
 import sys
 import os
 
+from ubikais_session import clear_session, is_login_page, load_session, restore_session, save_session
+from ubikais_store import UBIKAISStore
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
 # Windows 한국어 환경 인코딩 설정
 if sys.platform == 'win32':
     try:
@@ -37,9 +52,436 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 페이지 대기 (고정 sleep 대신 조건 대기): 기본 타임아웃(초), 결과 테이블이 이 시간 동안
+# 그대로이고 진행 중인 XHR/fetch가 없으면 로드 완료로 본다
+PAGE_TIMEOUT = float(os.environ.get('UBIKAIS_PAGE_TIMEOUT', 20))
+TABLE_TIMEOUT = float(os.environ.get('UBIKAIS_TABLE_TIMEOUT', 15))
+TABLE_STABLE_SECONDS = float(os.environ.get('UBIKAIS_TABLE_STABLE_SECONDS', 0.5))
+WAIT_POLL_SECONDS = 0.1
+
+# 병렬 크롤링: 브라우저 세션 수, 페이지 작업별 재시도 횟수
+CRAWL_SESSIONS = int(os.environ.get('UBIKAIS_CRAWL_SESSIONS', 3))
+CRAWL_RETRIES = int(os.environ.get('UBIKAIS_CRAWL_RETRIES', 1))
+
+# 데이터 엔드포인트 직접 호출:
+#   browser  항상 브라우저로 테이블 추출
+#   capture  브라우저로 추출하면서 페이지가 받은 JSON(XHR) 응답을 엔드포인트로 기록
+#   auto     기록된 엔드포인트가 있으면 HTTP로 직접 호출, 없거나 실패하면 capture와 같음
+FETCH_MODE = os.environ.get('UBIKAIS_FETCH_MODE', 'auto')
+ENDPOINTS_PATH = os.environ.get('UBIKAIS_ENDPOINTS_PATH', 'ubikais_endpoints.json')
+# 이 기간(일)이 지난 엔드포인트는 브라우저로 다시 캡처
+ENDPOINT_MAX_AGE_DAYS = float(os.environ.get('UBIKAIS_ENDPOINT_MAX_AGE_DAYS', 7))
+HTTP_TIMEOUT = float(os.environ.get('UBIKAIS_HTTP_TIMEOUT', 20))
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+# 캡처한 요청 안의 날짜를 호출 당일로 바꿀 형식 (검색 조건의 조회일)
+REQUEST_DATE_FORMATS = ('%Y%m%d', '%Y-%m-%d', '%Y.%m.%d', '%Y/%m/%d')
+
+# 데몬 모드 (--daemon): 데이터 종류별 크롤링 주기(초, 0이면 수동 요청만),
+# 예: UBIKAIS_DAEMON_SCHEDULE="fpl=300,notam=600"으로 일부만 바꿀 수 있음
+DEFAULT_DAEMON_SCHEDULE = {'fpl': 300, 'weather': 600, 'notam': 900, 'atfm': 600, 'aero': 86400}
+# 브라우저 재시작 기준: 세션당 페이지 이동 수, 세션당 메모리(MB, chromedriver + Chrome 프로세스 RSS 합)
+BROWSER_MAX_PAGES = int(os.environ.get('UBIKAIS_BROWSER_MAX_PAGES', 500))
+BROWSER_MAX_MB = float(os.environ.get('UBIKAIS_BROWSER_MAX_MB', 1500))
+# 데몬 제어 소켓 (localhost TCP, 한 줄 명령 -> 한 줄 JSON 응답)
+CONTROL_HOST = '127.0.0.1'
+CONTROL_PORT = int(os.environ.get('UBIKAIS_CONTROL_PORT', 8765))
+
+# 페이지가 보낸 XHR/fetch 중 끝나지 않은 요청 수를 window.__ubikaisProbe.pending에 유지
+NETWORK_PROBE_SCRIPT = """
+if (!window.__ubikaisProbe) {
+    var probe = window.__ubikaisProbe = {pending: 0};
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        var finished = false;
+        probe.pending++;
+        this.addEventListener('loadend', function() {
+            if (!finished) { finished = true; probe.pending--; }
+        });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetchOrig = window.fetch;
+        window.fetch = function() {
+            probe.pending++;
+            return fetchOrig.apply(this, arguments).finally(function() { probe.pending--; });
+        };
+    }
+}
+"""
+
+# [문서 상태, 진행 중인 요청 수, 결과 테이블 서명(행 수:마지막 행 길이)]
+PAGE_STATE_SCRIPT = """
+var pending = (window.__ubikaisProbe ? window.__ubikaisProbe.pending : 0)
+    + (window.jQuery && jQuery.active ? jQuery.active : 0);
+var rows = document.querySelectorAll('table tbody tr');
+if (rows.length === 0) {
+    rows = document.querySelectorAll('table tr');
+}
+var last = rows.length ? rows[rows.length - 1].textContent.length : 0;
+return [document.readyState, pending, rows.length + ':' + last];
+"""
+
+
+class TableStable:
+    """WebDriverWait 조건: 문서 로드 완료, 진행 중인 요청 없음, 결과 테이블이 stable_seconds 동안 그대로"""
+
+    def __init__(self, stable_seconds=TABLE_STABLE_SECONDS):
+        self.stable_seconds = stable_seconds
+        self.signature = None
+        self.since = None
+
+    def __call__(self, driver):
+        ready, pending, signature = driver.execute_script(PAGE_STATE_SCRIPT)
+        now = time.monotonic()
+        if ready != 'complete' or pending or signature != self.signature or self.since is None:
+            self.signature = signature
+            self.since = now
+            return False
+        return now - self.since >= self.stable_seconds
+
+
+def json_records(payload):
+    """JSON 응답에서 가장 긴 객체 목록 (테이블 행 후보)"""
+    best = []
+    stack = [payload]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            if len(value) > len(best) and all(isinstance(item, dict) for item in value):
+                best = value
+            stack.extend(item for item in value if isinstance(item, (dict, list)))
+    return best
+
+
+def _cell_text(value):
+    return '' if value is None else str(value).strip()
+
+
+def match_fields(rows, records, min_overlap=0.8):
+    """테이블 행(헤더 -> 셀 텍스트)과 JSON 레코드 값을 비교해 헤더 -> JSON 필드 대응 찾기
+
+    헤더마다 셀 값 집합과 가장 많이 겹치는(min_overlap 이상) JSON 필드를 고른다.
+    값이 있는 헤더 중 하나라도 대응시키지 못하면 None (직접 호출 행에 빈 컬럼이 생기면
+    브라우저로 추출한 행과 값이 달라져 변경분으로 잘못 기록된다).
+    """
+    if not rows or len(records) < len(rows):
+        return None
+
+    field_values = {}
+    for record in records:
+        for field, value in record.items():
+            if not isinstance(value, (dict, list)):
+                field_values.setdefault(field, set()).add(_cell_text(value))
+
+    field_map = {}
+    headers = [header for header in rows[0] if any(row.get(header) for row in rows)]
+    for header in headers:
+        cells = {row.get(header, '') for row in rows} - {''}
+        best_field, best_overlap = None, min_overlap
+        for field, values in field_values.items():
+            overlap = len(cells & values) / len(cells)
+            if overlap >= best_overlap:
+                best_field, best_overlap = field, overlap
+        if best_field:
+            field_map[header] = best_field
+
+    return field_map if headers and len(field_map) == len(headers) else None
+
+
+def refresh_request_dates(text, captured_on, today):
+    """캡처 당일 날짜를 오늘 날짜로 바꿈 (URL/폼 본문의 조회일 검색 조건)"""
+    if not text:
+        return text
+    for date_format in REQUEST_DATE_FORMATS:
+        text = text.replace(captured_on.strftime(date_format), today.strftime(date_format))
+    return text
+
+
+def captured_json_requests(log_entries):
+    """Chrome performance 로그에서 JSON을 받은 XHR/fetch 요청 목록 (응답 크기 큰 순)"""
+    sent, received, sizes = {}, {}, {}
+    for entry in log_entries:
+        message = json.loads(entry['message'])['message']
+        params = message.get('params', {})
+        request_id = params.get('requestId')
+        if message.get('method') == 'Network.requestWillBeSent':
+            sent[request_id] = params['request']
+        elif message.get('method') == 'Network.responseReceived' and params.get('type') in ('XHR', 'Fetch'):
+            response = params.get('response', {})
+            if response.get('status') == 200 and 'json' in response.get('mimeType', ''):
+                received[request_id] = response
+        elif message.get('method') == 'Network.loadingFinished':
+            sizes[request_id] = params.get('encodedDataLength', 0)
+
+    found = [(request_id, sent[request_id]) for request_id in received if request_id in sent]
+    return sorted(found, key=lambda item: sizes.get(item[0], 0), reverse=True)
+
+
+class EndpointStore:
+    """페이지별 캡처한 데이터 엔드포인트 (요청 방식/URL/본문 + 헤더 -> JSON 필드 대응), JSON 파일에 보관"""
+
+    def __init__(self, path=ENDPOINTS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.endpoints = json.load(f)
+        except (OSError, ValueError):
+            self.endpoints = {}
+
+    def get(self, page):
+        """사용 가능한 엔드포인트 (없거나 ENDPOINT_MAX_AGE_DAYS가 지났으면 None)"""
+        endpoint = self.endpoints.get(page)
+        if endpoint is None:
+            return None
+        age = datetime.now() - datetime.fromisoformat(endpoint['captured_at'])
+        return endpoint if age.total_seconds() < ENDPOINT_MAX_AGE_DAYS * 86400 else None
+
+    def put(self, page, endpoint):
+        """엔드포인트 저장 (로그인 세션의 요청 URL/본문이므로 소유자만 읽을 수 있는 파일)"""
+        with self._lock:
+            self.endpoints[page] = endpoint
+            tmp_path = f'{self.path}.tmp'
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.endpoints, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def parse_schedule(text, defaults=DEFAULT_DAEMON_SCHEDULE):
+    """"종류=초,종류=초" 형식의 크롤링 주기 (지정하지 않은 종류는 기본값)"""
+    schedule = dict(defaults)
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        group, _, seconds = item.partition('=')
+        if group.strip() not in defaults:
+            raise ValueError(f"unknown crawl type in schedule: {group.strip()}")
+        schedule[group.strip()] = float(seconds)
+    return schedule
+
+
+def _proc_tree_rss(root_pid):
+    """/proc에서 프로세스와 모든 하위 프로세스의 RSS 합 (바이트, Linux)"""
+    children, rss_pages = {}, {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm(괄호 안)에 공백이 있을 수 있어 마지막 ')' 뒤부터: state, ppid, ... rss(24번째 필드)
+        fields = stat[stat.rindex(')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        rss_pages[int(entry)] = int(fields[21])
+
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss_pages.get(pid, 0)
+        stack.extend(children.get(pid, ()))
+    return total * os.sysconf('SC_PAGE_SIZE')
+
+
+def browser_memory_mb(driver):
+    """chromedriver와 하위 Chrome 프로세스의 메모리 합 (MB, 측정할 수 없으면 None)"""
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return None
+    try:
+        if psutil is not None:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(process.memory_info().rss for process in processes) / 1048576
+        if os.path.isdir('/proc'):
+            return _proc_tree_rss(pid) / 1048576
+    except Exception as e:
+        logger.debug(f"브라우저 메모리 측정 실패: {e}")
+    return None
+
+
+class BrowserPool:
+    """로그인된 브라우저 세션 풀
+
+    크롤러 자신이 첫 세션이고, 나머지 세션은 크롤러의 얕은 복사본으로 driver와 wait_stats만
+    따로 가진다. 새 세션은 첫 세션이 login()으로 받은 쿠키를 복사해 다시 로그인하지 않는다.
+    페이지 작업만 병렬로 실행하며 DB 저장은 호출한 스레드에서 한다.
+    """
+
+    def __init__(self, crawler, size=CRAWL_SESSIONS):
+        self.crawler = crawler
+        self.size = max(1, size)
+        self.cookies = crawler.driver.get_cookies()
+        self.sessions = [crawler]
+        self._idle = queue.Queue()
+        self._idle.put(crawler)
+
+        if self.size > 1:
+            with ThreadPoolExecutor(max_workers=self.size - 1) as executor:
+                for session in executor.map(lambda _: self._open_session(), range(self.size - 1)):
+                    if session is not None:
+                        self.sessions.append(session)
+                        self._idle.put(session)
+
+    def _open_session(self):
+        """새 브라우저에 로그인 쿠키 복사 (실패하면 직접 로그인, 그래도 실패하면 None)"""
+        session = copy.copy(self.crawler)
+        session.wait_stats = {}
+        session.last_error = None
+        session.http = None
+        session.pages_loaded = 0
+        try:
+            session.driver = self.crawler.init_driver()
+            self._restore_login(session)
+            return session
+        except Exception as e:
+            logger.warning(f"[WARN] 브라우저 세션 생성 실패: {e}")
+            if session.driver is not self.crawler.driver:
+                try:
+                    session.driver.quit()
+                except Exception:
+                    pass
+            return None
+
+    def _restore_login(self, session):
+        if not restore_session(session.driver, self.crawler.base_url, self.cookies) and not session.login():
+            raise Exception("로그인 실패")
+
+    def _revive(self, session):
+        """작업 실패 후 세션 점검: 브라우저가 죽었으면 새로 띄워 로그인 상태 복원 (실패하면 False)"""
+        try:
+            session.driver.current_url
+            return True
+        except Exception:
+            pass
+
+        logger.warning("[WARN] 브라우저 세션 재시작")
+        return self._restart(session)
+
+    def _restart(self, session):
+        """세션 브라우저를 새로 띄워 로그인 상태 복원 (실패하면 풀에서 빼고 False)"""
+        try:
+            # 살아 있는 브라우저면 최신 쿠키를 가져와 복원에 사용
+            self.cookies = session.driver.get_cookies() or self.cookies
+        except Exception:
+            pass
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+        session.http = None
+        session.pages_loaded = 0
+        try:
+            session.driver = self.crawler.init_driver()
+            self._restore_login(session)
+            return True
+        except Exception as e:
+            logger.warning(f"[WARN] 브라우저 세션 재시작 실패: {e}")
+            self._drop(session)
+            return False
+
+    def _drop(self, session):
+        """죽은 세션을 풀에서 제외 (유휴 큐에 남은 것은 _acquire가 건너뜀)"""
+        if session in self.sessions:
+            self.sessions.remove(session)
+        if session is not self.crawler:
+            self._merge_stats(session)
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+        logger.warning(f"[WARN] 브라우저 세션 제외, 남은 세션 {len(self.sessions)}개")
+        if not self.sessions:
+            # 세션을 기다리는 작업들을 깨움
+            self._idle.put(None)
+
+    def _acquire(self):
+        """유휴 세션 하나 (남은 세션이 없으면 None)"""
+        while True:
+            session = self._idle.get()
+            if session is None:
+                self._idle.put(None)
+                return None
+            if session in self.sessions:
+                return session
+
+    def _merge_stats(self, session):
+        """세션의 대기 계측을 크롤러에 합치기"""
+        for key, stats in session.wait_stats.items():
+            total = self.crawler.wait_stats.setdefault(
+                key, {'count': 0, 'total': 0.0, 'max': 0.0, 'timeouts': 0})
+            total['count'] += stats['count']
+            total['total'] += stats['total']
+            total['max'] = max(total['max'], stats['max'])
+            total['timeouts'] += stats['timeouts']
+        session.wait_stats = {}
+
+    def recycle(self, max_pages=BROWSER_MAX_PAGES, max_mb=BROWSER_MAX_MB):
+        """페이지 이동 수나 메모리가 기준을 넘은 세션의 브라우저 재시작 (작업 사이에 호출) -> 재시작 수"""
+        recycled = 0
+        for session in list(self.sessions):
+            memory_mb = browser_memory_mb(session.driver)
+            if session.pages_loaded >= max_pages or (memory_mb is not None and memory_mb >= max_mb):
+                logger.info(f"[INFO] 브라우저 재시작: 페이지 {session.pages_loaded}회, "
+                            f"메모리 {memory_mb if memory_mb is not None else 0:.0f}MB")
+                self._restart(session)
+                recycled += 1
+        return recycled
+
+    def run(self, tasks, retries=CRAWL_RETRIES):
+        """(키, 크롤러 메서드 이름, 인자) 작업들을 세션 풀에서 병렬 실행 -> {키: 결과}"""
+        if not self.sessions:
+            # recycle()에서 모든 세션의 재시작이 실패한 경우
+            raise Exception("사용 가능한 브라우저 세션 없음")
+        with ThreadPoolExecutor(max_workers=len(self.sessions), thread_name_prefix='ubikais-crawl') as executor:
+            futures = {key: executor.submit(self._run_task, key, method, args, retries)
+                       for key, method, args in tasks}
+            results = {key: future.result() for key, future in futures.items()}
+        if not self.sessions:
+            raise Exception("사용 가능한 브라우저 세션 없음")
+        return results
+
+    def _run_task(self, key, method, args, retries):
+        result = []
+        for attempt in range(retries + 1):
+            session = self._acquire()
+            if session is None:
+                logger.warning(f"[WARN] {key} 작업 건너뜀: 남은 브라우저 세션 없음")
+                return result
+            session.last_error = None
+            try:
+                result = getattr(session, method)(*args)
+            except Exception as e:
+                session.last_error = e
+                result = []
+
+            if session.last_error is None:
+                self._idle.put(session)
+                return result
+
+            logger.warning(f"[WARN] {key} 작업 실패 ({attempt + 1}/{retries + 1}): {session.last_error}")
+            if self._revive(session):
+                self._idle.put(session)
+        return result
+
+    def close(self):
+        """추가 세션 브라우저 종료 (크롤러 자신의 driver는 호출한 쪽에서 정리) 후 대기 계측 합치기"""
+        for session in self.sessions:
+            if session is self.crawler:
+                continue
+            self._merge_stats(session)
+            try:
+                session.driver.quit()
+            except Exception:
+                pass
+        self.sessions = [self.crawler]
+
 
-class UBIKAISFullCrawler:
-    """UBIKAIS 전체 데이터 크롤러"""
+class UBIKAISFullCrawler(UBIKAISStore):
+    """UBIKAIS 전체 데이터 크롤러 (DB 저장은 UBIKAISStore)"""
 
     def __init__(self, db_name='ubikais_full.db', headless=True):
         self.base_url = 'https://ubikais.fois.go.kr:8030'
@@ -49,9 +491,17 @@ class UBIKAISFullCrawler:
         self.username = os.environ.get('UBIKAIS_USERNAME', 'allofdanie')
         self.password = os.environ.get('UBIKAIS_PASSWORD', 'pr12pr34!!')
 
-        self.db_name = db_name
         self.headless = headless
         self.driver = None
+        # 대기 구간별 계측: (페이지, 단계) -> {'count', 'total', 'max', 'timeouts'}
+        self.wait_stats = {}
+        # 마지막 crawl_* 호출의 오류 (BrowserPool이 재시도 판단에 사용)
+        self.last_error = None
+        # 캡처한 데이터 엔드포인트 (세션 간 공유)와 직접 호출용 HTTP 세션 (세션별)
+        self.endpoints = EndpointStore()
+        self.http = None
+        # 현재 브라우저로 이동한 페이지 수 (데몬의 브라우저 재시작 기준)
+        self.pages_loaded = 0
 
         # 한국 공항 코드
         self.airports = {
@@ -117,145 +567,9 @@ class UBIKAISFullCrawler:
             'aero_ats': '/sysUbikais/biz/ais/account/account',
         }
 
-        self.setup_database()
+        super().__init__(db_name)
         logger.info("[OK] UBIKAIS Full Crawler 초기화 완료")
 
-    def setup_database(self):
-        """SQLite 데이터베이스 초기화"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        # 비행계획 테이블 (IFR/VFR)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS flight_plans (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                crawl_timestamp TEXT,
-                plan_type TEXT,
-                flight_number TEXT,
-                aircraft_type TEXT,
-                registration TEXT,
-                origin TEXT,
-                destination TEXT,
-                std TEXT,
-                etd TEXT,
-                atd TEXT,
-                sta TEXT,
-                eta TEXT,
-                ata TEXT,
-                status TEXT,
-                nature TEXT,
-                route TEXT,
-                remarks TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(flight_number, std, origin, destination, plan_type)
-            )
-        ''')
-
-        # NOTAM 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS notams (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                crawl_timestamp TEXT,
-                notam_type TEXT,
-                notam_id TEXT UNIQUE,
-                location TEXT,
-                fir TEXT,
-                qcode TEXT,
-                start_time TEXT,
-                end_time TEXT,
-                message TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # 기상정보 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS weather (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                crawl_timestamp TEXT,
-                weather_type TEXT,
-                airport TEXT,
-                observation_time TEXT,
-                raw_text TEXT,
-                visibility TEXT,
-                wind_speed TEXT,
-                wind_direction TEXT,
-                temperature TEXT,
-                dewpoint TEXT,
-                pressure TEXT,
-                weather_phenomena TEXT,
-                clouds TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # ATFM 메시지 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS atfm_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                crawl_timestamp TEXT,
-                message_type TEXT,
-                airport TEXT,
-                effective_time TEXT,
-                end_time TEXT,
-                reason TEXT,
-                capacity TEXT,
-                message TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # 공항정보 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS airport_info (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                crawl_timestamp TEXT,
-                icao_code TEXT,
-                iata_code TEXT,
-                name_ko TEXT,
-                name_en TEXT,
-                latitude TEXT,
-                longitude TEXT,
-                elevation TEXT,
-                runway_info TEXT,
-                operating_hours TEXT,
-                contact TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(icao_code)
-            )
-        ''')
-
-        # AERO-DATA 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS aero_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                crawl_timestamp TEXT,
-                data_type TEXT,
-                airport TEXT,
-                identifier TEXT,
-                data_json TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # 크롤링 로그 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS crawl_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                crawl_timestamp TEXT,
-                data_type TEXT,
-                status TEXT,
-                records_found INTEGER,
-                records_saved INTEGER,
-                error_message TEXT,
-                execution_time REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        conn.commit()
-        conn.close()
-
     def init_driver(self):
         """Chrome 드라이버 초기화"""
         options = webdriver.ChromeOptions()
@@ -270,10 +584,15 @@ class UBIKAISFullCrawler:
         options.add_argument('--window-size=1920,1080')
         options.add_argument('--ignore-certificate-errors')
         options.add_argument('--ignore-ssl-errors')
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+        options.add_argument(f'user-agent={USER_AGENT}')
+        if FETCH_MODE != 'browser':
+            # 페이지가 받은 XHR/fetch 응답을 performance 로그로 받아 데이터 엔드포인트 캡처
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
 
         driver = webdriver.Chrome(options=options)
-        driver.implicitly_wait(10)
+        # 대기는 명시적 조건(WebDriverWait)으로만: 암시적 대기와 섞으면 없는 요소를
+        # 찾는 find_element(선택자 후보, 선택 요소)마다 그 시간만큼 막힌다
+        driver.implicitly_wait(0)
         return driver
 
     def login(self):
@@ -281,8 +600,15 @@ class UBIKAISFullCrawler:
         logger.info("[INFO] UBIKAIS 로그인 시도...")
 
         try:
+            started = time.monotonic()
             self.driver.get(self.login_url)
-            time.sleep(2)
+            try:
+                WebDriverWait(self.driver, PAGE_TIMEOUT, poll_frequency=WAIT_POLL_SECONDS).until(
+                    EC.presence_of_element_located(
+                        (By.CSS_SELECTOR, '#userId, input[name="userId"], input[type="text"]')))
+            except TimeoutException:
+                logger.warning("[WARN] 로그인 입력란 대기 시간 초과")
+            self.record_wait('login', 'load', time.monotonic() - started)
 
             # 아이디 입력
             username_selectors = ['#userId', 'input[name="userId"]', 'input[type="text"]']
@@ -338,7 +664,16 @@ class UBIKAISFullCrawler:
                 except:
                     continue
 
-            time.sleep(3)
+            # 로그인 후 페이지 이동 대기
+            started = time.monotonic()
+            try:
+                WebDriverWait(self.driver, PAGE_TIMEOUT, poll_frequency=WAIT_POLL_SECONDS).until(
+                    lambda driver: driver.current_url != self.login_url
+                    and driver.execute_script('return document.readyState') == 'complete')
+                timed_out = False
+            except TimeoutException:
+                timed_out = True
+            self.record_wait('login', 'submit', time.monotonic() - started, timed_out)
 
             # 로그인 성공 확인
             if "login" not in self.driver.current_url.lower() or "systemId" in self.driver.current_url:
@@ -352,10 +687,98 @@ class UBIKAISFullCrawler:
             logger.error(f"[ERROR] 로그인 오류: {e}")
             return False
 
-    def extract_table_data(self):
-        """현재 페이지의 테이블 데이터 추출"""
+    def ensure_login(self):
+        """저장된 로그인 세션 재사용 (서버가 거부하면 로그인 후 세션 저장)"""
+        cookies = load_session(self.username)
+        if cookies:
+            started = time.monotonic()
+            restored = restore_session(self.driver, self.base_url, cookies)
+            self.record_wait('login', 'restore', time.monotonic() - started)
+            if restored:
+                logger.info("[OK] 저장된 로그인 세션 재사용")
+                return True
+            logger.info("[INFO] 저장된 로그인 세션 만료, 다시 로그인")
+            clear_session()
+
+        if not self.login():
+            return False
+        self.save_login()
+        return True
+
+    def save_login(self):
+        """현재 브라우저 쿠키를 세션 파일에 저장 (다음 실행에서 재사용)"""
+        try:
+            if not is_login_page(self.driver.current_url):
+                save_session(self.username, self.driver.get_cookies())
+        except Exception as e:
+            logger.warning(f"[WARN] 로그인 세션 저장 실패: {e}")
+
+    # 결과가 많아 기본 TABLE_TIMEOUT보다 오래 걸리는 페이지
+    TABLE_TIMEOUTS = {
+        'notam_fir': 30,
+        'notam_ad': 30,
+        'aero_obst': 30,
+    }
+
+    def record_wait(self, page, phase, seconds, timed_out=False):
+        """대기 시간 계측 누적"""
+        stats = self.wait_stats.setdefault((page, phase), {'count': 0, 'total': 0.0, 'max': 0.0, 'timeouts': 0})
+        stats['count'] += 1
+        stats['total'] += seconds
+        stats['max'] = max(stats['max'], seconds)
+        if timed_out:
+            stats['timeouts'] += 1
+        logger.debug(f"[WAIT] {page} {phase}: {seconds:.2f}s{' (timeout)' if timed_out else ''}")
+
+    def log_wait_stats(self):
+        """페이지/단계별 대기 시간 요약 출력"""
+        if not self.wait_stats:
+            return
+        total = sum(stats['total'] for stats in self.wait_stats.values())
+        logger.info(f"  - 페이지 대기 합계: {total:.2f}초")
+        for (page, phase), stats in sorted(self.wait_stats.items()):
+            logger.info(f"    {page} {phase}: {stats['count']}회, 평균 {stats['total'] / stats['count']:.2f}초, "
+                        f"최대 {stats['max']:.2f}초, 타임아웃 {stats['timeouts']}회")
+
+    def open_page(self, url, page):
+        """페이지 이동 (driver.get은 문서 로드 완료까지 기다림) 후 XHR/fetch 감시 스크립트 설치"""
+        started = time.monotonic()
+        self.driver.get(url)
+        self.pages_loaded += 1
+        if is_login_page(self.driver.current_url):
+            # 오래 살아 있는 브라우저(데몬)에서 서버 세션이 만료된 경우
+            logger.info("[INFO] 로그인 세션 만료, 다시 로그인")
+            if not self.login():
+                raise Exception("로그인 실패")
+            self.save_login()
+            self.driver.get(url)
+        self.driver.execute_script(NETWORK_PROBE_SCRIPT)
+        self.record_wait(page, 'load', time.monotonic() - started)
+
+    def wait_for_table(self, page):
+        """결과 테이블이 안정될 때까지 대기 (페이지별 타임아웃, 초과 시 현재 내용으로 진행)"""
+        timeout = self.TABLE_TIMEOUTS.get(page, TABLE_TIMEOUT)
+        started = time.monotonic()
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=WAIT_POLL_SECONDS).until(TableStable())
+            timed_out = False
+        except TimeoutException:
+            logger.warning(f"[WARN] {page} 테이블 대기 시간 초과 ({timeout:g}초), 현재 내용으로 추출")
+            timed_out = True
+        self.record_wait(page, 'table', time.monotonic() - started, timed_out)
+
+    def click_search(self, selector):
+        """검색 버튼 클릭 (결과 대기는 extract_table_data에서)"""
+        try:
+            search_btn = self.driver.find_element(By.CSS_SELECTOR, selector)
+            self.driver.execute_script("arguments[0].click();", search_btn)
+        except:
+            pass
+
+    def extract_table_data(self, page='page'):
+        """현재 페이지의 테이블 데이터 추출 (결과 테이블이 안정된 뒤)"""
         try:
-            time.sleep(2)
+            self.wait_for_table(page)
 
             # JavaScript로 테이블 데이터 추출
             extract_script = """
@@ -402,8 +825,131 @@ class UBIKAISFullCrawler:
 
         except Exception as e:
             logger.warning(f"[WARN] 테이블 데이터 추출 오류: {e}")
+            self.last_error = e
             return []
 
+    def drain_performance_log(self):
+        """이전 페이지의 performance 로그 비우기 (캡처가 이번 페이지 요청만 보도록)"""
+        try:
+            self.driver.get_log('performance')
+        except Exception as e:
+            logger.debug(f"performance 로그 읽기 실패: {e}")
+
+    def capture_endpoint(self, page, rows):
+        """브라우저로 추출한 행과 같은 데이터를 받은 XHR/fetch 요청을 찾아 엔드포인트로 기록"""
+        try:
+            candidates = captured_json_requests(self.driver.get_log('performance'))
+        except Exception as e:
+            logger.debug(f"performance 로그 읽기 실패: {e}")
+            return None
+
+        for request_id, request in candidates:
+            try:
+                body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                text = base64.b64decode(body['body']).decode('utf-8') if body.get('base64Encoded') else body['body']
+                field_map = match_fields(rows, json_records(json.loads(text)))
+            except Exception as e:
+                logger.debug(f"{page} 응답 본문 확인 실패 ({request.get('url')}): {e}")
+                continue
+
+            if field_map:
+                headers = {name.lower(): value for name, value in request.get('headers', {}).items()}
+                endpoint = {
+                    'method': request['method'],
+                    'url': request['url'],
+                    'post_data': request.get('postData'),
+                    'content_type': headers.get('content-type'),
+                    'field_map': field_map,
+                    # 브라우저 행의 전체 헤더 (값이 없던 헤더는 직접 호출 때 빈 문자열)
+                    'headers': list(rows[0]),
+                    'captured_at': datetime.now().isoformat()
+                }
+                self.endpoints.put(page, endpoint)
+                logger.info(f"[OK] {page} 데이터 엔드포인트 캡처: {endpoint['method']} {endpoint['url']}")
+                return endpoint
+
+        logger.debug(f"{page}: 테이블과 일치하는 JSON 응답 없음")
+        return None
+
+    def http_session(self):
+        """브라우저 로그인 쿠키를 복사한 HTTP 세션 (세션별 하나, 호출 실패 시 다시 만듦)"""
+        if self.http is None:
+            import requests
+            import urllib3
+
+            # 브라우저도 --ignore-certificate-errors로 접속하므로 인증서 검증 생략
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            http = requests.Session()
+            http.verify = False
+            http.headers['User-Agent'] = USER_AGENT
+            for cookie in self.driver.get_cookies():
+                http.cookies.set(cookie['name'], cookie['value'],
+                                 domain=cookie.get('domain'), path=cookie.get('path', '/'))
+            self.http = http
+        return self.http
+
+    def fetch_direct(self, page):
+        """캡처한 엔드포인트를 HTTP로 직접 호출해 테이블 행 형태로 반환 (엔드포인트 없음/실패면 None)"""
+        endpoint = self.endpoints.get(page)
+        if endpoint is None:
+            return None
+
+        started = time.monotonic()
+        try:
+            now = datetime.now()
+            captured_at = datetime.fromisoformat(endpoint['captured_at'])
+            post_data = refresh_request_dates(endpoint.get('post_data'), captured_at, now)
+            headers = {
+                'X-Requested-With': 'XMLHttpRequest',
+                'Referer': f"{self.base_url}{self.urls[page]}"
+            }
+            if endpoint.get('content_type'):
+                headers['Content-Type'] = endpoint['content_type']
+
+            response = self.http_session().request(
+                endpoint['method'], refresh_request_dates(endpoint['url'], captured_at, now),
+                data=post_data.encode('utf-8') if post_data else None,
+                headers=headers, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '')
+            if 'json' not in content_type:
+                # 세션 만료 시 로그인 페이지(HTML)로 응답
+                raise ValueError(f"JSON 응답 아님 ({content_type})")
+
+            if 'headers' not in endpoint:
+                raise ValueError("이전 형식의 캡처, 다시 캡처")
+            records = json_records(response.json())
+            field_map = endpoint['field_map']
+            if not records or any(field not in records[0] for field in field_map.values()):
+                raise ValueError("응답에 캡처 때 필드가 없음")
+        except Exception as e:
+            logger.warning(f"[WARN] {page} 엔드포인트 직접 호출 실패, 브라우저로 추출: {e}")
+            self.http = None
+            return None
+
+        self.record_wait(page, 'direct', time.monotonic() - started)
+        return [{header: _cell_text(record.get(field_map[header])) if header in field_map else ''
+                 for header in endpoint['headers']}
+                for record in records]
+
+    def fetch_rows(self, page, url, search_selector=None):
+        """페이지의 테이블 행: 캡처한 엔드포인트 직접 호출, 없거나 실패하면 브라우저로 추출하며 캡처"""
+        if FETCH_MODE == 'auto':
+            rows = self.fetch_direct(page)
+            if rows is not None:
+                return rows
+
+        capturing = FETCH_MODE in ('auto', 'capture')
+        if capturing:
+            self.drain_performance_log()
+        self.open_page(url, page)
+        if search_selector:
+            self.click_search(search_selector)
+        rows = self.extract_table_data(page)
+        if capturing and rows:
+            self.capture_endpoint(page, rows)
+        return rows
+
     def crawl_flight_plans(self, plan_type='departure'):
         """비행계획 크롤링 (IFR 출발/도착)"""
         url_key = 'fpl_departure' if plan_type == 'departure' else 'fpl_arrival'
@@ -412,19 +958,8 @@ class UBIKAISFullCrawler:
         logger.info(f"[INFO] {plan_type.upper()} 비행계획 크롤링: {url}")
 
         try:
-            self.driver.get(url)
-            time.sleep(3)
-
-            # 검색 버튼 클릭 (데이터 로드)
-            try:
-                search_btn = self.driver.find_element(By.CSS_SELECTOR, "button.btn-search, #searchBtn, button[type='submit']")
-                self.driver.execute_script("arguments[0].click();", search_btn)
-                time.sleep(2)
-            except:
-                pass
-
-            # 테이블 데이터 추출
-            data = self.extract_table_data()
+            # 검색 버튼 클릭 후 테이블 데이터 추출 (캡처한 엔드포인트가 있으면 직접 호출)
+            data = self.fetch_rows(url_key, url, "button.btn-search, #searchBtn, button[type='submit']")
 
             # 데이터 정규화
             schedules = []
@@ -453,6 +988,7 @@ class UBIKAISFullCrawler:
 
         except Exception as e:
             logger.error(f"[ERROR] {plan_type} 비행계획 크롤링 오류: {e}")
+            self.last_error = e
             return []
 
     def crawl_vfr_plans(self):
@@ -461,18 +997,8 @@ class UBIKAISFullCrawler:
         logger.info(f"[INFO] VFR 비행계획 크롤링: {url}")
 
         try:
-            self.driver.get(url)
-            time.sleep(3)
-
             # 검색
-            try:
-                search_btn = self.driver.find_element(By.CSS_SELECTOR, "button.btn-search, #searchBtn")
-                self.driver.execute_script("arguments[0].click();", search_btn)
-                time.sleep(2)
-            except:
-                pass
-
-            data = self.extract_table_data()
+            data = self.fetch_rows('fpl_vfr', url, "button.btn-search, #searchBtn")
 
             schedules = []
             for row in data:
@@ -495,6 +1021,7 @@ class UBIKAISFullCrawler:
 
         except Exception as e:
             logger.error(f"[ERROR] VFR 비행계획 크롤링 오류: {e}")
+            self.last_error = e
             return []
 
     def crawl_weather(self, weather_type='metar'):
@@ -506,22 +1033,13 @@ class UBIKAISFullCrawler:
             'admet': 'weather_admet'
         }
 
-        url = f"{self.base_url}{self.urls[url_map.get(weather_type, 'weather_metar')]}"
+        page = url_map.get(weather_type, 'weather_metar')
+        url = f"{self.base_url}{self.urls[page]}"
         logger.info(f"[INFO] {weather_type.upper()} 기상정보 크롤링: {url}")
 
         try:
-            self.driver.get(url)
-            time.sleep(3)
-
             # 검색
-            try:
-                search_btn = self.driver.find_element(By.CSS_SELECTOR, "button.btn-search, #searchBtn")
-                self.driver.execute_script("arguments[0].click();", search_btn)
-                time.sleep(2)
-            except:
-                pass
-
-            data = self.extract_table_data()
+            data = self.fetch_rows(page, url, "button.btn-search, #searchBtn")
 
             weather_data = []
             for row in data:
@@ -540,6 +1058,7 @@ class UBIKAISFullCrawler:
 
         except Exception as e:
             logger.error(f"[ERROR] {weather_type} 기상정보 크롤링 오류: {e}")
+            self.last_error = e
             return []
 
     def crawl_notam(self, notam_type='fir'):
@@ -551,22 +1070,13 @@ class UBIKAISFullCrawler:
             'prohibited': 'notam_prohibited'
         }
 
-        url = f"{self.base_url}{self.urls[url_map.get(notam_type, 'notam_fir')]}"
+        page = url_map.get(notam_type, 'notam_fir')
+        url = f"{self.base_url}{self.urls[page]}"
         logger.info(f"[INFO] {notam_type.upper()} NOTAM 크롤링: {url}")
 
         try:
-            self.driver.get(url)
-            time.sleep(3)
-
             # 검색
-            try:
-                search_btn = self.driver.find_element(By.CSS_SELECTOR, "button.btn-search, #searchBtn")
-                self.driver.execute_script("arguments[0].click();", search_btn)
-                time.sleep(2)
-            except:
-                pass
-
-            data = self.extract_table_data()
+            data = self.fetch_rows(page, url, "button.btn-search, #searchBtn")
 
             notams = []
             for row in data:
@@ -588,6 +1098,7 @@ class UBIKAISFullCrawler:
 
         except Exception as e:
             logger.error(f"[ERROR] {notam_type} NOTAM 크롤링 오류: {e}")
+            self.last_error = e
             return []
 
     def crawl_atfm(self):
@@ -596,10 +1107,7 @@ class UBIKAISFullCrawler:
         logger.info(f"[INFO] ATFM 메시지 크롤링: {url}")
 
         try:
-            self.driver.get(url)
-            time.sleep(3)
-
-            data = self.extract_table_data()
+            data = self.fetch_rows('atfm_message', url)
 
             messages = []
             for row in data:
@@ -620,6 +1128,7 @@ class UBIKAISFullCrawler:
 
         except Exception as e:
             logger.error(f"[ERROR] ATFM 크롤링 오류: {e}")
+            self.last_error = e
             return []
 
     def crawl_airport_info(self, icao_code):
@@ -628,20 +1137,20 @@ class UBIKAISFullCrawler:
         logger.info(f"[INFO] 공항정보 크롤링: {icao_code}")
 
         try:
-            self.driver.get(url)
-            time.sleep(3)
+            self.open_page(url, 'airport_info')
 
             # 공항 기본정보 추출
             info = {
                 'icao_code': icao_code,
                 'name_ko': self.airports.get(icao_code, ''),
-                'data': self.extract_table_data()
+                'data': self.extract_table_data('airport_info')
             }
 
             return info
 
         except Exception as e:
             logger.error(f"[ERROR] 공항정보 크롤링 오류 ({icao_code}): {e}")
+            self.last_error = e
             return None
 
     def crawl_aero_data(self, data_type='airport'):
@@ -655,103 +1164,22 @@ class UBIKAISFullCrawler:
             'ats': 'aero_ats'
         }
 
-        url = f"{self.base_url}{self.urls[url_map.get(data_type, 'aero_airport')]}"
+        page = url_map.get(data_type, 'aero_airport')
+        url = f"{self.base_url}{self.urls[page]}"
         logger.info(f"[INFO] AERO-DATA ({data_type}) 크롤링: {url}")
 
         try:
-            self.driver.get(url)
-            time.sleep(3)
-
             # 검색
-            try:
-                search_btn = self.driver.find_element(By.CSS_SELECTOR, "button.btn-search, #searchBtn")
-                self.driver.execute_script("arguments[0].click();", search_btn)
-                time.sleep(2)
-            except:
-                pass
-
-            data = self.extract_table_data()
+            data = self.fetch_rows(page, url, "button.btn-search, #searchBtn")
 
             logger.info(f"[OK] AERO-DATA ({data_type}) {len(data)}개 추출")
             return data
 
         except Exception as e:
             logger.error(f"[ERROR] AERO-DATA ({data_type}) 크롤링 오류: {e}")
+            self.last_error = e
             return []
 
-    def save_to_database(self, data, data_type, crawl_timestamp):
-        """데이터를 DB에 저장"""
-        if not data:
-            return 0
-
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        saved_count = 0
-
-        try:
-            if data_type in ['departure', 'arrival', 'VFR']:
-                for item in data:
-                    try:
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO flight_plans
-                            (crawl_timestamp, plan_type, flight_number, aircraft_type,
-                             registration, origin, destination, std, etd, atd, sta, eta, status, nature)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            crawl_timestamp, item.get('plan_type'), item.get('flight_number'),
-                            item.get('aircraft_type'), item.get('registration'),
-                            item.get('origin'), item.get('destination'),
-                            item.get('std'), item.get('etd'), item.get('atd'),
-                            item.get('sta'), item.get('eta'),
-                            item.get('status'), item.get('nature')
-                        ))
-                        saved_count += 1
-                    except Exception as e:
-                        logger.debug(f"저장 오류: {e}")
-
-            elif data_type in ['metar', 'taf', 'sigmet', 'admet']:
-                for item in data:
-                    try:
-                        cursor.execute('''
-                            INSERT INTO weather
-                            (crawl_timestamp, weather_type, airport, observation_time, raw_text)
-                            VALUES (?, ?, ?, ?, ?)
-                        ''', (
-                            crawl_timestamp, item.get('weather_type'),
-                            item.get('airport'), item.get('observation_time'),
-                            item.get('raw_text')
-                        ))
-                        saved_count += 1
-                    except Exception as e:
-                        logger.debug(f"저장 오류: {e}")
-
-            elif data_type in ['fir', 'ad', 'snow', 'prohibited']:
-                for item in data:
-                    try:
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO notams
-                            (crawl_timestamp, notam_type, notam_id, location, qcode,
-                             start_time, end_time, message)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            crawl_timestamp, item.get('notam_type'), item.get('notam_id'),
-                            item.get('location'), item.get('qcode'),
-                            item.get('start_time'), item.get('end_time'),
-                            item.get('message')
-                        ))
-                        saved_count += 1
-                    except Exception as e:
-                        logger.debug(f"저장 오류: {e}")
-
-            conn.commit()
-
-        except Exception as e:
-            logger.error(f"[ERROR] DB 저장 오류: {e}")
-        finally:
-            conn.close()
-
-        return saved_count
-
     def save_to_json(self, all_data, crawl_timestamp):
         """모든 데이터를 JSON으로 저장"""
         output = {
@@ -776,86 +1204,100 @@ class UBIKAISFullCrawler:
 
         logger.info("[OK] JSON 파일 저장 완료")
 
-    def log_crawl(self, crawl_timestamp, data_type, status, records_found,
-                  records_saved, error_message=None, execution_time=0):
-        """크롤링 로그 저장"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT INTO crawl_logs
-            (crawl_timestamp, data_type, status, records_found, records_saved,
-             error_message, execution_time)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (crawl_timestamp, data_type, status, records_found,
-              records_saved, error_message, execution_time))
-
-        conn.commit()
-        conn.close()
-
-    def crawl_all(self):
-        """전체 데이터 크롤링"""
+    # crawl_all 페이지 작업: (결과 키, 크롤링 메서드, 인자, 저장할 data_type 또는 None)
+    # ATFM/AERO-DATA는 JSON으로만 저장
+    CRAWL_TASKS = (
+        ('departures', 'crawl_flight_plans', ('departure',), 'departure'),
+        ('arrivals', 'crawl_flight_plans', ('arrival',), 'arrival'),
+        ('vfr', 'crawl_vfr_plans', (), 'VFR'),
+        ('weather_metar', 'crawl_weather', ('metar',), 'metar'),
+        ('weather_taf', 'crawl_weather', ('taf',), 'taf'),
+        ('weather_sigmet', 'crawl_weather', ('sigmet',), 'sigmet'),
+        ('notam_fir', 'crawl_notam', ('fir',), 'fir'),
+        ('notam_ad', 'crawl_notam', ('ad',), 'ad'),
+        ('notam_snow', 'crawl_notam', ('snow',), 'snow'),
+        ('atfm', 'crawl_atfm', (), None),
+        ('aero_airport', 'crawl_aero_data', ('airport',), None),
+        ('aero_runway', 'crawl_aero_data', ('runway',), None),
+        ('aero_navaid', 'crawl_aero_data', ('navaid',), None),
+    )
+
+    # 작업별 페이지 (캡처한 엔드포인트 조회용)
+    TASK_PAGES = {
+        'departures': 'fpl_departure', 'arrivals': 'fpl_arrival', 'vfr': 'fpl_vfr',
+        'weather_metar': 'weather_metar', 'weather_taf': 'weather_taf', 'weather_sigmet': 'weather_sigmet',
+        'notam_fir': 'notam_fir', 'notam_ad': 'notam_ad', 'notam_snow': 'notam_snow',
+        'atfm': 'atfm_message',
+        'aero_airport': 'aero_airport', 'aero_runway': 'aero_runway', 'aero_navaid': 'aero_navaid',
+    }
+
+    # 크롤링 메서드별 데이터 종류 (데몬 주기 단위, main의 --type 값)
+    TASK_GROUPS = {
+        'crawl_flight_plans': 'fpl', 'crawl_vfr_plans': 'fpl', 'crawl_weather': 'weather',
+        'crawl_notam': 'notam', 'crawl_atfm': 'atfm', 'crawl_aero_data': 'aero',
+    }
+
+    def tasks_for(self, groups):
+        """데이터 종류들에 속한 CRAWL_TASKS 작업"""
+        return [task for task in self.CRAWL_TASKS if self.TASK_GROUPS[task[1]] in groups]
+
+    def browser_sessions_needed(self, sessions, tasks=None):
+        """브라우저로 추출해야 하는 페이지 수만큼만 세션 사용 (모두 직접 호출 가능하면 로그인 세션 하나)"""
+        if FETCH_MODE != 'auto':
+            return sessions
+        pending = sum(1 for key, _, _, _ in (tasks or self.CRAWL_TASKS)
+                      if self.endpoints.get(self.TASK_PAGES[key]) is None)
+        return max(1, min(sessions, pending))
+
+    def crawl_all(self, sessions=CRAWL_SESSIONS, groups=None):
+        """전체(groups가 있으면 해당 데이터 종류만) 크롤링 (페이지는 브라우저 sessions개로 병렬, 저장은 순서대로)"""
         start_time = time.time()
         crawl_timestamp = datetime.now().isoformat()
-        all_data = {}
+        tasks = self.tasks_for(groups) if groups else self.CRAWL_TASKS
+        label = '+'.join(sorted(groups)) if groups else 'all'
 
         try:
             logger.info(f"\n{'='*70}")
-            logger.info(f"[START] UBIKAIS 전체 크롤링 시작: {crawl_timestamp}")
+            logger.info(f"[START] UBIKAIS 크롤링 시작 ({label}): {crawl_timestamp}")
             logger.info(f"{'='*70}")
 
             # 드라이버 초기화
             self.driver = self.init_driver()
 
-            # 로그인
-            if not self.login():
+            # 로그인 (저장된 세션이 유효하면 재사용)
+            if not self.ensure_login():
                 raise Exception("로그인 실패")
 
-            # 1. 비행계획 (IFR 출발/도착)
-            logger.info("\n[STEP 1] 비행계획 크롤링...")
-            departures = self.crawl_flight_plans('departure')
-            all_data['departures'] = departures
-            self.save_to_database(departures, 'departure', crawl_timestamp)
-
-            arrivals = self.crawl_flight_plans('arrival')
-            all_data['arrivals'] = arrivals
-            self.save_to_database(arrivals, 'arrival', crawl_timestamp)
-
-            # 2. VFR 비행계획
-            logger.info("\n[STEP 2] VFR 비행계획 크롤링...")
-            vfr_plans = self.crawl_vfr_plans()
-            all_data['vfr'] = vfr_plans
-            self.save_to_database(vfr_plans, 'VFR', crawl_timestamp)
-
-            # 3. 기상정보
-            logger.info("\n[STEP 3] 기상정보 크롤링...")
-            for weather_type in ['metar', 'taf', 'sigmet']:
-                weather_data = self.crawl_weather(weather_type)
-                all_data[f'weather_{weather_type}'] = weather_data
-                self.save_to_database(weather_data, weather_type, crawl_timestamp)
-
-            # 4. NOTAM
-            logger.info("\n[STEP 4] NOTAM 크롤링...")
-            for notam_type in ['fir', 'ad', 'snow']:
-                notams = self.crawl_notam(notam_type)
-                all_data[f'notam_{notam_type}'] = notams
-                self.save_to_database(notams, notam_type, crawl_timestamp)
-
-            # 5. ATFM
-            logger.info("\n[STEP 5] ATFM 크롤링...")
-            atfm = self.crawl_atfm()
-            all_data['atfm'] = atfm
-
-            # 6. AERO-DATA
-            logger.info("\n[STEP 6] AERO-DATA 크롤링...")
-            for aero_type in ['airport', 'runway', 'navaid']:
-                aero_data = self.crawl_aero_data(aero_type)
-                all_data[f'aero_{aero_type}'] = aero_data
-
-            # JSON 저장
-            self.save_to_json(all_data, crawl_timestamp)
+            # 1. 페이지 크롤링: 서로 독립인 페이지 작업을 로그인된 브라우저 풀에서 병렬 실행
+            sessions = self.browser_sessions_needed(sessions, tasks)
+            logger.info(f"\n[STEP 1] 페이지 크롤링 ({len(tasks)}개, 브라우저 세션 {sessions}개)...")
+            pool = BrowserPool(self, sessions)
+            try:
+                results = pool.run([(key, method, args) for key, method, args, _ in tasks])
+            finally:
+                pool.close()
+            # 세션 사용 시각 갱신 (서버가 쿠키를 새로 줬으면 그것도 저장)
+            self.save_login()
+
+            # 2. DB 저장: 한 스레드에서 작업 순서대로 (모두 같은 crawl_timestamp = 한 크롤링 세대)
+            logger.info("\n[STEP 2] DB 저장...")
+            all_data = {key: results[key] for key, _, _, _ in tasks}
+            saved_total, type_logs = self.save_results(tasks, results, crawl_timestamp)
+
+            # JSON 저장 (일부 종류만 크롤링했으면 통합 JSON의 나머지 종류는 유지)
+            json_data = all_data
+            if groups:
+                try:
+                    with open('ubikais_data.json', encoding='utf-8') as f:
+                        json_data = {**json.load(f).get('data', {}), **all_data}
+                except (OSError, ValueError):
+                    pass
+            self.save_to_json(json_data, crawl_timestamp)
 
             execution_time = time.time() - start_time
+            self.log_crawl(crawl_timestamp, label, 'SUCCESS',
+                           sum(len(v) for v in all_data.values() if isinstance(v, list)),
+                           saved_total, None, execution_time, type_logs)
 
             # 통계 출력
             logger.info(f"\n{'='*70}")
@@ -865,6 +1307,7 @@ class UBIKAISFullCrawler:
                 count = len(value) if isinstance(value, list) else 1
                 logger.info(f"  - {key}: {count}개")
             logger.info(f"  - 실행시간: {execution_time:.2f}초")
+            self.log_wait_stats()
 
             return {
                 'status': 'SUCCESS',
@@ -876,6 +1319,7 @@ class UBIKAISFullCrawler:
             execution_time = time.time() - start_time
             error_msg = str(e)
             logger.error(f"[ERROR] 크롤링 실패: {error_msg}")
+            self.log_crawl(crawl_timestamp, label, 'FAILED', 0, 0, error_msg, execution_time)
 
             return {
                 'status': 'FAILED',
@@ -888,6 +1332,211 @@ class UBIKAISFullCrawler:
                 self.driver.quit()
 
 
+class ControlHandler(socketserver.StreamRequestHandler):
+    """제어 소켓 연결 하나: 명령 한 줄을 데몬에 전달하고 JSON 한 줄로 응답"""
+
+    def handle(self):
+        line = self.rfile.readline(1024).decode('utf-8', 'replace').strip()
+        try:
+            reply = self.server.crawl_daemon.command(line)
+        except ValueError as e:
+            reply = {'status': 'error', 'message': str(e)}
+        self.wfile.write((json.dumps(reply, ensure_ascii=False) + '\n').encode('utf-8'))
+
+
+class ControlServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def send_control(command, port=CONTROL_PORT):
+    """실행 중인 데몬에 제어 명령 전송 -> 응답"""
+    with socket.create_connection((CONTROL_HOST, port), timeout=10) as conn:
+        conn.sendall(command.encode('utf-8') + b'\n')
+        return json.loads(conn.makefile('rb').readline())
+
+
+class CrawlDaemon:
+    """브라우저를 띄워 둔 채 데이터 종류별 주기로 크롤링 (--daemon)
+
+    로그인된 브라우저 풀을 크롤링 사이에도 유지하고, 페이지 이동 수나 메모리가 기준을 넘은
+    세션만 재시작한다. 크롤링은 메인 스레드에서 하나씩 실행하며, 제어 소켓은 명령을 큐에 넣기만 한다.
+
+    제어 명령: crawl [종류|all ...], status, recycle, stop
+    """
+
+    def __init__(self, crawler, schedule, sessions=CRAWL_SESSIONS, port=CONTROL_PORT):
+        self.crawler = crawler
+        self.schedule = schedule
+        self.sessions = sessions
+        self.port = port
+        self.pool = None
+        self.commands = queue.Queue()
+        self.requested = set()
+        self.stopping = False
+        # 결과 키 -> 최근 결과 (ubikais_data.json에 합쳐 저장)
+        self.latest = {}
+        # 종류 -> 마지막 크롤링 결과
+        self.history = {}
+        self._lock = threading.Lock()
+
+        # 주기가 있는 종류는 시작하자마자 한 번 크롤링
+        now = time.monotonic()
+        self.next_run = {group: now for group, interval in schedule.items() if interval > 0}
+
+    def command(self, line):
+        """제어 명령 처리 (제어 소켓 스레드에서 호출)"""
+        name, *args = line.split() or ['']
+        if name == 'crawl':
+            groups = set(DEFAULT_DAEMON_SCHEDULE) if not args or 'all' in args else set(args)
+            unknown = groups - set(DEFAULT_DAEMON_SCHEDULE)
+            if unknown:
+                raise ValueError(f"unknown crawl type: {', '.join(sorted(unknown))}")
+            self.commands.put(('crawl', groups))
+            return {'status': 'queued', 'types': sorted(groups)}
+        if name in ('recycle', 'stop'):
+            self.commands.put((name, None))
+            return {'status': 'queued'}
+        if name == 'status':
+            return {'status': 'success', 'data': self.snapshot()}
+        raise ValueError(f"unknown command: {line!r} (crawl [type|all ...], status, recycle, stop)")
+
+    def snapshot(self):
+        """데몬 상태: 다음 크롤링까지 남은 시간, 종류별 마지막 결과, 브라우저 세션별 페이지 수/메모리"""
+        now = time.monotonic()
+        with self._lock:
+            next_run = {group: round(max(0.0, at - now), 1) for group, at in self.next_run.items()}
+            history = dict(self.history)
+        browsers = []
+        pool = self.pool
+        for session in (pool.sessions if pool else []):
+            memory_mb = browser_memory_mb(session.driver)
+            browsers.append({'pages': session.pages_loaded,
+                             'memory_mb': round(memory_mb, 1) if memory_mb is not None else None})
+        return {
+            'schedule': self.schedule,
+            'next_run_in': next_run,
+            'pending': sorted(self.requested),
+            'last_crawl': history,
+            'browsers': browsers,
+            'fetch_mode': FETCH_MODE
+        }
+
+    def run(self):
+        """제어 소켓을 열고 stop 명령(또는 SIGTERM/Ctrl+C)까지 크롤링 반복"""
+        server = ControlServer((CONTROL_HOST, self.port), ControlHandler)
+        server.crawl_daemon = self
+        threading.Thread(target=server.serve_forever, name='ubikais-control', daemon=True).start()
+        signal.signal(signal.SIGTERM, lambda *_: self.commands.put(('stop', None)))
+        logger.info(f"[START] 크롤러 데몬 시작 (제어 소켓 {CONTROL_HOST}:{self.port}, 주기 {self.schedule})")
+
+        try:
+            while not self.stopping:
+                self.wait_for_work()
+                groups = self.due_groups()
+                if groups and not self.stopping:
+                    self.crawl(groups)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
+            self.close_browsers()
+            self.crawler.log_wait_stats()
+            logger.info("[OK] 크롤러 데몬 종료")
+
+    def wait_for_work(self):
+        """다음 주기 크롤링 시각까지 제어 명령을 기다리며 처리"""
+        with self._lock:
+            wake_at = min(self.next_run.values(), default=None)
+        timeout = None if wake_at is None else max(0.0, wake_at - time.monotonic())
+        try:
+            commands = [self.commands.get(timeout=timeout)]
+        except queue.Empty:
+            return
+        while not self.commands.empty():
+            commands.append(self.commands.get_nowait())
+
+        for name, groups in commands:
+            if name == 'crawl':
+                self.requested |= groups
+            elif name == 'recycle' and self.pool:
+                self.pool.recycle(max_pages=0)
+            elif name == 'stop':
+                self.stopping = True
+
+    def due_groups(self):
+        """주기가 된 종류 + 수동 요청된 종류"""
+        now = time.monotonic()
+        with self._lock:
+            groups = {group for group, at in self.next_run.items() if at <= now}
+        groups |= self.requested
+        self.requested = set()
+        return groups
+
+    def start_browsers(self):
+        """브라우저 띄우고 로그인 후 세션 풀 구성"""
+        self.crawler.driver = self.crawler.init_driver()
+        if not self.crawler.ensure_login():
+            raise Exception("로그인 실패")
+        self.pool = BrowserPool(self.crawler, self.crawler.browser_sessions_needed(self.sessions))
+
+    def close_browsers(self):
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+        if self.crawler.driver:
+            try:
+                self.crawler.driver.quit()
+            except Exception:
+                pass
+            self.crawler.driver = None
+
+    def crawl(self, groups):
+        """데이터 종류들 크롤링 후 저장 (실패하면 브라우저를 닫고 다음 크롤링에서 새로 시작)"""
+        tasks = self.crawler.tasks_for(groups)
+        label = '+'.join(sorted(groups))
+        started = time.time()
+        crawl_timestamp = datetime.now().isoformat()
+        logger.info(f"[START] 크롤링 ({label}, 페이지 {len(tasks)}개): {crawl_timestamp}")
+
+        try:
+            if self.pool is not None and not self.pool.sessions:
+                # 재시작에 실패해 모든 세션이 빠진 풀은 브라우저를 새로 띄워 다시 구성
+                self.close_browsers()
+            if self.pool is None:
+                self.start_browsers()
+            results = self.pool.run([(key, method, args) for key, method, args, _ in tasks])
+            self.crawler.save_login()
+
+            saved, type_logs = self.crawler.save_results(tasks, results, crawl_timestamp)
+            self.latest.update((key, results[key]) for key, _, _, _ in tasks)
+            self.crawler.save_to_json(self.latest, crawl_timestamp)
+
+            records = sum(len(results[key]) for key, _, _, _ in tasks if isinstance(results[key], list))
+            execution_time = time.time() - started
+            self.crawler.log_crawl(crawl_timestamp, label, 'SUCCESS', records, saved, None, execution_time,
+                                   type_logs)
+            result = {'status': 'SUCCESS', 'records': records, 'saved': saved}
+            logger.info(f"[OK] 크롤링 완료 ({label}): {records}개, 저장 {saved}개, {execution_time:.2f}초")
+        except Exception as e:
+            execution_time = time.time() - started
+            logger.error(f"[ERROR] 크롤링 실패 ({label}): {e}")
+            self.crawler.log_crawl(crawl_timestamp, label, 'FAILED', 0, 0, str(e), execution_time)
+            result = {'status': 'FAILED', 'error': str(e)}
+            self.close_browsers()
+
+        now = time.monotonic()
+        with self._lock:
+            for group in groups:
+                if self.schedule.get(group, 0) > 0:
+                    self.next_run[group] = now + self.schedule[group]
+                self.history[group] = {'at': crawl_timestamp, 'seconds': round(execution_time, 2), **result}
+
+        if self.pool:
+            self.pool.recycle()
+
+
 def main():
     """메인 실행"""
     import argparse
@@ -896,15 +1545,32 @@ def main():
     parser.add_argument('--headless', action='store_true', help='Run in headless mode')
     parser.add_argument('--type', choices=['all', 'fpl', 'weather', 'notam', 'atfm', 'aero'],
                         default='all', help='Data type to crawl')
+    parser.add_argument('--sessions', type=int, default=CRAWL_SESSIONS,
+                        help='Parallel browser sessions sharing one login')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Keep browsers running and crawl each data type on its own schedule')
+    parser.add_argument('--schedule', default=os.environ.get('UBIKAIS_DAEMON_SCHEDULE', ''),
+                        help='Daemon crawl intervals in seconds, e.g. "fpl=300,notam=600" (0 = on demand only)')
+    parser.add_argument('--control-port', type=int, default=CONTROL_PORT,
+                        help='Daemon control socket port (localhost)')
+    parser.add_argument('--control', metavar='COMMAND',
+                        help='Send a command to a running daemon: "crawl [type|all ...]", status, recycle, stop')
     args = parser.parse_args()
 
+    if args.control:
+        try:
+            print(json.dumps(send_control(args.control, args.control_port), ensure_ascii=False, indent=2))
+        except OSError as e:
+            print(f"[FAIL] 크롤러 데몬에 연결할 수 없음 ({CONTROL_HOST}:{args.control_port}): {e}")
+        return
+
     crawler = UBIKAISFullCrawler(headless=args.headless)
 
-    if args.type == 'all':
-        result = crawler.crawl_all()
-    else:
-        # 개별 크롤링 (추후 구현)
-        result = crawler.crawl_all()
+    if args.daemon:
+        CrawlDaemon(crawler, parse_schedule(args.schedule), args.sessions, args.control_port).run()
+        return
+
+    result = crawler.crawl_all(args.sessions, None if args.type == 'all' else {args.type})
 
     if result['status'] == 'SUCCESS':
         print(f"\n[OK] 크롤링 성공! 실행시간: {result['execution_time']:.2f}초")
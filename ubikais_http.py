@@ -0,0 +1,368 @@
+"""
+UBIKAIS HTTP 공용 모듈
+API 서버(ubikais_api_server.py)와 Lambda(lambda_handler.py)가 함께 사용하는
+조건부 요청(ETag/Last-Modified), JSON 직렬화, 응답 압축, 응답 캐시,
+동일 요청 합치기(single-flight), 클라이언트별 요청 제한(token bucket) 헬퍼
+(orjson, brotli는 설치되어 있을 때만 사용)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from ubikais_db import generation_timestamp
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 이 크기(바이트) 미만의 응답은 압축하지 않음
+COMPRESSION_MIN_SIZE = int(os.environ.get('UBIKAIS_COMPRESSION_MIN_SIZE', 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# 응답 캐시 최대 항목 수 (API 서버)
+RESPONSE_CACHE_SIZE = int(os.environ.get('UBIKAIS_RESPONSE_CACHE_SIZE', 256))
+
+# 캐시 미스인 동일 요청(경로+쿼리+크롤링 세대)을 DB 조회 한 번으로 합침 (0이면 끔)
+COALESCE_REQUESTS = os.environ.get('UBIKAIS_COALESCE', '1') != '0'
+
+# 클라이언트 IP별 요청 제한: 초당 요청 수, 순간 허용량, 추적할 최대 클라이언트 수
+# UBIKAIS_RATE_LIMIT를 지정해야 켜진다 (기본 0 = 끔).
+# 리버스 프록시/로드밸런서 뒤에서 켤 때는 UBIKAIS_TRUST_PROXY=1도 함께 설정해야 한다.
+# 그렇지 않으면 모든 요청이 프록시 주소 하나로 묶여 전체 클라이언트가 한 버킷을 나눠 쓴다.
+RATE_LIMIT = float(os.environ.get('UBIKAIS_RATE_LIMIT', 0))
+RATE_LIMIT_BURST = float(os.environ.get('UBIKAIS_RATE_LIMIT_BURST', 40))
+RATE_LIMIT_CLIENTS = int(os.environ.get('UBIKAIS_RATE_LIMIT_CLIENTS', 10000))
+# 리버스 프록시 뒤에서 X-Forwarded-For의 첫 주소를 클라이언트 IP로 사용 (프록시 뒤에서는 필수)
+TRUST_PROXY = os.environ.get('UBIKAIS_TRUST_PROXY', '0') == '1'
+
+
+def dumps(obj):
+    """JSON 직렬화 -> UTF-8 bytes (orjson이 있으면 사용, 없으면 표준 json 압축 출력)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, default=str, separators=(',', ':')).encode('utf-8')
+
+
+def to_columnar(data):
+    """dict 리스트를 {'columns': [...], 'rows': [[...], ...]}로 변환 (format=columnar)
+
+    중첩된 dict 안의 레코드 리스트도 변환하며, 그 외 값은 그대로 둔다.
+    """
+    if isinstance(data, dict):
+        return {key: to_columnar(value) for key, value in data.items()}
+    if isinstance(data, list) and all(isinstance(item, dict) for item in data):
+        columns = {}
+        for item in data:
+            for key in item:
+                columns.setdefault(key, None)
+        columns = list(columns)
+        return {
+            'columns': columns,
+            'rows': [[item.get(column) for column in columns] for item in data]
+        }
+    return data
+
+
+def choose_encoding(accept_encoding):
+    """Accept-Encoding에서 응답 압축 방식 선택 (br > gzip, q=0은 제외, 없으면 None)"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+
+    if brotli is not None and accepted.get('br', accepted.get('*', 0)) > 0:
+        return 'br'
+    if accepted.get('gzip', accepted.get('*', 0)) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    """본문 압축 (encoding: 'br' | 'gzip')"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def negotiate_compression(body, accept_encoding, min_size=COMPRESSION_MIN_SIZE):
+    """크기 기준 이상이고 클라이언트가 지원하면 사용할 압축 방식 반환 (아니면 None)"""
+    if len(body) < min_size:
+        return None
+    return choose_encoding(accept_encoding)
+
+
+def etag_for_encoding(etag, encoding):
+    """압축된 표현의 ETag ('"abc"' -> '"abc-gzip"')"""
+    if not etag or not encoding:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def sse_event(event, data, event_id=None):
+    """Server-Sent Events 메시지 (data는 한 줄 JSON)"""
+    lines = [f'event: {event}']
+    if event_id:
+        lines.append(f'id: {event_id}')
+    return ('\n'.join(lines) + '\ndata: ').encode('utf-8') + dumps(data) + b'\n\n'
+
+
+def make_etag(generation, path, params):
+    """크롤링 세대 + 경로 + 정규화된 쿼리 인자로 강한 ETag 생성"""
+    key = json.dumps([generation, path, sorted(params)], ensure_ascii=False, default=str)
+    return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest() + '"'
+
+
+def _parse_crawl_timestamp(crawl_timestamp):
+    """crawl_timestamp(ISO, 크롤러 로컬 시간) -> UTC datetime (초 단위)"""
+    try:
+        dt = datetime.fromisoformat(crawl_timestamp)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.astimezone()
+    return dt.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def conditional_headers(generation, path, params):
+    """200 응답에 붙일 검증자 헤더 (ETag, Last-Modified, Cache-Control)"""
+    headers = {
+        'ETag': make_etag(generation, path, params),
+        'Cache-Control': 'no-cache'
+    }
+    last_modified = _parse_crawl_timestamp(generation_timestamp(generation))
+    if last_modified:
+        headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(headers, if_none_match=None, if_modified_since=None):
+    """조건부 요청 헤더가 현재 검증자와 일치하면 True (304 응답 대상)
+
+    If-None-Match가 있으면 그것만 비교하고(약한 비교), 없을 때만 If-Modified-Since를 본다.
+    """
+    etag = headers.get('ETag')
+    if if_none_match:
+        if if_none_match.strip() == '*':
+            return True
+        # 같은 자원의 압축 표현 ETag("abc-gzip")도 일치로 본다
+        current = {etag, etag_for_encoding(etag, 'gzip'), etag_for_encoding(etag, 'br')}
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        return any(tag in current or tag[2:] in current for tag in candidates)
+
+    last_modified = headers.get('Last-Modified')
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class ResponseCache:
+    """크롤링 세대 단위로 무효화되는 LRU 응답 캐시
+
+    키는 (경로, 정렬된 쿼리 인자), 값은 직렬화된 응답 본문과 압축 방식별 본문이다.
+    새 크롤링 세대가 보이면 전체 항목을 비운다.
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.generation = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def _sync_generation(self, generation):
+        if generation != self.generation:
+            if self._entries:
+                self.stats['invalidations'] += 1
+            self._entries.clear()
+            self.generation = generation
+
+    def get(self, key, generation):
+        """캐시 조회 (없으면 None)"""
+        with self._lock:
+            self._sync_generation(generation)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+
+    def put(self, key, generation, entry):
+        """캐시 저장 (조회 이후 세대가 바뀌었으면 버림)"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def snapshot(self):
+        """캐시 상태 및 적중 통계"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'generation': self.generation,
+                **self.stats
+            }
+
+
+def cached_body(entry, accept_encoding, headers):
+    """캐시 항목 (body, mimetype, encoded)에서 Accept-Encoding에 맞는 본문 선택
+
+    압축 결과는 entry의 encoded에 보관해 같은 세대 동안 재사용하고,
+    headers(검증자)에 Content-Encoding, 압축 표현 ETag, Vary를 반영한다.
+    """
+    body, _, encoded = entry
+    encoding = negotiate_compression(body, accept_encoding)
+    if encoding:
+        if encoding not in encoded:
+            encoded[encoding] = compress(body, encoding)
+        body = encoded[encoding]
+        if 'ETag' in headers:
+            headers['ETag'] = etag_for_encoding(headers['ETag'], encoding)
+        headers['Content-Encoding'] = encoding
+    headers['Vary'] = 'Accept-Encoding'
+    return body
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 한 번의 실행으로 합침 (스레드용)
+
+    먼저 온 호출만 fn()을 실행하고, 실행 중에 들어온 같은 키의 호출은
+    그 결과(또는 예외)를 그대로 받는다. 크롤링 직후 캐시가 비었을 때
+    같은 SELECT가 동시에 수십 번 실행되는 것을 막는다.
+    """
+
+    def __init__(self, enabled=COALESCE_REQUESTS):
+        self.enabled = enabled
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.stats = {'executions': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        if not self.enabled:
+            return fn()
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats['executions'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def snapshot(self):
+        """합치기 상태 및 통계"""
+        with self._lock:
+            return {'enabled': self.enabled, 'in_flight': len(self._flights), **self.stats}
+
+
+class RateLimiter:
+    """클라이언트별 token bucket 요청 제한
+
+    클라이언트마다 burst개까지 토큰을 쌓고 초당 rate개씩 채운다.
+    추적 중인 클라이언트가 max_clients를 넘으면 가장 오래 안 보인 클라이언트부터 잊는다.
+    """
+
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_LIMIT_BURST, max_clients=RATE_LIMIT_CLIENTS):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'allowed': 0, 'limited': 0}
+
+    def check(self, client):
+        """요청 1개 소비 -> 허용이면 0, 제한이면 다음 토큰까지 남은 초"""
+        if self.rate <= 0:
+            return 0
+
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+                self.stats['allowed'] += 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.stats['limited'] += 1
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def snapshot(self):
+        """요청 제한 설정 및 통계"""
+        with self._lock:
+            return {
+                'enabled': self.rate > 0,
+                'rate': self.rate,
+                'burst': self.burst,
+                'clients': len(self._buckets),
+                **self.stats
+            }
+
+
+def client_address(remote_addr, forwarded_for=None):
+    """요청 제한 키로 쓸 클라이언트 IP (TRUST_PROXY면 X-Forwarded-For 첫 주소)"""
+    if TRUST_PROXY and forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return remote_addr or 'unknown'
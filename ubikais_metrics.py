@@ -0,0 +1,160 @@
+"""
+UBIKAIS API 계측 모듈
+경로별 지연시간 히스토그램, 요청당 SQL 실행 시간/쿼리 수/행 수, 응답 바이트를 집계한다.
+API 서버(Flask/ASGI)는 /metrics(Prometheus 텍스트 형식)로, Lambda는 요청별 JSON 로그 한 줄로 내보낸다.
+
+SQL 계측은 ubikais_db.set_query_observer(record_sql)로 받으며, 요청별 누적값은 contextvars에 두어
+Flask 요청 스레드와 ASGI 태스크(DB 스레드로 컨텍스트 복사) 모두에서 요청 단위로 묶인다.
+"""
+
+import contextvars
+import threading
+import time
+
+# 지연시간 히스토그램 경계 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 현재 요청의 SQL 누적값 {'queries', 'seconds', 'rows'} (요청 밖이면 None)
+_request_sql = contextvars.ContextVar('ubikais_request_sql', default=None)
+
+
+def record_sql(seconds, rows):
+    """ubikais_db 쿼리 관찰자: 현재 요청에 SQL 실행 시간/행 수 누적"""
+    stats = _request_sql.get()
+    if stats is not None:
+        stats['queries'] += 1
+        stats['seconds'] += seconds
+        stats['rows'] += rows
+
+
+def begin_request():
+    """요청 시작: 현재 컨텍스트의 SQL 누적값 초기화 후 시작 시각 반환"""
+    _request_sql.set({'queries': 0, 'seconds': 0.0, 'rows': 0})
+    return time.perf_counter()
+
+
+def request_sample(route, status, started, response_bytes):
+    """요청 하나의 계측값 (Lambda 로그 한 줄, 레지스트리 집계 입력)"""
+    sql = _request_sql.get() or {'queries': 0, 'seconds': 0.0, 'rows': 0}
+    return {
+        'route': route,
+        'status': status,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+        'sql_ms': round(sql['seconds'] * 1000, 3),
+        'sql_queries': sql['queries'],
+        'rows': sql['rows'],
+        'response_bytes': response_bytes
+    }
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram 형식)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """경로/상태 코드별 계측 집계 (프로세스당 하나, 스레드 안전)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+        self._collectors = []
+        self.started_at = time.time()
+
+    def register(self, name, metric_type, help_text, read):
+        """요청 외부 상태 값 등록 (render 때마다 read()로 읽어 출력, 예: 요청 합치기/제한 통계)"""
+        self._collectors.append((name, metric_type, help_text, read))
+
+    def observe(self, sample):
+        """request_sample() 결과 집계"""
+        key = (sample['route'], str(sample['status']))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'latency': Histogram(self.buckets),
+                    'sql': Histogram(self.buckets),
+                    'sql_queries': 0,
+                    'rows': 0,
+                    'response_bytes': 0
+                }
+            series['latency'].observe(sample['duration_ms'] / 1000)
+            series['sql'].observe(sample['sql_ms'] / 1000)
+            series['sql_queries'] += sample['sql_queries']
+            series['rows'] += sample['rows']
+            series['response_bytes'] += sample['response_bytes']
+
+    def finish_request(self, route, status, started, response_bytes):
+        """요청 종료: 계측값 집계 후 반환"""
+        sample = request_sample(route, status, started, response_bytes)
+        self.observe(sample)
+        return sample
+
+    def render(self):
+        """Prometheus 텍스트 형식"""
+        with self._lock:
+            series = sorted(self._series.items())
+            lines = []
+            self._render_histogram(
+                lines, series, 'latency', 'ubikais_request_duration_seconds',
+                'Request latency by route and status')
+            self._render_histogram(
+                lines, series, 'sql', 'ubikais_request_sql_seconds',
+                'SQL execution time (execute + fetch) per request')
+            for field, name, help_text in (
+                ('sql_queries', 'ubikais_sql_queries_total', 'SQL statements executed'),
+                ('rows', 'ubikais_sql_rows_total', 'Rows returned by SQL statements'),
+                ('response_bytes', 'ubikais_response_bytes_total', 'Response body bytes sent (after compression)')
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for (route, status), values in series:
+                    lines.append(f'{name}{_labels(route=route, status=status)} {values[field]}')
+
+        for name, metric_type, help_text, read in self._collectors:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            lines.append(f'{name} {read()}')
+
+        lines.append('# HELP ubikais_process_start_time_seconds Start time of the process')
+        lines.append('# TYPE ubikais_process_start_time_seconds gauge')
+        lines.append(f'ubikais_process_start_time_seconds {self.started_at:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def _render_histogram(self, lines, series, field, name, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (route, status), values in series:
+            histogram = values[field]
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'{name}_bucket{_labels(route=route, status=status, le=_number(bound))} {count}')
+            lines.append(f'{name}_bucket{_labels(route=route, status=status, le="+Inf")} {histogram.count}')
+            lines.append(f'{name}_sum{_labels(route=route, status=status)} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{_labels(route=route, status=status)} {histogram.count}')
+
+
+def _number(value):
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
@@ -0,0 +1,77 @@
+"""
+UBIKAIS 로그인 세션 보관 모듈
+크롤러(ubikais_crawler.py, ubikais_full_crawler.py)가 로그인 쿠키를 파일에 저장하고
+다음 실행에서 브라우저에 다시 넣어 로그인 폼 입력을 건너뛴다.
+
+만료시각이 있는 쿠키는 그 시각까지, 세션 쿠키(JSESSIONID 등)는 마지막 사용 후
+SESSION_MAX_AGE초까지만 재사용하며, 서버가 세션을 거부하면(로그인 페이지로 이동) 파일을 지운다.
+"""
+
+import json
+import os
+import time
+
+SESSION_PATH = os.environ.get('UBIKAIS_SESSION_PATH', 'ubikais_session.json')
+# 세션 쿠키의 재사용 한도 (초, 서버 세션 유휴 만료보다 짧게)
+SESSION_MAX_AGE = float(os.environ.get('UBIKAIS_SESSION_MAX_AGE', 1800))
+
+LOGIN_PATH = '/common/login'
+
+
+def is_login_page(url):
+    """로그인 페이지로 이동했는지 (세션 없음/만료)"""
+    return LOGIN_PATH in url
+
+
+def load_session(username, path=SESSION_PATH):
+    """저장된 로그인 쿠키 (없거나 다른 계정이거나 만료됐으면 None)"""
+    if not path:
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    now = time.time()
+    if saved.get('username') != username or now - saved.get('saved_at', 0) > SESSION_MAX_AGE:
+        return None
+    cookies = [cookie for cookie in saved.get('cookies', [])
+               if cookie.get('expiry') is None or cookie['expiry'] > now]
+    return cookies or None
+
+
+def save_session(username, cookies, path=SESSION_PATH):
+    """로그인 쿠키 저장 (소유자만 읽을 수 있는 파일, 저장 시각 = 마지막 사용 시각)"""
+    if not path or not cookies:
+        return
+    tmp_path = f'{path}.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'username': username, 'saved_at': time.time(), 'cookies': cookies}, f)
+    os.replace(tmp_path, path)
+
+
+def clear_session(path=SESSION_PATH):
+    """서버가 거부한 세션 파일 삭제"""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def restore_session(driver, base_url, cookies):
+    """쿠키를 브라우저에 넣고 로그인 상태인지 확인 (첫 페이지 한 번 이동)"""
+    if not cookies:
+        return False
+    # 쿠키는 해당 도메인 페이지에 있을 때만 추가 가능
+    driver.get(base_url)
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except Exception:
+            pass
+    driver.get(base_url)
+    return not is_login_page(driver.current_url)
@@ -0,0 +1,737 @@
+"""
+UBIKAIS 크롤링 결과 저장 모듈
+크롤러(ubikais_full_crawler.py)가 쓰는 SQLite 스키마, 저장/변경 기록, 크롤링 로그.
+selenium 없이 동작하므로 벤치마크(ubikais_benchmark.py)의 합성 DB 생성도 같은 경로를 쓴다.
+"""
+
+import json
+import logging
+import sqlite3
+
+from ubikais_db import (GENERATION_STATS_KEY, ROUTE_LOOKUP_COLUMNS, STATS_TABLES, WEATHER_COLUMNS,
+                        normalize_icao, normalize_ident)
+
+logger = logging.getLogger(__name__)
+
+
+class UBIKAISStore:
+    """UBIKAIS 크롤링 결과 DB (스키마 생성/마이그레이션, 저장, 크롤링 로그)"""
+
+    def __init__(self, db_name='ubikais_full.db'):
+        self.db_name = db_name
+        self.fts_enabled = False
+        # 마지막 log_crawl 이후 저장에서 실제로 바뀐 행 수 (크롤링 세대를 올릴지 판단)
+        self.pending_changes = 0
+        self.setup_database()
+
+    def setup_database(self):
+        """SQLite 데이터베이스 초기화"""
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+
+        # WAL 모드: API 서버의 읽기 전용 커넥션이 크롤링 중에도 블로킹되지 않도록
+        cursor.execute('PRAGMA journal_mode=WAL')
+
+        # 비행계획 테이블 (IFR/VFR)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS flight_plans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_timestamp TEXT,
+                plan_type TEXT,
+                flight_number TEXT,
+                aircraft_type TEXT,
+                registration TEXT,
+                origin TEXT,
+                destination TEXT,
+                std TEXT,
+                etd TEXT,
+                atd TEXT,
+                sta TEXT,
+                eta TEXT,
+                ata TEXT,
+                status TEXT,
+                nature TEXT,
+                route TEXT,
+                remarks TEXT,
+                flight_number_norm TEXT,
+                registration_norm TEXT,
+                origin_icao TEXT,
+                destination_icao TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(flight_number, std, origin, destination, plan_type)
+            )
+        ''')
+
+        # NOTAM 테이블
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notams (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_timestamp TEXT,
+                notam_type TEXT,
+                notam_id TEXT UNIQUE,
+                location TEXT,
+                fir TEXT,
+                qcode TEXT,
+                start_time TEXT,
+                end_time TEXT,
+                message TEXT,
+                location_icao TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 기상정보 테이블
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS weather (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_timestamp TEXT,
+                weather_type TEXT,
+                airport TEXT,
+                observation_time TEXT,
+                raw_text TEXT,
+                visibility TEXT,
+                wind_speed TEXT,
+                wind_direction TEXT,
+                temperature TEXT,
+                dewpoint TEXT,
+                pressure TEXT,
+                weather_phenomena TEXT,
+                clouds TEXT,
+                airport_icao TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # ATFM 메시지 테이블
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS atfm_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_timestamp TEXT,
+                message_type TEXT,
+                airport TEXT,
+                effective_time TEXT,
+                end_time TEXT,
+                reason TEXT,
+                capacity TEXT,
+                message TEXT,
+                airport_icao TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 공항정보 테이블
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS airport_info (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_timestamp TEXT,
+                icao_code TEXT,
+                iata_code TEXT,
+                name_ko TEXT,
+                name_en TEXT,
+                latitude TEXT,
+                longitude TEXT,
+                elevation TEXT,
+                runway_info TEXT,
+                operating_hours TEXT,
+                contact TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(icao_code)
+            )
+        ''')
+
+        # AERO-DATA 테이블
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS aero_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_timestamp TEXT,
+                data_type TEXT,
+                airport TEXT,
+                identifier TEXT,
+                data_json TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 크롤링 로그 테이블
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_timestamp TEXT,
+                data_type TEXT,
+                status TEXT,
+                records_found INTEGER,
+                records_saved INTEGER,
+                error_message TEXT,
+                execution_time REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 변경 로그 테이블 (/api/changes: 크롤링 세대 사이의 추가/변경/만료 행)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                crawl_timestamp TEXT,
+                table_name TEXT,
+                change_type TEXT,
+                row_id INTEGER,
+                row_key TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        self.migrate_normalized_columns(cursor)
+        self.create_weather_latest(cursor)
+        self.create_route_lookup(cursor)
+        self.create_notam_fts(cursor)
+        self.create_indexes(cursor)
+        self.create_table_stats(cursor)
+
+        conn.commit()
+        conn.close()
+
+    # 검색용 정규화 컬럼: 테이블 -> [(정규화 컬럼, 원본 컬럼, 정규화 함수)]
+    NORMALIZED_COLUMNS = {
+        'flight_plans': [
+            ('flight_number_norm', 'flight_number', normalize_ident),
+            ('registration_norm', 'registration', normalize_ident),
+            ('origin_icao', 'origin', normalize_icao),
+            ('destination_icao', 'destination', normalize_icao),
+        ],
+        'weather': [('airport_icao', 'airport', normalize_icao)],
+        'notams': [('location_icao', 'location', normalize_icao)],
+        'atfm_messages': [('airport_icao', 'airport', normalize_icao)],
+    }
+
+    def migrate_normalized_columns(self, cursor):
+        """기존 DB에 정규화 컬럼 추가 후 기존 행 채우기 (컬럼 추가 시 1회)"""
+        for table, columns in self.NORMALIZED_COLUMNS.items():
+            existing = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+            for norm_column, raw_column, normalizer in columns:
+                if norm_column in existing:
+                    continue
+                logger.info(f"[INFO] 컬럼 추가: {table}.{norm_column}")
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {norm_column} TEXT')
+                rows = cursor.execute(
+                    f'SELECT id, {raw_column} FROM {table} WHERE {raw_column} IS NOT NULL'
+                ).fetchall()
+                cursor.executemany(
+                    f'UPDATE {table} SET {norm_column} = ? WHERE id = ?',
+                    [(normalizer(value), row_id) for row_id, value in rows]
+                )
+
+    # weather와 weather_latest가 공유하는 컬럼 (테이블별 컬럼 순서와 무관하게 명시)
+    def create_weather_latest(self, cursor):
+        """공항/기상종류별 최신 관측 테이블 생성 (처음 생성 시 weather 이력에서 채움)"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'weather_latest'"
+        ).fetchone()
+
+        # 공항당 1행: /api/weather/metar|taf/<airport>가 기본키 조회로 끝난다
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS weather_latest (
+                id INTEGER,
+                crawl_timestamp TEXT,
+                weather_type TEXT NOT NULL,
+                airport TEXT,
+                observation_time TEXT,
+                raw_text TEXT,
+                visibility TEXT,
+                wind_speed TEXT,
+                wind_direction TEXT,
+                temperature TEXT,
+                dewpoint TEXT,
+                pressure TEXT,
+                weather_phenomena TEXT,
+                clouds TEXT,
+                airport_icao TEXT NOT NULL,
+                created_at TIMESTAMP,
+                PRIMARY KEY (weather_type, airport_icao)
+            ) WITHOUT ROWID
+        ''')
+
+        if not exists:
+            columns = ', '.join(WEATHER_COLUMNS)
+            cursor.execute(f'''
+                INSERT OR REPLACE INTO weather_latest ({columns})
+                SELECT {columns} FROM weather
+                WHERE airport_icao IS NOT NULL AND weather_type IS NOT NULL
+                ORDER BY id
+            ''')
+
+    def update_weather_latest(self, cursor, weather_id):
+        """방금 저장한 weather 행으로 최신 관측 갱신 (save_to_database와 같은 트랜잭션)"""
+        columns = ', '.join(WEATHER_COLUMNS)
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO weather_latest ({columns})
+            SELECT {columns} FROM weather
+            WHERE id = ? AND airport_icao IS NOT NULL AND weather_type IS NOT NULL
+        ''', (weather_id,))
+
+    # route_lookup 키 종류 -> flight_plans 정규화 컬럼
+    ROUTE_LOOKUP_KEYS = {'callsign': 'flight_number_norm', 'registration': 'registration_norm'}
+
+    def _route_lookup_select(self, key_type, where):
+        source = ', '.join('id' if column == 'flight_id' else column for column in ROUTE_LOOKUP_COLUMNS)
+        norm_column = self.ROUTE_LOOKUP_KEYS[key_type]
+        return f'''
+            SELECT '{key_type}', {norm_column}, {source} FROM flight_plans
+            WHERE {where} AND {norm_column} IS NOT NULL
+        '''
+
+    def create_route_lookup(self, cursor):
+        """편명/등록부호별 최신 비행계획 경로 테이블 생성 (처음 생성 시 flight_plans에서 채움)"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'route_lookup'"
+        ).fetchone()
+
+        # 키당 1행: /api/flights/route가 API 프로세스의 메모리 사본(dict)으로 끝난다
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS route_lookup (
+                key_type TEXT NOT NULL,
+                lookup_key TEXT NOT NULL,
+                flight_id INTEGER,
+                flight_number TEXT,
+                aircraft_type TEXT,
+                registration TEXT,
+                origin TEXT,
+                destination TEXT,
+                std TEXT,
+                etd TEXT,
+                atd TEXT,
+                sta TEXT,
+                eta TEXT,
+                status TEXT,
+                PRIMARY KEY (key_type, lookup_key)
+            ) WITHOUT ROWID
+        ''')
+
+        if not exists:
+            columns = ', '.join(('key_type', 'lookup_key') + ROUTE_LOOKUP_COLUMNS)
+            for key_type in self.ROUTE_LOOKUP_KEYS:
+                # 오래된 행부터 덮어써 키별로 최신(created_at, id) 행이 남는다
+                cursor.execute(f'''
+                    INSERT OR REPLACE INTO route_lookup ({columns})
+                    {self._route_lookup_select(key_type, '1=1')}
+                    ORDER BY created_at, id
+                ''')
+
+    def update_route_lookup(self, cursor, flight_id):
+        """방금 저장한 비행계획으로 편명/등록부호 경로 갱신 (save_to_database와 같은 트랜잭션)"""
+        columns = ', '.join(('key_type', 'lookup_key') + ROUTE_LOOKUP_COLUMNS)
+        for key_type in self.ROUTE_LOOKUP_KEYS:
+            cursor.execute(f'''
+                INSERT OR REPLACE INTO route_lookup ({columns})
+                {self._route_lookup_select(key_type, 'id = ?')}
+            ''', (flight_id,))
+
+    def create_table_stats(self, cursor):
+        """테이블별 행 수/마지막 크롤링/마지막 추가 시각 테이블 생성 (처음 생성 시 COUNT(*)로 채움)"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'table_stats'"
+        ).fetchone()
+
+        # /api/status가 테이블 전체를 세지 않고 이 작은 테이블만 읽는다
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS table_stats (
+                table_name TEXT PRIMARY KEY,
+                row_count INTEGER NOT NULL DEFAULT 0,
+                last_crawl TEXT,
+                last_insert TIMESTAMP
+            ) WITHOUT ROWID
+        ''')
+
+        if not exists:
+            for table in STATS_TABLES:
+                cursor.execute(f'''
+                    INSERT OR REPLACE INTO table_stats (table_name, row_count, last_crawl, last_insert)
+                    SELECT ?, COUNT(*), MAX(crawl_timestamp), MAX(created_at) FROM {table}
+                ''', (table,))
+
+    def update_table_stats(self, cursor, table, inserted, crawl_timestamp):
+        """테이블 통계 갱신 (저장과 같은 트랜잭션, inserted = 새로 늘어난 행 수)"""
+        cursor.execute('''
+            INSERT INTO table_stats (table_name, row_count, last_crawl, last_insert)
+            VALUES (?, ?, ?, CASE WHEN ? > 0 THEN CURRENT_TIMESTAMP END)
+            ON CONFLICT (table_name) DO UPDATE SET
+                row_count = row_count + excluded.row_count,
+                last_crawl = MAX(COALESCE(last_crawl, ''), excluded.last_crawl),
+                last_insert = COALESCE(excluded.last_insert, last_insert)
+        ''', (table, inserted, crawl_timestamp, inserted))
+
+    def create_notam_fts(self, cursor):
+        """NOTAM 전문 검색(FTS5) 테이블 생성 (rowid = notams.id, 처음 생성 시 기존 NOTAM 색인)"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notams_fts'"
+        ).fetchone()
+
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS notams_fts
+                USING fts5(notam_id, location, qcode, message)
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning(f"[WARN] FTS5 미지원 SQLite - NOTAM 검색 색인 비활성화: {e}")
+            self.fts_enabled = False
+            return
+
+        self.fts_enabled = True
+        if not exists:
+            cursor.execute('''
+                INSERT INTO notams_fts (rowid, notam_id, location, qcode, message)
+                SELECT id, notam_id, location, qcode, message FROM notams
+            ''')
+
+    # API 쿼리 형태(필터 컬럼 + ORDER BY 컬럼)에 맞춘 보조 인덱스
+    # (ubikais_api_server.py --explain 으로 실행계획 확인)
+    SCHEMA_INDEXES = {
+        # /api/flights
+        'idx_flight_plans_created': 'flight_plans (created_at)',
+        'idx_flight_plans_type_created': 'flight_plans (plan_type, created_at)',
+        'idx_flight_plans_origin_created': 'flight_plans (origin_icao, created_at)',
+        'idx_flight_plans_dest_created': 'flight_plans (destination_icao, created_at)',
+        # /api/flights/departures (ORDER BY std), /api/flights/arrivals (ORDER BY sta)
+        'idx_flight_plans_type_std': 'flight_plans (plan_type, std)',
+        'idx_flight_plans_type_sta': 'flight_plans (plan_type, sta)',
+        'idx_flight_plans_type_origin_std': 'flight_plans (plan_type, origin_icao, std)',
+        'idx_flight_plans_type_dest_sta': 'flight_plans (plan_type, destination_icao, sta)',
+        # /api/flights/search, /api/flights/route
+        'idx_flight_plans_flight_norm': 'flight_plans (flight_number_norm, created_at)',
+        'idx_flight_plans_reg_norm': 'flight_plans (registration_norm, created_at)',
+        # /api/weather, /api/weather/metar|taf/<airport>
+        'idx_weather_type_created': 'weather (weather_type, created_at)',
+        'idx_weather_type_airport_created': 'weather (weather_type, airport_icao, created_at)',
+        # /api/notam, /api/notam/<location>
+        'idx_notams_created': 'notams (created_at)',
+        'idx_notams_type_created': 'notams (notam_type, created_at)',
+        'idx_notams_location_created': 'notams (location_icao, created_at)',
+        # /api/atfm
+        'idx_atfm_created': 'atfm_messages (created_at)',
+        'idx_atfm_airport_created': 'atfm_messages (airport_icao, created_at)',
+        # /api/status (MAX(crawl_timestamp))
+        'idx_crawl_logs_timestamp': 'crawl_logs (crawl_timestamp)',
+        # /api/changes (since 이후 첫 id)
+        'idx_change_log_timestamp': 'change_log (crawl_timestamp)',
+    }
+
+    # 더 이상 쓰지 않는 인덱스 (정규화 컬럼 인덱스로 대체)
+    OBSOLETE_INDEXES = ['idx_flight_plans_reg']
+
+    def create_indexes(self, cursor):
+        """보조 인덱스 생성 (기존 DB에도 적용되는 마이그레이션)"""
+        for name in self.OBSOLETE_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        for name, definition in self.SCHEMA_INDEXES.items():
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+
+    # 변경 판단에 쓰는 비교 컬럼 (크롤러가 저장하는 값 중 자연키 외의 것)
+    FLIGHT_KEY_COLUMNS = ('flight_number', 'std', 'origin', 'destination', 'plan_type')
+    FLIGHT_VALUE_COLUMNS = ('aircraft_type', 'registration', 'etd', 'atd', 'sta', 'eta',
+                            'status', 'nature')
+    NOTAM_VALUE_COLUMNS = ('notam_type', 'location', 'qcode', 'start_time', 'end_time', 'message')
+
+    def log_change(self, cursor, crawl_timestamp, table_name, change_type, row_id, row_key):
+        """change_log 기록 (save_to_database와 같은 트랜잭션)"""
+        cursor.execute('''
+            INSERT INTO change_log (crawl_timestamp, table_name, change_type, row_id, row_key)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (crawl_timestamp, table_name, change_type, row_id,
+              json.dumps(row_key, ensure_ascii=False)))
+
+    def classify_change(self, previous, values, previous_crawl, crawl_timestamp):
+        """기존 행(crawl_timestamp + 비교 컬럼)과 새 값 비교 -> 'insert', 'update' 또는 None
+
+        직전 크롤링에 없던 행(만료 후 다시 나타난 행 포함)은 추가로 본다.
+        """
+        if previous is None or previous[0] not in (previous_crawl, crawl_timestamp):
+            return 'insert'
+        if tuple(previous[1:]) != tuple(values):
+            return 'update'
+        return None
+
+    def touch_row(self, cursor, table, row_id, crawl_timestamp):
+        """값이 바뀌지 않은 행을 이번 크롤링 것으로 표시 (INSERT OR REPLACE와 달리 id 유지)
+
+        created_at도 새 행을 넣을 때처럼 갱신해 목록 정렬(created_at DESC)은 그대로다.
+        """
+        cursor.execute(f'''
+            UPDATE {table} SET crawl_timestamp = ?, created_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', (crawl_timestamp, row_id))
+
+    def previous_crawl_timestamp(self, cursor, table, type_column, data_type, crawl_timestamp):
+        """같은 종류의 직전 크롤링 시각 (이번 저장 전 기준)"""
+        return cursor.execute(f'''
+            SELECT MAX(crawl_timestamp) FROM {table}
+            WHERE {type_column} = ? AND crawl_timestamp < ?
+        ''', (data_type, crawl_timestamp)).fetchone()[0]
+
+    def expire_missing(self, cursor, table, table_name, type_column, key_columns, data_type,
+                       previous_crawl, crawl_timestamp):
+        """직전 크롤링에 있었지만 이번 크롤링에서 빠진 행을 만료로 기록 -> 만료 수"""
+        if previous_crawl is None:
+            return 0
+        rows = cursor.execute(f'''
+            SELECT id, {', '.join(key_columns)} FROM {table}
+            WHERE {type_column} = ? AND crawl_timestamp = ?
+        ''', (data_type, previous_crawl)).fetchall()
+        for row in rows:
+            key = list(row[1:]) if len(key_columns) > 1 else row[1]
+            self.log_change(cursor, crawl_timestamp, table_name, 'expire', row[0], key)
+        return len(rows)
+
+    def save_to_database(self, data, data_type, crawl_timestamp):
+        """데이터를 DB에 저장"""
+        if not data:
+            return 0
+
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        saved_count = 0
+        # 새로 늘어난 행 수 (INSERT OR REPLACE로 기존 행을 대체한 경우 제외)
+        inserted_count = 0
+        # 값이 그대로라 크롤링 시각만 갱신한 행 수와 만료 기록 수 (크롤링 세대 판단용)
+        unchanged_count = 0
+        expired_count = 0
+
+        try:
+            if data_type in ['departure', 'arrival', 'VFR']:
+                stats_table = 'flight_plans'
+                previous_crawl = self.previous_crawl_timestamp(
+                    cursor, 'flight_plans', 'plan_type', data_type, crawl_timestamp)
+                key_match = ' AND '.join(f'{column} IS ?' for column in self.FLIGHT_KEY_COLUMNS)
+
+                for item in data:
+                    try:
+                        key = [item.get(column) for column in self.FLIGHT_KEY_COLUMNS]
+                        values = [item.get(column) for column in self.FLIGHT_VALUE_COLUMNS]
+                        found = cursor.execute(f'''
+                            SELECT id, crawl_timestamp, {', '.join(self.FLIGHT_VALUE_COLUMNS)}
+                            FROM flight_plans WHERE {key_match}
+                        ''', key).fetchone()
+                        previous = found[1:] if found else None
+                        change = self.classify_change(previous, values, previous_crawl, crawl_timestamp)
+
+                        if found and None not in key and tuple(previous[1:]) == tuple(values):
+                            # 값이 그대로면 행(id)을 유지하고 크롤링 시각만 갱신:
+                            # change_log/스트림이 가리키는 id가 다음 크롤링에도 살아 있다
+                            flight_id = found[0]
+                            self.touch_row(cursor, 'flight_plans', flight_id, crawl_timestamp)
+                            self.update_route_lookup(cursor, flight_id)
+                            if change:
+                                self.log_change(cursor, crawl_timestamp, 'flights', change, flight_id, key)
+                            else:
+                                unchanged_count += 1
+                            saved_count += 1
+                            continue
+
+                        cursor.execute('''
+                            INSERT OR REPLACE INTO flight_plans
+                            (crawl_timestamp, plan_type, flight_number, aircraft_type,
+                             registration, origin, destination, std, etd, atd, sta, eta, status, nature,
+                             flight_number_norm, registration_norm, origin_icao, destination_icao)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', (
+                            crawl_timestamp, item.get('plan_type'), item.get('flight_number'),
+                            item.get('aircraft_type'), item.get('registration'),
+                            item.get('origin'), item.get('destination'),
+                            item.get('std'), item.get('etd'), item.get('atd'),
+                            item.get('sta'), item.get('eta'),
+                            item.get('status'), item.get('nature'),
+                            normalize_ident(item.get('flight_number')),
+                            normalize_ident(item.get('registration')),
+                            normalize_icao(item.get('origin')),
+                            normalize_icao(item.get('destination'))
+                        ))
+
+                        flight_id = cursor.lastrowid
+                        self.update_route_lookup(cursor, flight_id)
+                        # UNIQUE 키에 NULL이 있으면 충돌하지 않아 항상 새 행이 된다
+                        if previous is None or None in key:
+                            inserted_count += 1
+
+                        if change:
+                            self.log_change(cursor, crawl_timestamp, 'flights', change,
+                                            flight_id, key)
+                        saved_count += 1
+                    except Exception as e:
+                        logger.debug(f"저장 오류: {e}")
+
+                expired_count = self.expire_missing(cursor, 'flight_plans', 'flights', 'plan_type',
+                                                    self.FLIGHT_KEY_COLUMNS, data_type, previous_crawl,
+                                                    crawl_timestamp)
+
+            elif data_type in ['metar', 'taf', 'sigmet', 'admet']:
+                stats_table = 'weather'
+                for item in data:
+                    try:
+                        airport_icao = normalize_icao(item.get('airport'))
+                        previous = cursor.execute('''
+                            SELECT observation_time, raw_text FROM weather_latest
+                            WHERE weather_type = ? AND airport_icao = ?
+                        ''', (item.get('weather_type'), airport_icao)).fetchone()
+
+                        cursor.execute('''
+                            INSERT INTO weather
+                            (crawl_timestamp, weather_type, airport, observation_time, raw_text,
+                             airport_icao)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        ''', (
+                            crawl_timestamp, item.get('weather_type'),
+                            item.get('airport'), item.get('observation_time'),
+                            item.get('raw_text'), airport_icao
+                        ))
+                        weather_id = cursor.lastrowid
+                        self.update_weather_latest(cursor, weather_id)
+                        inserted_count += 1
+
+                        # 이력은 매번 쌓지만 변경 로그는 공항/종류별 최신 관측이 바뀔 때만
+                        values = (item.get('observation_time'), item.get('raw_text'))
+                        if airport_icao and item.get('weather_type') and tuple(previous or ()) != values:
+                            self.log_change(cursor, crawl_timestamp, 'weather',
+                                            'update' if previous else 'insert', weather_id,
+                                            [item.get('weather_type'), airport_icao])
+                        saved_count += 1
+                    except Exception as e:
+                        logger.debug(f"저장 오류: {e}")
+
+            elif data_type in ['fir', 'ad', 'snow', 'prohibited']:
+                stats_table = 'notams'
+                previous_crawl = self.previous_crawl_timestamp(
+                    cursor, 'notams', 'notam_type', data_type, crawl_timestamp)
+
+                for item in data:
+                    try:
+                        values = [item.get(column) for column in self.NOTAM_VALUE_COLUMNS]
+                        found = cursor.execute(f'''
+                            SELECT id, crawl_timestamp, {', '.join(self.NOTAM_VALUE_COLUMNS)}
+                            FROM notams WHERE notam_id = ?
+                        ''', (item.get('notam_id'),)).fetchone()
+                        previous = found[1:] if found else None
+                        change = self.classify_change(previous, values, previous_crawl, crawl_timestamp)
+
+                        if found and item.get('notam_id') is not None and tuple(previous[1:]) == tuple(values):
+                            # 값이 그대로면 행(id)과 전문 검색 색인을 유지하고 크롤링 시각만 갱신
+                            self.touch_row(cursor, 'notams', found[0], crawl_timestamp)
+                            if change:
+                                self.log_change(cursor, crawl_timestamp, 'notams', change,
+                                                found[0], item.get('notam_id'))
+                            else:
+                                unchanged_count += 1
+                            saved_count += 1
+                            continue
+
+                        if self.fts_enabled:
+                            # INSERT OR REPLACE로 지워질 기존 행의 색인 제거
+                            cursor.execute('''
+                                DELETE FROM notams_fts
+                                WHERE rowid IN (SELECT id FROM notams WHERE notam_id = ?)
+                            ''', (item.get('notam_id'),))
+
+                        cursor.execute('''
+                            INSERT OR REPLACE INTO notams
+                            (crawl_timestamp, notam_type, notam_id, location, qcode,
+                             start_time, end_time, message, location_icao)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', (
+                            crawl_timestamp, item.get('notam_type'), item.get('notam_id'),
+                            item.get('location'), item.get('qcode'),
+                            item.get('start_time'), item.get('end_time'),
+                            item.get('message'), normalize_icao(item.get('location'))
+                        ))
+
+                        notam_row_id = cursor.lastrowid
+                        if previous is None:
+                            inserted_count += 1
+
+                        if self.fts_enabled:
+                            cursor.execute('''
+                                INSERT INTO notams_fts (rowid, notam_id, location, qcode, message)
+                                VALUES (?, ?, ?, ?, ?)
+                            ''', (
+                                notam_row_id, item.get('notam_id'), item.get('location'),
+                                item.get('qcode'), item.get('message')
+                            ))
+
+                        if change:
+                            self.log_change(cursor, crawl_timestamp, 'notams', change,
+                                            notam_row_id, item.get('notam_id'))
+                        saved_count += 1
+                    except Exception as e:
+                        logger.debug(f"저장 오류: {e}")
+
+                expired_count = self.expire_missing(cursor, 'notams', 'notams', 'notam_type', ('notam_id',),
+                                                    data_type, previous_crawl, crawl_timestamp)
+
+            else:
+                stats_table = None
+
+            if stats_table and saved_count:
+                self.update_table_stats(cursor, stats_table, inserted_count, crawl_timestamp)
+
+            conn.commit()
+            self.pending_changes += saved_count - unchanged_count + expired_count
+
+        except Exception as e:
+            logger.error(f"[ERROR] DB 저장 오류: {e}")
+        finally:
+            conn.close()
+
+        return saved_count
+
+    def log_crawl(self, crawl_timestamp, data_type, status, records_found,
+                  records_saved, error_message=None, execution_time=0, type_logs=()):
+        """크롤링 로그 저장
+
+        type_logs(save_results가 모은 데이터 종류별 (data_type, records_found, records_saved))는
+        요약 행 앞에 같은 트랜잭션으로 기록한다. 지난 로그 이후 저장에서 실제로 바뀐 행이 있을 때만
+        API의 크롤링 세대(table_stats의 GENERATION_STATS_KEY 행)를 올리므로, 세대는 크롤링당
+        최대 한 번 바뀌고 바뀐 것이 없는 크롤링은 응답 캐시/ETag를 무효화하지 않는다.
+        """
+        rows = [(crawl_timestamp, log_type, 'SUCCESS', found, saved, None, 0)
+                for log_type, found, saved in type_logs]
+        rows.append((crawl_timestamp, data_type, status, records_found,
+                     records_saved, error_message, execution_time))
+
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+
+        cursor.executemany('''
+            INSERT INTO crawl_logs
+            (crawl_timestamp, data_type, status, records_found, records_saved,
+             error_message, execution_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.update_table_stats(cursor, 'crawl_logs', len(rows), crawl_timestamp)
+        if self.pending_changes or not cursor.execute(
+                'SELECT 1 FROM table_stats WHERE table_name = ?', (GENERATION_STATS_KEY,)).fetchone():
+            self.advance_generation(cursor, crawl_timestamp)
+
+        conn.commit()
+        conn.close()
+        self.pending_changes = 0
+
+    def advance_generation(self, cursor, crawl_timestamp):
+        """크롤링 세대 올리기 (table_stats 행: row_count = 세대 번호, last_crawl = 바뀐 크롤링 시각)"""
+        cursor.execute('''
+            INSERT INTO table_stats (table_name, row_count, last_crawl)
+            VALUES (?, (SELECT COALESCE(MAX(id), 0) FROM crawl_logs), ?)
+            ON CONFLICT (table_name) DO UPDATE SET
+                row_count = row_count + 1,
+                last_crawl = excluded.last_crawl
+        ''', (GENERATION_STATS_KEY, crawl_timestamp))
+
+    def save_results(self, tasks, results, crawl_timestamp):
+        """작업 결과를 한 스레드에서 작업 순서대로 DB 저장 (모두 같은 crawl_timestamp)
+
+        종류별 crawl_logs 행은 여기서 쓰지 않고 (저장 건수, 종류별 로그) 로 돌려준다. 호출한 쪽이
+        모든 종류를 저장한 뒤 log_crawl(type_logs=)로 요약과 함께 기록해, 저장 도중에는
+        API 크롤링 세대(응답 캐시/ETag)가 바뀌지 않는다.
+        """
+        saved_total = 0
+        type_logs = []
+        for key, _, _, data_type in tasks:
+            if data_type:
+                saved_count = self.save_to_database(results[key], data_type, crawl_timestamp)
+                type_logs.append((data_type, len(results[key]), saved_count))
+                saved_total += saved_count
+        return saved_total, type_logs